@@ -0,0 +1,87 @@
+"""
+Benchmark: Deduplizierung der Segmente (content_dedup.py).
+
+Erzeugt synthetische Doku-Seiten und dazu Varianten mit einem kleinen Anteil geänderter
+Wörter (wie versionierte Kopien oder Seiten mit anderem Kopf), und misst:
+
+* Zeit pro Seite für die exakte Prüfung und für exakt + MinHash/LSH,
+* Speicherbedarf des Ähnlichkeits-Index pro Seite (tracemalloc) und die Obergrenze,
+* Trefferquote: wie viele Varianten als Duplikat erkannt werden und wie viele
+  unabhängige Seiten fälschlich als Duplikat gelten.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/benchmarks/bench_content_dedup.py --pages 5000 --words 800
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+from content_dedup import ContentDeduplicator, NearDuplicateIndex
+
+VOCABULARY = [f"word{i}" for i in range(5000)] + ["k_thread", "k_sem", "device", "struct", "Kconfig", "CONFIG_LOG"]
+
+
+def make_page(rng, words):
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def make_variant(rng, text, change_ratio):
+    tokens = text.split()
+    for _ in range(max(1, int(len(tokens) * change_ratio))):
+        tokens[rng.randrange(len(tokens))] = rng.choice(VOCABULARY)
+    return ' '.join(tokens)
+
+
+def run(deduplicator, pages):
+    results = []
+    start = time.perf_counter()
+    for url, text in pages:
+        results.append(deduplicator.check(url, text)[0])
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=5000, help="Anzahl unabhängiger Seiten")
+    parser.add_argument('--words', type=int, default=800, help="Wörter pro Seite")
+    parser.add_argument('--change-ratio', type=float, default=0.005, help="Anteil geänderter Wörter in den Varianten")
+    parser.add_argument('--threshold', type=float, default=0.9, help="Schwellwert für ähnliche Seiten")
+    parser.add_argument('--index-size', type=int, default=50000, help="Obergrenze des Ähnlichkeits-Index")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    originals = [(f"https://docs.example.org/page{i}.html", make_page(rng, args.words)) for i in range(args.pages)]
+    exact_copies = [(url.replace("/page", "/v2/page"), "  " + text.upper()) for url, text in originals[:args.pages // 10]]
+    variants = [(url.replace("/page", "/v3/page"), make_variant(rng, text, args.change_ratio)) for url, text in originals[:args.pages // 10]]
+    pages = originals + exact_copies + variants
+
+    exact_time, exact_results = run(ContentDeduplicator(), pages)
+
+    near_index = NearDuplicateIndex(threshold=args.threshold, max_entries=args.index_size)
+    near_time, near_results = run(ContentDeduplicator(near_index=near_index), pages)
+
+    # Speicher in einem zweiten Durchlauf messen (tracemalloc verfälscht die Laufzeit)
+    tracemalloc.start()
+    memory_index = NearDuplicateIndex(threshold=args.threshold, max_entries=args.index_size)
+    run(ContentDeduplicator(near_index=memory_index), pages)
+    index_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    originals_count = len(originals)
+    false_positives = sum(kind is not None for kind in near_results[:originals_count])
+    exact_found = sum(kind == "exact" for kind in near_results[originals_count:originals_count + len(exact_copies)])
+    near_found = sum(kind is not None for kind in near_results[originals_count + len(exact_copies):])
+
+    print(f"Seiten: {len(pages)} ({originals_count} unabhängig, {len(exact_copies)} exakte Kopien, {len(variants)} Varianten mit {args.change_ratio:.1%} geänderten Wörtern)")
+    print(f"Exakt:               {exact_time / len(pages) * 1e6:8.1f} µs/Seite, {sum(kind == 'exact' for kind in exact_results)} Duplikate")
+    print(f"Exakt + MinHash/LSH: {near_time / len(pages) * 1e6:8.1f} µs/Seite")
+    print(f"Index: {len(near_index)} Seiten, ca. {index_memory / max(1, len(near_index)) / 1024:.1f} KB pro Seite (inkl. Hash-Index), Obergrenze {args.index_size}")
+    print(f"Erkannt: {exact_found}/{len(exact_copies)} exakte Kopien, {near_found}/{len(variants)} Varianten | Fehlalarme: {false_positives}/{originals_count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark: Bereinigung von Doxygen-Quelltextseiten.
+
+Misst doxygen_cleaner.clean_doxygen_source() gegen die bisherige Bereinigung aus
+page_extractor.py (unten unverändert als `legacy_clean_doxygen_source` enthalten) auf
+
+* der kernel.h-Quelltextseite aus `corpus/` (so extrahiert, wie es der Crawler tut),
+* einer großen synthetischen Header-Datei (eine Quelltextzeile pro Textzeile, läuft ohne
+  frühen Footer komplett durch).
+
+Dass beide Varianten dasselbe Ergebnis liefern, prüfen die Golden-Tests in
+tests/test_doxygen_cleaner.py (python -m pytest tests).
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/benchmarks/bench_doxygen_cleaner.py --lines 20000
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+from doxygen_cleaner import clean_doxygen_source
+from page_extractor import find_main_content
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+SOURCE_PAGE = "doxygen_source.html.gz"
+
+
+def legacy_clean_doxygen_source(text_content):
+    """Die bisherige zeilenweise Bereinigung aus page_extractor.py, vor doxygen_cleaner.py (Referenz)."""
+    lines = text_content.splitlines()
+    cleaned_source_lines = []
+
+    in_doxygen_source_header = True
+    in_doxygen_source_footer = False
+
+    for line in lines:
+        stripped_line = line.strip()
+
+        if in_doxygen_source_header:
+            if re.match(r'^\d*\s*\/\*.*Copyright \(c\).*', stripped_line) or stripped_line == "Go to the documentation of this file.":
+                continue # Überspringe diese Zeile
+            if re.match(r'^\d*\s*#ifndef', stripped_line) or re.match(r'^\d*\s*#define', stripped_line) or re.match(r'^\d*\s*\w+\s+\w+', stripped_line):
+                in_doxygen_source_header = False
+                # Wenn es eine Zeilennummer hat, entfernen wir sie
+                if stripped_line and stripped_line[0].isdigit() and (' ' in stripped_line or '\t' in stripped_line):
+                    parts = stripped_line.split(' ', 1)
+                    if len(parts) > 1 and parts[0].isdigit():
+                        cleaned_source_lines.append(parts[1])
+                    else:
+                        cleaned_source_lines.append(line)
+                else:
+                    cleaned_source_lines.append(line)
+                continue
+            else:
+                continue
+
+        if re.match(r'^(Definition|Flags|Size)\n', line) or \
+           re.match(r'^[a-zA-Z_]+\s*$', line) or \
+           (re.match(r'^.*\.h:[\d]+$', line) and not in_doxygen_source_header):
+            in_doxygen_source_footer = True
+
+        if in_doxygen_source_footer:
+            continue
+
+        if stripped_line and stripped_line[0].isdigit() and (' ' in stripped_line or '\t' in stripped_line):
+            parts = stripped_line.split(' ', 1)
+            if len(parts) > 1 and parts[0].isdigit():
+                cleaned_source_lines.append(parts[1])
+            else:
+                cleaned_source_lines.append(line)
+        else:
+            cleaned_source_lines.append(line)
+
+    text_content = '\n'.join(cleaned_source_lines)
+
+    last_endif_index = text_content.rfind('#endif')
+    if last_endif_index != -1:
+        end_of_endif_line = text_content.find('\n', last_endif_index)
+        if end_of_endif_line != -1:
+            text_content = text_content[:end_of_endif_line].strip()
+        else:
+            text_content = text_content[:last_endif_index + len('#endif')].strip()
+
+    lines = text_content.splitlines()
+    footer_patterns = [
+        r'Definition\n.*?:[\d]+',
+        r'Definition\n.*',
+        r'^\s*$',
+        r'Macro utilities\.?$',
+        r'BSD Sockets compatible API definitions\.?$',
+        r'Generic sockaddr struct\.?$',
+        r'Message struct\.?$'
+    ]
+    cut_index = len(lines)
+    for i in range(len(lines) - 1, -1, -1):
+        line = lines[i].strip()
+        if not line:
+            continue
+
+        found_pattern = False
+        for pattern in footer_patterns:
+            if re.match(pattern, line):
+                found_pattern = True
+                break
+
+        if found_pattern:
+            cut_index = i
+        else:
+            break
+
+    if cut_index < len(lines):
+        text_content = '\n'.join(lines[:cut_index]).strip()
+
+    return '\n'.join(filter(None, text_content.splitlines())).strip()
+
+
+# --- Eingaben ---
+def corpus_source_text():
+    with open(os.path.join(CORPUS_DIR, "pages.json"), 'r', encoding='utf-8') as f:
+        url = json.load(f)[SOURCE_PAGE]
+    with gzip.open(os.path.join(CORPUS_DIR, SOURCE_PAGE), 'rt', encoding='utf-8') as f:
+        text_content, _ = find_main_content(BeautifulSoup(f.read(), 'html.parser'))
+    return url, text_content
+
+
+def large_header_text(line_count):
+    """Synthetische Header-Datei wie kernel.h, eine Quelltextzeile pro Textzeile."""
+    lines = ["Go to the documentation of this file.", "1 /*", "2  * Copyright (c) 2016 Wind River Systems, Inc.",
+             "3  *", "4  * SPDX-License-Identifier: Apache-2.0", "5  */", "6 ", "7 #ifndef ZEPHYR_INCLUDE_KERNEL_H_",
+             "8 #define ZEPHYR_INCLUDE_KERNEL_H_"]
+    number = len(lines)
+    while number < line_count - 2:
+        number += 1
+        kind = number % 6
+        if kind == 0:
+            lines.append(f"{number} /**")
+        elif kind == 1:
+            lines.append(f"{number}  * @brief Start thread number {number} after its delay has expired.")
+        elif kind == 2:
+            lines.append(f"{number}  */")
+        elif kind == 3:
+            lines.append(f"{number} __syscall int k_thread_call_{number}(k_tid_t thread, size_t size);")
+        elif kind == 4:
+            lines.append(f"{number} ")
+        else:
+            lines.append(f"{number} #define K_OPTION_{number} BIT({number % 32})")
+    lines += [f"{number + 1} #endif /* ZEPHYR_INCLUDE_KERNEL_H_ */", "k_thread_start", "int k_thread_start(k_tid_t thread)",
+              "Definition kernel.h:1234", "Macro utilities."]
+    return '\n'.join(lines)
+
+
+def best_time(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=20000, help="Zeilen der synthetischen Header-Datei")
+    parser.add_argument('--repeat', type=int, default=5, help="Durchläufe pro Messung (gemessen wird der schnellste)")
+    args = parser.parse_args()
+
+    url, page_text = corpus_source_text()
+    inputs = {f"Korpus: {os.path.basename(url)}": page_text, f"Synthetischer Header ({args.lines} Zeilen)": large_header_text(args.lines)}
+
+    for name, text in inputs.items():
+        legacy = best_time(legacy_clean_doxygen_source, text, args.repeat)
+        current = best_time(clean_doxygen_source, text, args.repeat)
+        print(f"{name}: {len(text) / 1024:.0f} KB | bisher {legacy * 1000:.2f} ms | neu {current * 1000:.2f} ms | Speedup {legacy / current:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: Extraktions-Engines (BeautifulSoup/html.parser, lxml, selectolax) pro Seite.
+
+Verarbeitet die gespeicherten Sphinx- und Doxygen-Seiten aus `corpus/` mit jeder
+installierten Engine genau so, wie es die Parse-Worker des Crawlers tun
+(page_extractor.extract_page mit den EXTRACTION_SETTINGS aus web_crawler.py), und misst
+die Zeit pro Seite. Zusätzlich wird geprüft, dass Titel, Text, Warnung und Links jeder
+Engine Byte für Byte mit der Referenz (BeautifulSoup) übereinstimmen. Bei einer Abweichung
+endet das Skript mit Exit-Code 1.
+
+Eigene Seiten können ergänzt werden: HTML-Datei (optional .gz) in `corpus/` ablegen und
+mit ihrer Original-URL in `corpus/pages.json` eintragen.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/benchmarks/bench_extraction.py --repeat 5
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+import extraction_engines
+from page_extractor import ENGINES, decode_body, extract_page, resolve_engine
+from web_crawler import EXTRACTION_SETTINGS
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def load_corpus(corpus_dir):
+    with open(os.path.join(corpus_dir, "pages.json"), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    pages = []
+    for file_name, url in manifest.items():
+        opener = gzip.open if file_name.endswith('.gz') else open
+        with opener(os.path.join(corpus_dir, file_name), 'rb') as f:
+            pages.append((file_name, url, f.read()))
+    return pages
+
+
+def available_engines():
+    engines = []
+    for name in ENGINES:
+        try:
+            engines.append(resolve_engine(name))
+        except ImportError:
+            print(f"Engine '{name}' nicht installiert, wird übersprungen.")
+    return engines
+
+
+def time_page(url, content, settings, repeat):
+    """Beste Laufzeit aus `repeat` Durchläufen (Sekunden) und das Ergebnis."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = extract_page(url, content, 'utf-8', settings)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help="Durchläufe pro Seite und Engine (gemessen wird der schnellste)")
+    parser.add_argument('--corpus', default=CORPUS_DIR, help="Verzeichnis mit pages.json und den gespeicherten Seiten")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    engines = available_engines()
+
+    header = f"{'Seite':<30} {'KB':>6}" + ''.join(f" {engine + ' ms':>20}" for engine in engines)
+    print(header)
+    print('-' * len(header))
+
+    totals = dict.fromkeys(engines, 0.0)
+    mismatches = []
+    for file_name, url, content in pages:
+        text = decode_body(content, 'utf-8')
+        row = f"{file_name:<30} {len(content) / 1024:6.0f}"
+        reference = reference_time = None
+        for engine in engines:
+            elapsed, result = time_page(url, content, dict(EXTRACTION_SETTINGS, extraction_engine=engine), args.repeat)
+            totals[engine] += elapsed
+            if engine == 'bs4':
+                reference, reference_time = result, elapsed
+                row += f" {elapsed * 1000:20.2f}"
+                continue
+            # Seiten mit Sonderfällen verarbeitet auch die schnelle Engine mit html.parser
+            marker = '*' if extraction_engines.needs_reference_parser(text, engine) else ' '
+            if result != reference:
+                mismatches.append((file_name, engine))
+                marker = '!'
+            row += f" {elapsed * 1000:10.2f} ({reference_time / elapsed:5.1f}x){marker}"
+        print(row)
+
+    print('-' * len(header))
+    print(f"{'Summe':<30} {'':>6}" + ''.join(f" {totals[engine] * 1000:20.2f}" for engine in engines))
+    for engine in engines:
+        if engine != 'bs4':
+            print(f"Speedup {engine} gegenüber bs4: {totals['bs4'] / totals[engine]:.1f}x")
+    print("* = Seite enthält Sonderfälle und wurde mit html.parser verarbeitet")
+
+    if mismatches:
+        for file_name, engine in mismatches:
+            print(f"ABWEICHUNG: {file_name} liefert mit '{engine}' ein anderes Ergebnis als mit bs4 (!)")
+        sys.exit(1)
+    print("Alle Ergebnisse sind identisch mit der Referenz (bs4).")
+
+
+if __name__ == '__main__':
+    main()
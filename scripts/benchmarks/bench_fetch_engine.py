@@ -0,0 +1,109 @@
+"""
+Benchmark: sequentielle Schleife (wie bisher in web_crawler.py) gegen die asynchrone FetchEngine.
+
+Startet einen lokalen HTTP-Server, der jede Seite mit einer künstlichen Latenz ausliefert,
+und misst Seiten pro Sekunde für beide Varianten. Es wird nichts aus dem Internet geladen.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/benchmarks/bench_fetch_engine.py --pages 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+from fetch_engine import FetchEngine
+
+HEADERS = {'User-Agent': 'ki-data-crawler-benchmark', 'Connection': 'keep-alive'}
+HTTP_TIMEOUT = 30
+
+
+def make_handler(latency, page_size):
+    body = ("<html><body><div itemprop=\"articleBody\">" + "x" * page_size + "</div></body></html>").encode('utf-8')
+
+    class PageHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # Keep-Alive wie bei echten Servern
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PageHandler
+
+
+def run_sequential(urls):
+    session = requests.Session()
+    start = time.perf_counter()
+    for url in urls:
+        response = session.get(url, timeout=HTTP_TIMEOUT, headers=HEADERS)
+        response.raise_for_status()
+        _ = response.text
+    elapsed = time.perf_counter() - start
+    session.close()
+    return elapsed
+
+
+async def _run_engine(urls, concurrency, per_host, interval):
+    engine = FetchEngine(HEADERS, HTTP_TIMEOUT, max_concurrent=concurrency,
+                         max_per_host=per_host, min_host_interval=interval)
+
+    async def fetch_one(url):
+        response = await engine.fetch(url)
+        response.raise_for_status()
+        _ = response.text
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch_one(url) for url in urls))
+        return time.perf_counter() - start
+    finally:
+        engine.close()
+
+
+def run_async(urls, concurrency, per_host, interval):
+    return asyncio.run(_run_engine(urls, concurrency, per_host, interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=200, help="Anzahl Seiten pro Durchlauf")
+    parser.add_argument('--latency', type=float, default=0.05, help="Künstliche Serverlatenz pro Seite (Sekunden)")
+    parser.add_argument('--page-size', type=int, default=20000, help="Größe einer Seite in Bytes")
+    parser.add_argument('--concurrency', type=int, default=16, help="Maximale Anfragen gleichzeitig")
+    parser.add_argument('--per-host', type=int, default=16, help="Maximale Anfragen pro Host gleichzeitig")
+    parser.add_argument('--interval', type=float, default=0.0, help="Mindestabstand pro Host (Sekunden)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency, args.page_size))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/page{i}.html" for i in range(args.pages)]
+
+    try:
+        sequential = run_sequential(urls)
+        concurrent = run_async(urls, args.concurrency, args.per_host, args.interval)
+    finally:
+        server.shutdown()
+
+    print(f"Seiten: {args.pages} | Latenz: {args.latency * 1000:.0f} ms | Parallelität: {args.concurrency} (pro Host {args.per_host})")
+    print(f"Sequentiell: {args.pages / sequential:8.1f} Seiten/s ({sequential:.2f} s)")
+    print(f"FetchEngine: {args.pages / concurrent:8.1f} Seiten/s ({concurrent:.2f} s)")
+    print(f"Speedup:     {sequential / concurrent:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Benchmark und Funktionsprüfung: GitHub-Stufe (github_fetcher.py) gegen einen lokalen Ersatz-Server.
+
+Erzeugt eine GitHub-Link-Datei wie sie der Web-Crawler schreibt (blob-Links mit Ankern,
+Raw-Links, doppelte Links, dieselbe Datei unter mehreren Refs, fehlende Dateien) und
+startet einen lokalen HTTP-Server, der raw.githubusercontent.com nachbildet (künstliche
+Latenz, gelegentlich 503 mit Retry-After, einige Dateien dauerhaft 503, eine Datei
+ohne Content-Length und über MAX_FILE_SIZE). Gemessen wird das bisherige Vorgehen (jede
+Datei nacheinander laden) gegen die GitHubFetcher-Stufe. Danach wird geprüft:
+
+* jede eindeutige Datei wurde genau einmal geladen, jeder Inhalt genau einmal gespeichert,
+* die Segment-ID ist der SHA-256 des Inhalts,
+* ein zweiter Lauf lädt nichts erneut (Fortschritt aus der SQLite-Datei), außer den Dateien,
+  die im ersten Lauf nur vorübergehend (503) fehlgeschlagen sind.
+
+Bei einem Fehler endet das Skript mit Exit-Code 1. Es wird nichts aus dem Internet geladen.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/benchmarks/bench_github_fetcher.py --files 300 --latency 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+from github_fetcher import GithubFetcher, GithubFetchProgress, load_github_files, parse_github_file_url, raw_url_for
+from segment_writer import SegmentWriter
+
+REFS = ("main", "v3.7.0") # jede Datei gibt es unter beiden Refs mit identischem Inhalt
+
+
+def file_content(path):
+    return (f"/* {path} */\n" + "int value_%d = %d;\n" * 200).encode('utf-8') % tuple(range(400))
+
+
+MAX_FILE_SIZE = 64 * 1024
+LARGE_PATH = "include/zephyr/large.h"
+
+
+def make_handler(latency, missing_paths, busy_paths, request_counts):
+    lock = threading.Lock()
+
+    class RawHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            path = self.path.split('/', 4)[-1] # /<owner>/<repo>/<ref>/<pfad>
+            with lock:
+                request_counts[self.path] = request_counts.get(self.path, 0) + 1
+                first_request = request_counts[self.path] == 1
+            if path in missing_paths:
+                self._reply(404, b'404: Not Found')
+            elif path in busy_paths:
+                self._reply(503, b'busy', {'Retry-After': '0'})
+            elif path == LARGE_PATH:
+                self._reply_unsized(b'/* large */\n' * (2 * MAX_FILE_SIZE // 10))
+            elif first_request and hash(path) % 10 == 0:
+                self._reply(503, b'busy', {'Retry-After': '0'})
+            else:
+                self._reply(200, file_content(path))
+
+        def _reply(self, status, body, headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _reply_unsized(self, body):
+            # Ohne Content-Length: die Grenze greift erst beim Lesen des Bodys
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                self.wfile.write(body)
+            except OSError:
+                pass # Client hat den Download abgebrochen
+
+        def log_message(self, format, *args):
+            pass
+
+    return RawHandler
+
+
+def write_links_file(links_file, count):
+    """Link-Datei mit Duplikaten, Ankern, Raw-Links und Nicht-Datei-Links.
+
+    Gibt die endgültig fehlschlagenden (404, zu groß) und die dauerhaft überlasteten Pfade zurück.
+    """
+    missing = {f"include/zephyr/missing_{i}.h" for i in range(max(1, count // 50))} | {LARGE_PATH}
+    busy = {f"include/zephyr/busy_{i}.h" for i in range(max(1, count // 100))}
+    urls = []
+    for i in range(count):
+        path = f"include/zephyr/drivers/file_{i}.h"
+        urls.append(f"https://github.com/zephyrproject-rtos/zephyr/blob/{REFS[0]}/{path}#L{i}")
+        urls.append(f"https://github.com/ZephyrProject-RTOS/Zephyr/blob/{REFS[0]}/{path}") # gleiche Datei
+        if i % 3 == 0:
+            urls.append(f"https://raw.githubusercontent.com/zephyrproject-rtos/zephyr/{REFS[1]}/{path}")
+    urls += [f"https://github.com/zephyrproject-rtos/zephyr/blob/main/{path}" for path in sorted(missing | busy)]
+    urls += ["https://github.com/zephyrproject-rtos/zephyr/tree/main/include", "https://github.com/zephyrproject-rtos/zephyr/issues/1.txt"]
+    with open(links_file, 'w', encoding='utf-8') as f:
+        for url in urls:
+            f.write(json.dumps({"url": url, "source_page": "https://docs.zephyrproject.org/latest/", "file_extension": ".h"}) + '\n')
+    return missing, busy
+
+
+def run_sequential(files, raw_base_url):
+    """Bisheriges Vorgehen: jede Datei einzeln nacheinander laden."""
+    session = requests.Session()
+    start = time.perf_counter()
+    for _, (_, github_file) in files.items():
+        response = session.get(raw_url_for(github_file, raw_base_url), timeout=30)
+        _ = response.content
+    elapsed = time.perf_counter() - start
+    session.close()
+    return elapsed
+
+
+def run_stage(files, workdir, raw_base_url, concurrency):
+    """Ein Lauf der Stufe wie in github_fetcher.main(); gibt (Sekunden, Statistik) zurück."""
+    progress = GithubFetchProgress(os.path.join(workdir, "progress.sqlite"))
+    writer = SegmentWriter(os.path.join(workdir, "github_segments.jsonl"))
+    progress.add_commit_hook(writer.sync)
+    finished = progress.load_finished_keys()
+    todo = [(key, github_file) for key, (_, github_file) in files.items() if key not in finished]
+    fetcher = GithubFetcher(writer, progress, raw_base_url=raw_base_url, max_concurrent=concurrency, min_interval=0.0,
+                            max_file_size=MAX_FILE_SIZE)
+    start = time.perf_counter()
+    try:
+        asyncio.run(fetcher.fetch_all(todo))
+    finally:
+        progress.close()
+        writer.close()
+    return time.perf_counter() - start, fetcher.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=300, help="Anzahl verschiedener Dateipfade")
+    parser.add_argument('--latency', type=float, default=0.05, help="Künstliche Serverlatenz pro Datei (Sekunden)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Maximale Anfragen gleichzeitig")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR) # erwartete 404-Warnungen nicht ausgeben
+
+    request_counts = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        links_file = os.path.join(workdir, "github_links.jsonl")
+        missing, busy = write_links_file(links_file, args.files)
+        files, link_count, skipped = load_github_files(links_file)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency, missing, busy, request_counts))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        raw_base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+        try:
+            sequential = run_sequential(files, raw_base_url)
+            request_counts.clear()
+            concurrent, stats = run_stage(files, workdir, raw_base_url, args.concurrency)
+            stage_requests = sum(request_counts.values())
+            _, resume_stats = run_stage(files, workdir, raw_base_url, args.concurrency)
+        finally:
+            server.shutdown()
+
+        with open(os.path.join(workdir, "github_segments.jsonl"), 'r', encoding='utf-8') as f:
+            segments = [json.loads(line) for line in f]
+
+    errors = []
+    unique_contents = len({parse_github_file_url(url).path for url, _ in files.values()} - missing - busy)
+    if len(segments) != unique_contents or stats["written"] != unique_contents:
+        errors.append(f"{len(segments)} Segmente gespeichert, erwartet {unique_contents} (ein Segment pro Inhalt)")
+    if any(segment["id"] != hashlib.sha256(segment["content"].encode('utf-8')).hexdigest() for segment in segments):
+        errors.append("Segment-ID entspricht nicht dem SHA-256 des Inhalts")
+    if stats["failed"] != len(missing) or stats["retry_later"] != len(busy) or stats["fetched"] != len(files) - len(missing) - len(busy):
+        errors.append(f"Statistik passt nicht: {stats}")
+    if resume_stats["retry_later"] != len(busy) or any(value for name, value in resume_stats.items() if name != "retry_later"):
+        errors.append(f"Zweiter Lauf sollte nur die vorübergehend fehlgeschlagenen Dateien erneut versuchen: {resume_stats}")
+
+    print(f"\nLinks: {link_count} | eindeutige Dateien: {len(files)} | keine Datei-Links: {skipped} | fehlend: {len(missing)} | dauerhaft 503: {len(busy)} | Latenz: {args.latency * 1000:.0f} ms")
+    print(f"Sequentiell:   {len(files) / sequential:8.1f} Dateien/s ({sequential:.2f} s)")
+    print(f"GithubFetcher: {len(files) / concurrent:8.1f} Dateien/s ({concurrent:.2f} s, {stage_requests} Anfragen inkl. Wiederholungen)")
+    print(f"Speedup:       {sequential / concurrent:8.1f}x")
+    print(f"Segmente: {len(segments)} (Inhalte unter mehreren Refs nur einmal gespeichert: {stats['duplicate_content']})")
+    for error in errors:
+        print(f"FEHLER: {error}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+Benchmark und Regressionsprüfung: die Stufen des Crawlers offline aus einem Antwort-Archiv.
+
+Das Archiv entsteht bei einem normalen Crawl mit `web_crawler.py --record <ordner>` (siehe
+response_archive.py). Ohne --archive wird aus den Seiten in `corpus/` ein kleines Archiv
+mit Sitemap erzeugt. Gemessen werden, jede Stufe in einem eigenen Prozess:
+
+* fetch:    FetchEngine lädt alle HTML-Seiten des Archivs über den ReplayAdapter (Streaming,
+            Typ- und Größenprüfung, requests/urllib3), ohne Netzwerk
+* parse:    decode_body() und Aufbau des HTML-Baums mit der Extraktions-Engine (parse_html)
+* extract:  Bereinigung des Hauptinhalts und Link-Klassifizierung (finish_content, classify_links)
+* pipeline: kompletter CrawlRunner im Replay-Modus (robots.txt, Seeding, Frontier, Checkpoint,
+            Parse-Pool, Deduplizierung, Schreiben der Segmente)
+
+Pro Stufe: Seiten pro Sekunde, CPU-Zeit pro Seite (inkl. Threads und Parse-Worker) und Peak RSS
+des Prozesses. Jede Stufe läuft --repeat mal, gewertet wird der schnellste Durchlauf. fetch,
+parse und extract verarbeiten die Seiten so oft, bis mindestens --min-pages erreicht sind. Bei
+der pipeline zählen alle geladenen URLs, auch solche, die nicht im Archiv liegen.
+
+Als Regressionsprüfung: --save speichert die Ergebnisse, --baseline vergleicht mit einer
+gespeicherten Datei. Ist eine Stufe um mehr als --tolerance langsamer, braucht mehr CPU pro
+Seite oder mehr Speicher, endet das Skript mit Exit-Code 1 (ebenso, wenn die Wiedergabe
+andere Bodys liefert als aufgezeichnet). Baseline und Vergleich sollten auf derselben
+Maschine entstehen.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/crawler/web_crawler.py --record data/archive/zephyr
+    python scripts/benchmarks/bench_replay.py --archive data/archive/zephyr --save logs/bench_baseline.json
+    python scripts/benchmarks/bench_replay.py --archive data/archive/zephyr --baseline logs/bench_baseline.json
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+import web_crawler
+from bench_extraction import CORPUS_DIR, load_corpus
+from fetch_engine import FetchEngine, header_charset, media_type
+from page_extractor import classify_links, decode_body, finish_content, parse_html, resolve_engine
+from response_archive import ResponseArchive
+
+STAGES = ("fetch", "parse", "extract", "pipeline")
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+# (Kennzahl, True = höher ist besser)
+GATED_METRICS = (("pages_per_sec", True), ("cpu_ms_per_page", False), ("peak_rss_mb", False))
+
+
+def build_corpus_archive(path, base_url):
+    """Archiv aus den Seiten in corpus/ plus einer sitemap.xml, die auf alle verweist."""
+    archive = ResponseArchive(path, writable=True)
+    urls = []
+    for _, url, content in load_corpus(CORPUS_DIR):
+        archive.record(url, 200, "OK", [("Content-Type", "text/html; charset=utf-8")], content)
+        urls.append(url)
+    sitemap = ('<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+               + ''.join(f"<url><loc>{url}</loc></url>\n" for url in urls) + "</urlset>\n")
+    archive.record(base_url + "sitemap.xml", 200, "OK", [("Content-Type", "application/xml")], sitemap.encode('utf-8'))
+    archive.close()
+
+
+def html_entries(archive):
+    """Vollständig aufgezeichnete HTML-Seiten mit Status 200."""
+    entries = []
+    for entry in archive.entries():
+        content_type = next((value for name, value in entry["headers"] if name.lower() == "content-type"), None)
+        if entry["status"] == 200 and not entry["truncated"] and media_type(content_type) in HTML_TYPES:
+            entries.append((entry, content_type))
+    return entries
+
+
+def passes_for(page_count, min_pages):
+    return max(1, -(-min_pages // page_count)) if page_count else 0
+
+
+def cpu_seconds():
+    """CPU-Zeit dieses Prozesses (alle Threads) und seiner beendeten Kindprozesse."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024 # Linux: KiB
+
+
+def timed_runs(run, repeat):
+    """Führt `run()` (gibt die Seitenzahl zurück) `repeat` mal aus; bester Durchlauf nach Laufzeit."""
+    best = None
+    for _ in range(repeat):
+        cpu_before = cpu_seconds()
+        started = time.perf_counter()
+        pages = run()
+        elapsed = time.perf_counter() - started
+        cpu = cpu_seconds() - cpu_before
+        if best is None or elapsed < best[1]:
+            best = (pages, elapsed, cpu)
+    pages, elapsed, cpu = best
+    return {
+        "pages": pages,
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(pages / elapsed, 1) if elapsed else 0.0,
+        "cpu_ms_per_page": round(cpu / pages * 1000, 3) if pages else 0.0,
+    }
+
+
+def bench_fetch(args, errors):
+    archive = ResponseArchive(args.archive)
+    entries = [entry for entry, _ in html_entries(archive)]
+    urls = [entry["url"] for entry in entries] * passes_for(len(entries), args.min_pages)
+    expected = {entry["url"]: entry["body"] for entry in entries}
+    settings = web_crawler.RUN_SETTING_DEFAULTS
+
+    async def fetch_all():
+        engine = FetchEngine(
+            web_crawler.HEADERS, web_crawler.HTTP_TIMEOUT,
+            max_concurrent=args.concurrency,
+            max_per_host=args.concurrency,
+            max_body_bytes=settings["max_page_bytes"],
+            allowed_content_types=settings["allowed_content_types"],
+            archive=archive,
+            replay=True,
+        )
+        try:
+            # Wie im Crawler: höchstens `concurrency` Fetch-Tasks gleichzeitig
+            pending = iter(urls)
+
+            async def fetch_worker():
+                for url in pending:
+                    response = await engine.fetch(url)
+                    if hashlib.sha256(response.content).hexdigest() != expected[url]:
+                        errors.append(f"fetch: {url} liefert einen anderen Body als aufgezeichnet")
+            await asyncio.gather(*(fetch_worker() for _ in range(args.concurrency)))
+        finally:
+            engine.close()
+        return len(urls)
+
+    return timed_runs(lambda: asyncio.run(fetch_all()), args.repeat)
+
+
+def load_pages(args):
+    archive = ResponseArchive(args.archive)
+    return [(entry["url"], archive.read_body(entry), header_charset(content_type)) for entry, content_type in html_entries(archive)]
+
+
+def bench_parse(args, errors):
+    pages = load_pages(args)
+    settings = dict(web_crawler.EXTRACTION_SETTINGS, extraction_engine=args.engine)
+    passes = passes_for(len(pages), args.min_pages)
+
+    def run():
+        for _ in range(passes):
+            for _, content, charset in pages:
+                parse_html(decode_body(content, charset), settings)
+        return len(pages) * passes
+
+    return timed_runs(run, args.repeat)
+
+
+def bench_extract(args, errors):
+    settings = dict(web_crawler.EXTRACTION_SETTINGS, extraction_engine=args.engine)
+    # Eingabe der Stufe (Rohtext und Links) vorab erzeugen; gemessen wird nur die Extraktion
+    parsed = [(url, parse_html(decode_body(content, charset), settings)) for url, content, charset in load_pages(args)]
+    passes = passes_for(len(parsed), args.min_pages)
+
+    def run():
+        for _ in range(passes):
+            for url, (text_content, page_title, hrefs) in parsed:
+                finish_content(url, text_content, page_title, settings)
+                classify_links(hrefs, url, settings)
+        return len(parsed) * passes
+
+    return timed_runs(run, args.repeat)
+
+
+def bench_pipeline(args, errors):
+    site = web_crawler.site_settings({"project_name": "bench", "base_url": args.base_url, "extraction_engine": args.engine})
+    run_settings = {"parse_workers": args.parse_workers, "max_concurrent_requests": args.concurrency, "metrics_port": None}
+    web_crawler.METRICS_SNAPSHOT_INTERVAL = None
+    missing = []
+
+    def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            # Jeder Durchlauf beginnt ohne Checkpoint
+            web_crawler.DATA_DIR = web_crawler.LOG_DIR = tmp
+            runner = web_crawler.CrawlRunner(
+                [site], run_settings,
+                log_file=web_crawler.project_files("bench")["log"],
+                metrics_file=os.path.join(tmp, "metrics.jsonl"),
+                profile_dir=tmp,
+                replay_archive=args.archive,
+            )
+            with contextlib.redirect_stdout(io.StringIO()): # Fortschrittsanzeige des Crawlers
+                runner.run()
+            counters = runner.metrics.snapshot()["counters"]
+            missing.append(counters.get("pages_skipped", {}).get("not_archived", 0))
+            return sum(site.total_urls_processed_in_this_run for site in runner.sites)
+
+    result = timed_runs(run, args.repeat)
+    result["not_archived"] = missing[-1]
+    return result
+
+
+BENCHMARKS = {"fetch": bench_fetch, "parse": bench_parse, "extract": bench_extract, "pipeline": bench_pipeline}
+
+
+def measure(stage, args, results):
+    errors = []
+    result = BENCHMARKS[stage](args, errors)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    result["errors"] = errors[:10]
+    results[stage] = result
+
+
+def compare(results, baseline, tolerance):
+    """Abweichungen gegenüber der Baseline, die schlechter als `tolerance` sind."""
+    regressions = []
+    for stage, result in results.items():
+        reference = baseline["stages"].get(stage)
+        if reference is None:
+            continue
+        if reference["pages"] != result["pages"]:
+            regressions.append(f"{stage}: {result['pages']} Seiten statt {reference['pages']} wie in der Baseline (anderes Archiv?)")
+            continue
+        for metric, higher_is_better in GATED_METRICS:
+            old, new = reference[metric], result[metric]
+            worse = new < old * (1 - tolerance) if higher_is_better else new > old * (1 + tolerance)
+            if worse:
+                regressions.append(f"{stage}: {metric} {new} gegenüber {old} in der Baseline ({(new - old) / old * 100:+.0f} %)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--archive', help="Archiv-Ordner aus web_crawler.py --record (Standard: Archiv aus corpus/)")
+    parser.add_argument('--base-url', default=web_crawler.base_url, help="Basis-URL der Seite im Archiv (für die pipeline)")
+    parser.add_argument('--stages', default=','.join(STAGES), help="kommagetrennte Auswahl aus " + ', '.join(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help="Durchläufe pro Stufe (gewertet wird der schnellste)")
+    parser.add_argument('--min-pages', type=int, default=500, help="fetch/parse/extract: mindestens so viele Seiten pro Durchlauf")
+    parser.add_argument('--engine', default=web_crawler.EXTRACTION_ENGINE, help="Extraktions-Engine (auto, bs4, lxml, selectolax)")
+    parser.add_argument('--concurrency', type=int, default=web_crawler.MAX_CONCURRENT_REQUESTS, help="gleichzeitige Anfragen")
+    parser.add_argument('--parse-workers', type=int, default=web_crawler.PARSE_WORKERS, help="Parse-Worker der pipeline")
+    parser.add_argument('--save', help="Ergebnisse als JSON speichern (Baseline für --baseline)")
+    parser.add_argument('--baseline', help="Ergebnisse mit dieser Datei vergleichen; Exit-Code 1 bei einer Verschlechterung")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="erlaubte Verschlechterung gegenüber der Baseline (0.25 = 25 %%)")
+    args = parser.parse_args()
+    args.engine = resolve_engine(args.engine)
+    stages = [stage.strip() for stage in args.stages.split(',')]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unbekannte Stufe(n): {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.archive is None:
+            args.archive = os.path.join(tmp, "corpus_archive")
+            build_corpus_archive(args.archive, args.base_url)
+        archive = ResponseArchive(args.archive)
+        print(f"Archiv: {args.archive} ({len(archive)} Antworten, {len(html_entries(archive))} HTML-Seiten) | Engine: {args.engine}")
+
+        errors = []
+        results = {}
+        print(f"{'Stufe':<10} {'Seiten':>8} {'Seiten/s':>10} {'CPU ms/Seite':>13} {'Peak RSS MB':>12}")
+        with multiprocessing.Manager() as manager:
+            shared = manager.dict()
+            for stage in stages:
+                # Eigener Prozess je Stufe, damit Peak RSS nicht von der vorherigen abhängt
+                process = multiprocessing.Process(target=measure, args=(stage, args, shared))
+                process.start()
+                process.join()
+                if stage not in shared:
+                    errors.append(f"{stage}: Prozess mit Exit-Code {process.exitcode} beendet")
+                    continue
+                result = results[stage] = dict(shared[stage])
+                errors += result.pop("errors")
+                note = f"  ({result['not_archived']} URLs nicht im Archiv)" if result.get("not_archived") else ""
+                print(f"{stage:<10} {result['pages']:>8} {result['pages_per_sec']:>10.1f} {result['cpu_ms_per_page']:>13.3f} {result['peak_rss_mb']:>12.1f}{note}")
+
+    report = {"archive": os.path.abspath(args.archive), "engine": args.engine, "stages": results}
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Ergebnisse gespeichert in {args.save}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        errors += [f"Regression: {regression}" for regression in regressions]
+        if not regressions:
+            print(f"Keine Stufe schlechter als die Baseline (Toleranz {args.tolerance * 100:.0f} %).")
+
+    for error in errors:
+        print(f"FEHLER: {error}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark und Funktionsprüfung: gemeinsame Frontier (shared_frontier.py) mit mehreren Worker-Prozessen.
+
+Mehrere Prozesse arbeiten einen synthetischen Link-Graphen über die gemeinsame Frontier ab:
+URL entnehmen, kurz "laden", ihre Links einreihen, fertig melden. Ein Worker stürzt
+absichtlich ab, während er URLs geleast hat; ihre Leases müssen auslaufen und von den
+anderen Workern übernommen werden. Danach wird geprüft:
+
+* jede URL des Graphen wurde erreicht und ist fertig, keine ist mehr offen oder geleast,
+* keine URL wurde doppelt verarbeitet (außer den URLs des abgestürzten Workers),
+* jeder GitHub-Link wurde genau einmal gesammelt, das Seeding lief genau einmal.
+
+Backends: "sqlite" (temporäre Datei), "fakeredis" (lokaler Redis-kompatibler Ersatz-Server
+aus dem Paket fakeredis, pip install fakeredis redis) oder eine redis://-URL eines
+laufenden Servers (die Schlüssel liegen unter einem zufälligen Namensraum).
+Bei einem Fehler endet das Skript mit Exit-Code 1.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/benchmarks/bench_shared_frontier.py --backend sqlite --workers 4 --urls 3000
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+from frontier import PRIORITY_CONTENT, PRIORITY_SEED
+from shared_frontier import open_shared_frontier
+
+BASE_URL = "https://docs.example.org/latest/"
+CLAIM_BATCH = 16
+
+
+def page_url(index):
+    return f"{BASE_URL}page{index}.html"
+
+
+def page_links(index, url_count, links_per_page):
+    """Deterministische Links: jede Seite verweist auf einige andere, alle Seiten sind erreichbar."""
+    links = [page_url((index * 2 + 1) % url_count), page_url((index * 2 + 2) % url_count)]
+    links += [page_url((index * 7919 + k * 104729) % url_count) for k in range(links_per_page - 2)]
+    return links
+
+
+def github_link(index):
+    return f"https://github.com/example/repo/blob/main/file{index // 10 % 50}.c"
+
+
+def run_worker(spec, namespace, data_dir, worker_id, options, url_count, links_per_page, work_seconds, crash_after, log_path):
+    frontier = open_shared_frontier(spec, namespace, worker_id, data_dir, **options)
+    frontier.heartbeat()
+    if frontier.acquire_once("seeding"):
+        frontier.add([(page_url(0), PRIORITY_SEED)])
+        with open(log_path + ".seeding", 'w') as f:
+            f.write(worker_id)
+
+    processed = 0
+    with open(log_path, 'w', encoding='utf-8') as log:
+        while True:
+            claimed = frontier.claim(CLAIM_BATCH)
+            if not claimed:
+                if frontier.is_finished():
+                    break
+                time.sleep(0.05)
+                continue
+            if crash_after is not None and processed >= crash_after:
+                log.flush()
+                with open(log_path + ".crashed", 'w') as f:
+                    f.write(str(len(claimed)))
+                os._exit(1) # Absturz mit geleasten URLs: keine Freigabe, kein Abschluss
+            # Wie CrawlRunner.renew_leases: Leases verlängern, solange noch URLs in Arbeit sind
+            renew_interval = frontier.lease_seconds / 4
+            last_renewal = time.monotonic()
+            for position, (url, _) in enumerate(claimed):
+                if time.monotonic() - last_renewal >= renew_interval:
+                    frontier.heartbeat()
+                    frontier.renew(url for url, _ in claimed[position:])
+                    last_renewal = time.monotonic()
+                index = int(url[len(BASE_URL) + len("page"):-len(".html")])
+                time.sleep(work_seconds)
+                frontier.add([(link, PRIORITY_CONTENT) for link in page_links(index, url_count, links_per_page)])
+                if index % 10 == 0:
+                    frontier.add_github_link(github_link(index))
+                frontier.complete(url)
+                log.write(url + '\n')
+                processed += 1
+    frontier.close()
+
+
+def start_backend(backend):
+    """Gibt (spec, namespace, stop) zurück; für fakeredis wird ein lokaler Server gestartet."""
+    namespace = f"bench-{uuid.uuid4().hex[:8]}"
+    if backend != "fakeredis":
+        return backend, namespace, lambda: None
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        sys.exit("Für --backend fakeredis werden die Pakete fakeredis und redis benötigt (pip install fakeredis redis).")
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return f"redis://{host}:{port}/0", namespace, server.shutdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', default="sqlite", help="sqlite, fakeredis oder redis://host:port/db")
+    parser.add_argument('--workers', type=int, default=4, help="Anzahl Worker-Prozesse (einer davon stürzt ab)")
+    parser.add_argument('--urls', type=int, default=3000, help="Anzahl Seiten im Link-Graphen")
+    parser.add_argument('--links', type=int, default=6, help="Links pro Seite")
+    parser.add_argument('--work-ms', type=float, default=2.0, help="simulierte Ladezeit pro Seite (ms)")
+    parser.add_argument('--lease', type=float, default=2.0, help="Lease-Dauer in Sekunden")
+    parser.add_argument('--partitions', type=int, default=16, help="Anzahl Partitionen")
+    args = parser.parse_args()
+
+    spec, namespace, stop_backend = start_backend(args.backend)
+    options = {"partitions": args.partitions, "partition_by": "path", "lease_seconds": args.lease}
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if spec == "sqlite":
+            spec = f"sqlite:{tmp}"
+        crash_after = max(1, args.urls // (args.workers * 4))
+        processes = []
+        started = time.perf_counter()
+        for i in range(args.workers):
+            log_path = os.path.join(tmp, f"worker-{i}.log")
+            process = multiprocessing.Process(target=run_worker, args=(
+                spec, namespace, tmp, f"worker-{i}", options, args.urls, args.links,
+                args.work_ms / 1000, crash_after if i == 0 else None, log_path,
+            ))
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        processed = []
+        for i in range(args.workers):
+            with open(os.path.join(tmp, f"worker-{i}.log"), encoding='utf-8') as f:
+                processed.append(f.read().split())
+        seeding_runs = len([name for name in os.listdir(tmp) if name.endswith(".seeding")])
+        crashed_path = os.path.join(tmp, "worker-0.log.crashed")
+        orphaned_leases = int(open(crashed_path).read()) if os.path.exists(crashed_path) else 0
+
+        frontier = open_shared_frontier(spec, namespace, "check", tmp, **options)
+        stats = frontier.stats()
+        github_new = sum(frontier.add_github_link(link) for link in {github_link(i) for i in range(0, args.urls, 10)})
+        frontier.close()
+    stop_backend()
+
+    all_processed = [url for urls in processed for url in urls]
+    duplicates = len(all_processed) - len(set(all_processed))
+    if processes[0].exitcode != 1:
+        errors.append(f"Worker 0 sollte abstürzen, Exit-Code {processes[0].exitcode}")
+    if any(process.exitcode != 0 for process in processes[1:]):
+        errors.append(f"Worker mit Fehler beendet: {[process.exitcode for process in processes]}")
+    if set(all_processed) != {page_url(i) for i in range(args.urls)}:
+        errors.append(f"{args.urls - len(set(all_processed))} Seiten wurden nie verarbeitet")
+    if stats != {"pending": 0, "leased": 0, "done": args.urls}:
+        errors.append(f"Zustand der Frontier passt nicht: {stats}")
+    if duplicates:
+        errors.append(f"{duplicates} Seiten wurden mehrfach verarbeitet")
+    if github_new:
+        errors.append(f"{github_new} GitHub-Links wurden nicht gesammelt")
+    if seeding_runs != 1:
+        errors.append(f"Seeding lief {seeding_runs}-mal statt einmal")
+
+    print(f"\nBackend: {args.backend} | Worker: {args.workers} | Seiten: {args.urls} | Lease: {args.lease:.1f} s")
+    print(f"Durchsatz: {args.urls / elapsed:8.1f} Seiten/s ({elapsed:.2f} s inkl. Warten auf abgelaufene Leases)")
+    print("Seiten pro Worker: " + ", ".join(f"worker-{i}: {len(urls)}" for i, urls in enumerate(processed)) + " (worker-0 abgestürzt)")
+    print(f"Leases des abgestürzten Workers nach Ablauf übernommen: {orphaned_leases} URLs")
+    for error in errors:
+        print(f"FEHLER: {error}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark und Funktionsprüfung: gestreamte Downloads der FetchEngine mit Größen- und Typprüfung.
+
+Startet einen lokalen HTTP-Server mit einer riesigen Seite (gestreamt ohne Content-Length
+bzw. mit angekündigter Größe), Binärdateien mit und ohne passenden Content-Type und Seiten
+in verschiedenen Zeichensätzen ohne Angabe im Header. Geprüft wird:
+
+* zu große Antworten und Binärdateien werden mit ResponseRejected abgelehnt,
+* der Speicherbedarf (Peak RSS) wächst dabei höchstens um etwa --max-mb, nicht um die Seitengröße,
+* decode_body() liefert den richtigen Text (BOM, <meta charset>, windows-1252), wo
+  requests' Response.text ohne Zeichensatz im Header Zeichensalat ("â€™") erzeugt.
+
+Zum Vergleich lädt das bisherige Vorgehen (session.get + response.text) die riesige Seite
+vollständig; mit --skip-baseline entfällt das. Bei einem Fehler endet das Skript mit Exit-Code 1.
+Es wird nichts aus dem Internet geladen.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/benchmarks/bench_streaming_fetch.py --huge-mb 200 --max-mb 20
+"""
+import argparse
+import asyncio
+import codecs
+import os
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+from fetch_engine import FetchEngine, ResponseRejected, header_charset
+from page_extractor import decode_body
+
+HEADERS = {'User-Agent': 'ki-data-crawler-benchmark', 'Connection': 'keep-alive'}
+HTTP_TIMEOUT = 30
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+CHUNK = b"<p>" + b"x" * (64 * 1024 - 8) + b"</p>\n"
+
+SAMPLE_TEXT = "It’s “quoted” – Zephyr’s API • Größe"
+# Pfad -> (Content-Type, Body, erwarteter Text bzw. None)
+TEXT_PAGES = {
+    "/utf8-meta.html": ("text/html", f'<html><head><meta charset="utf-8"></head><body>{SAMPLE_TEXT}</body></html>'.encode('utf-8')),
+    "/utf8-plain.html": ("text/html", f'<html><body>{SAMPLE_TEXT}</body></html>'.encode('utf-8')),
+    "/latin1-meta.html": ("text/html", f'<html><head><meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1"></head><body>{SAMPLE_TEXT}</body></html>'.encode('cp1252')),
+    "/utf16-bom.html": ("text/html", codecs.BOM_UTF16_LE + f'<html><body>{SAMPLE_TEXT}</body></html>'.encode('utf-16-le')),
+    "/header-charset.html": ("text/html; charset=windows-1252", f'<html><body>{SAMPLE_TEXT}</body></html>'.encode('cp1252')),
+}
+BINARY_PAGES = {
+    "/logo.png": ("image/png", b'\x89PNG\r\n\x1a\n' + bytes(4096)),
+    "/download": ("application/octet-stream", b'%PDF-1.7\n' + bytes(4096)),
+    "/archive": ("", b'PK\x03\x04' + bytes(4096)),
+}
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # Linux: KiB
+
+
+def make_handler(huge_bytes):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path.startswith("/huge"):
+                self.send_huge(declare_length=self.path == "/huge-declared.html")
+                return
+            content_type, body = (TEXT_PAGES.get(self.path) or BINARY_PAGES[self.path])
+            self.send_response(200)
+            if content_type:
+                self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_huge(self, declare_length):
+            chunks = huge_bytes // len(CHUNK)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            if declare_length:
+                self.send_header('Content-Length', str(chunks * len(CHUNK)))
+                self.send_header('Connection', 'close')
+            else:
+                self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for _ in range(chunks):
+                    if declare_length:
+                        self.wfile.write(CHUNK)
+                    else:
+                        self.wfile.write(f"{len(CHUNK):x}\r\n".encode('ascii') + CHUNK + b"\r\n")
+                if not declare_length:
+                    self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass # Client hat den Download abgebrochen
+            self.close_connection = True
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+async def fetch_all(engine, urls):
+    """Lädt alle URLs; gibt URL -> Response bzw. ResponseRejected zurück."""
+    async def fetch_one(url):
+        try:
+            return await engine.fetch(url)
+        except ResponseRejected as e:
+            return e
+    return dict(zip(urls, await asyncio.gather(*(fetch_one(url) for url in urls))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--huge-mb', type=int, default=200, help="Größe der riesigen Seite in MB")
+    parser.add_argument('--max-mb', type=int, default=20, help="Obergrenze für den Body (MAX_PAGE_BYTES) in MB")
+    parser.add_argument('--skip-baseline', action='store_true', help="bisheriges Vorgehen (vollständiger Download) nicht messen")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.huge_mb * 1024 * 1024))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    errors = []
+
+    engine = FetchEngine(HEADERS, HTTP_TIMEOUT, max_body_bytes=args.max_mb * 1024 * 1024,
+                         allowed_content_types=ALLOWED_CONTENT_TYPES)
+    try:
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        huge = asyncio.run(fetch_all(engine, [f"{base}/huge-chunked.html", f"{base}/huge-declared.html"]))
+        huge_elapsed = time.perf_counter() - started
+        engine_rss = peak_rss_mb() - rss_before
+        results = asyncio.run(fetch_all(engine, [base + path for path in (*TEXT_PAGES, *BINARY_PAGES)]))
+    finally:
+        engine.close()
+
+    for url, result in huge.items():
+        if not (isinstance(result, ResponseRejected) and result.reason == "too_large"):
+            errors.append(f"{url} wurde nicht wegen der Größe abgelehnt: {result!r}")
+    if engine_rss > args.max_mb * 2 + 16:
+        errors.append(f"Peak RSS stieg um {engine_rss:.0f} MB, erwartet höchstens etwa {args.max_mb} MB")
+    for path in BINARY_PAGES:
+        result = results[base + path]
+        if not (isinstance(result, ResponseRejected) and result.reason == "content_type"):
+            errors.append(f"{path} wurde nicht als Binärdatei abgelehnt: {result!r}")
+
+    print(f"{'Seite':<22} {'bisher (response.text)':<24} {'decode_body()':<24}")
+    for path in TEXT_PAGES:
+        response = results[base + path]
+        if isinstance(response, ResponseRejected):
+            errors.append(f"{path} wurde abgelehnt: {response}")
+            continue
+        text = decode_body(response.content, header_charset(response.headers.get('Content-Type')))
+        legacy_ok = SAMPLE_TEXT in response.text
+        ok = SAMPLE_TEXT in text
+        print(f"{path:<22} {'korrekt' if legacy_ok else 'Zeichensalat':<24} {'korrekt' if ok else 'FALSCH':<24}")
+        if not ok:
+            errors.append(f"{path} wurde falsch dekodiert")
+
+    print(f"\nRiesige Seite: {args.huge_mb} MB | Obergrenze: {args.max_mb} MB")
+    print(f"FetchEngine (gestreamt): abgelehnt nach {huge_elapsed:.2f} s, Peak RSS +{engine_rss:.0f} MB")
+    if not args.skip_baseline:
+        # Zuletzt messen: ru_maxrss sinkt nicht wieder
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        text = requests.get(f"{base}/huge-chunked.html", headers=HEADERS, timeout=HTTP_TIMEOUT).text
+        print(f"bisher (session.get + response.text): {len(text) / 1024 / 1024:.0f} MB geladen in "
+              f"{time.perf_counter() - started:.2f} s, Peak RSS +{peak_rss_mb() - rss_before:.0f} MB")
+        del text
+    server.shutdown()
+
+    for error in errors:
+        print(f"FEHLER: {error}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
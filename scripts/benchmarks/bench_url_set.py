@@ -0,0 +1,139 @@
+"""
+Benchmark: Speicherbedarf und Startzeit der besuchten URLs bei sehr großen Crawls.
+
+Legt einen Checkpoint mit N besuchten URLs an (wie ihn der Crawler schreibt) und misst
+jeweils in einem eigenen Prozess, wie lange das Laden der besuchten URLs dauert, wie stark
+der Speicher (Peak RSS) dabei wächst und wie schnell danach eine Prüfung "schon besucht?"
+ist:
+
+* set:            Python-set der URL-Strings aus dem Checkpoint (bisheriges Vorgehen)
+* compact:        CompactUrlSet, aufgebaut aus dem Checkpoint (erster Start, kein Sidecar-Index)
+* compact+index:  CompactUrlSet aus dem Sidecar-Index (jeder weitere Start)
+
+Zum Schluss wird geprüft, dass alle drei Varianten dieselben Antworten liefern. Bei einem
+Fehler endet das Skript mit Exit-Code 1. Für 10 Mio. URLs werden etwa 1,5 GB Plattenplatz
+im temporären Verzeichnis und einige Minuten benötigt.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python scripts/benchmarks/bench_url_set.py --sizes 1000000,10000000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crawler"))
+from checkpoint import CrawlCheckpoint
+from url_set import CompactUrlSet, load_url_index, save_url_index
+
+BASE_URL = "https://docs.zephyrproject.org/latest/"
+LOOKUPS = 200000
+INSERT_BATCH = 100000
+
+
+def page_url(index):
+    # Ähnlich lang wie echte Doku-URLs (Doxygen-Gruppen, API-Seiten)
+    return f"{BASE_URL}doxygen/html/group__subsys__section{index // 1000}__page{index}.html"
+
+
+def build_checkpoint(path, count):
+    checkpoint = CrawlCheckpoint(path)
+    for start in range(0, count, INSERT_BATCH):
+        checkpoint.conn.executemany(
+            "INSERT INTO visited (url, unreachable) VALUES (?, ?)",
+            ((page_url(i), int(i % 1000 == 0)) for i in range(start, min(count, start + INSERT_BATCH))),
+        )
+        checkpoint.commit()
+    checkpoint.close()
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # Linux: KiB
+
+
+def load_visited(variant, checkpoint_path, index_path):
+    """Lädt die besuchten URLs wie der Crawler; gibt die Menge zurück."""
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    try:
+        if variant == "set":
+            visited = set()
+            for url, _ in checkpoint.iter_visited():
+                visited.add(url)
+            return visited
+        if variant == "compact+index":
+            watermark, url_sets = load_url_index(index_path)
+            if not checkpoint.matches_url_index(watermark):
+                raise RuntimeError("Sidecar-Index passt nicht zum Checkpoint")
+            return url_sets["visited"]
+        visited = CompactUrlSet()
+        visited.update(url for url, _ in checkpoint.iter_visited())
+        return visited
+    finally:
+        checkpoint.close()
+
+
+def measure(variant, checkpoint_path, index_path, count, results):
+    baseline = rss_mb()
+    started = time.perf_counter()
+    visited = load_visited(variant, checkpoint_path, index_path)
+    load_seconds = time.perf_counter() - started
+    memory = rss_mb() - baseline
+
+    if variant == "compact":
+        # Der erste Start mit kompakten Mengen schreibt den Sidecar-Index für die folgenden
+        checkpoint = CrawlCheckpoint(checkpoint_path)
+        save_url_index(index_path, {"visited": visited}, checkpoint.url_index_watermark())
+        checkpoint.close()
+
+    step = max(1, count // LOOKUPS)
+    hits = [page_url(i) for i in range(0, count, step)]
+    misses = [page_url(count + i) for i in range(len(hits))]
+    started = time.perf_counter()
+    found = sum(url in visited for url in hits) + sum(url in visited for url in misses)
+    lookup_us = (time.perf_counter() - started) / (len(hits) + len(misses)) * 1e6
+    results[variant] = (load_seconds, memory, lookup_us, len(visited), found == len(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default="1000000,10000000", help="kommagetrennte Anzahl besuchter URLs")
+    parser.add_argument('--skip-set', action='store_true', help="Variante set auslassen (braucht bei 10 Mio. URLs mehrere GB)")
+    args = parser.parse_args()
+
+    variants = ["compact", "compact+index"] if args.skip_set else ["set", "compact", "compact+index"]
+    errors = []
+    print(f"{'URLs':>11} {'Variante':<14} {'Laden s':>9} {'Peak RSS MB':>12} {'Prüfung µs':>11}")
+    for count in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint_path = os.path.join(tmp, "bench_crawl_checkpoint.sqlite")
+            index_path = os.path.join(tmp, "bench_crawl_url_index.bin")
+            started = time.perf_counter()
+            build_checkpoint(checkpoint_path, count)
+            print(f"{count:>11} (Checkpoint angelegt in {time.perf_counter() - started:.1f} s, "
+                  f"{os.path.getsize(checkpoint_path) / 1024 / 1024:.0f} MB)")
+            with multiprocessing.Manager() as manager:
+                results = manager.dict()
+                for variant in variants:
+                    # Eigener Prozess je Variante, damit Peak RSS nicht von der vorherigen abhängt
+                    process = multiprocessing.Process(target=measure, args=(variant, checkpoint_path, index_path, count, results))
+                    process.start()
+                    process.join()
+                    if variant not in results:
+                        errors.append(f"{count} URLs, {variant}: Prozess mit Exit-Code {process.exitcode} beendet")
+                        continue
+                    load_seconds, memory, lookup_us, size, correct = results[variant]
+                    print(f"{'':>11} {variant:<14} {load_seconds:9.2f} {memory:12.0f} {lookup_us:11.2f}")
+                    if size != count or not correct:
+                        errors.append(f"{count} URLs, {variant}: {size} URLs geladen, Prüfungen {'korrekt' if correct else 'falsch'}")
+
+    for error in errors:
+        print(f"FEHLER: {error}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
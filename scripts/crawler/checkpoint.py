@@ -0,0 +1,276 @@
+"""
+Checkpoint-Speicher für den Web-Crawler (SQLite).
+
+Hält den kompletten Crawl-Zustand fest: die Frontier (eingereihte, noch nicht fertige
+URLs), die besuchten und unerreichbaren URLs, die Fehlversuche, die gesammelten
+GitHub-Links und die ausgehenden Links jeder Seite. Änderungen werden fortlaufend
+geschrieben und gebündelt committet, sodass ein Neustart genau dort weitermacht, wo der
+letzte Lauf aufgehört hat, ohne fertige Seiten erneut zu laden.
+
+Für den inkrementellen Recrawl werden außerdem pro URL die HTTP-Validatoren
+(ETag/Last-Modified) sowie Hashes von Body und extrahiertem Inhalt gespeichert, für die
+Deduplizierung der normalisierte Inhalts-Hash jedes geschriebenen Segments.
+
+Für den kompakten URL-Index (url_set.py) liefert der Checkpoint einen Wasserstand
+(`url_index_watermark()`): Generation und höchste rowid der Tabellen visited und
+github_links. Ein Sidecar-Index mit passendem Wasserstand muss nur um die neueren Zeilen
+ergänzt werden; `reset()` und `reset_visited()` erhöhen die Generation und machen ältere
+Indizes ungültig.
+"""
+import json
+import sqlite3
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS visited (
+    url TEXT PRIMARY KEY,
+    unreachable INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS failed_attempts (
+    url TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outlinks (
+    url TEXT PRIMARY KEY,
+    links TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS github_links (
+    url TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS content_index (
+    digest TEXT PRIMARY KEY,
+    url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS content_index_url ON content_index (url);
+CREATE TABLE IF NOT EXISTS page_state (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body_hash TEXT,
+    body_size INTEGER,
+    content_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class CrawlCheckpoint:
+    """Inkrementell geschriebener Crawl-Zustand in einer SQLite-Datei.
+
+    Alle Schreibzugriffe landen in einer offenen Transaktion, die von `maybe_commit()`
+    nach `commit_every` Änderungen oder `commit_interval` Sekunden abgeschlossen wird.
+    Der Crawler ruft `maybe_commit()` nur zwischen zwei vollständig verarbeiteten
+    Ereignissen auf, dadurch ist jeder Commit in sich konsistent.
+    """
+
+    def __init__(self, path, commit_interval=5.0, commit_every=500):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.commit_every = commit_every
+        self._pending_changes = 0
+        self._last_commit = time.monotonic()
+        self._before_commit = []
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def add_commit_hook(self, callback):
+        """Registriert eine Funktion, die vor jedem Commit aufgerufen wird (z.B. fsync der Ausgabedateien)."""
+        self._before_commit.append(callback)
+
+    def has_state(self):
+        row = self.conn.execute(
+            "SELECT EXISTS(SELECT 1 FROM frontier) OR EXISTS(SELECT 1 FROM visited)"
+        ).fetchone()
+        return bool(row[0])
+
+    # --- Schreiben ---
+    def _changed(self):
+        self._pending_changes += 1
+
+    def record_enqueued(self, url, priority):
+        self.conn.execute("INSERT OR IGNORE INTO frontier (url, priority) VALUES (?, ?)", (url, priority))
+        self._changed()
+
+    def record_visited(self, url, unreachable=False):
+        self.conn.execute("DELETE FROM frontier WHERE url = ?", (url,))
+        self.conn.execute(
+            "INSERT INTO visited (url, unreachable) VALUES (?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET unreachable = excluded.unreachable",
+            (url, int(unreachable)),
+        )
+        self._changed()
+
+    def record_failure(self, url, attempts):
+        self.conn.execute(
+            "INSERT INTO failed_attempts (url, attempts) VALUES (?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET attempts = excluded.attempts",
+            (url, attempts),
+        )
+        self._changed()
+
+    def record_outlinks(self, url, doc_links, github_links):
+        links = json.dumps({"doc": doc_links, "github": github_links}, ensure_ascii=False)
+        self.conn.execute("INSERT OR REPLACE INTO outlinks (url, links) VALUES (?, ?)", (url, links))
+        self._changed()
+
+    def record_github_link(self, url):
+        self.conn.execute("INSERT OR IGNORE INTO github_links (url) VALUES (?)", (url,))
+        self._changed()
+
+    def record_page_state(self, url, etag, last_modified, body_hash, body_size, content_hash=None):
+        """Speichert Validatoren und Hashes einer geladenen Seite.
+
+        Ist content_hash None (Seite ohne verwertbaren Inhalt), bleibt ein früher
+        gespeicherter Inhalts-Hash erhalten.
+        """
+        self.conn.execute(
+            "INSERT INTO page_state (url, etag, last_modified, body_hash, body_size, content_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+            "body_hash = excluded.body_hash, body_size = excluded.body_size, "
+            "content_hash = COALESCE(excluded.content_hash, page_state.content_hash)",
+            (url, etag, last_modified, body_hash, body_size, content_hash),
+        )
+        self._changed()
+
+    def clear_content_hash(self, url):
+        """Vergisst den Inhalts-Hash einer URL (ihr Segment wird entfernt)."""
+        self.conn.execute("UPDATE page_state SET content_hash = NULL WHERE url = ?", (url,))
+        self._changed()
+
+    def record_content_digest(self, digest, url):
+        """Merkt sich, dass der Inhalt mit diesem Hash als Segment von `url` geschrieben wurde."""
+        self.conn.execute("INSERT OR REPLACE INTO content_index (digest, url) VALUES (?, ?)", (digest, url))
+        self._changed()
+
+    def pop_content_digests(self, url):
+        """Entfernt und liefert die Inhalts-Hashes einer URL (ihr Inhalt wird gerade ersetzt)."""
+        digests = [row[0] for row in self.conn.execute("SELECT digest FROM content_index WHERE url = ?", (url,))]
+        if digests:
+            self.conn.execute("DELETE FROM content_index WHERE url = ?", (url,))
+            self._changed()
+        return digests
+
+    def reset_visited(self):
+        """Vergisst besuchte URLs und Fehlversuche, behält aber Validatoren und Outlinks.
+
+        Grundlage für einen inkrementellen Recrawl: alle Seiten werden erneut geprüft.
+        """
+        self.conn.execute("DELETE FROM visited")
+        self.conn.execute("DELETE FROM failed_attempts")
+        self._next_generation()
+        self._changed()
+
+    def _next_generation(self):
+        self.conn.execute(
+            "INSERT INTO meta (name, value) VALUES ('generation', 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1"
+        )
+
+    def maybe_commit(self):
+        if self._pending_changes >= self.commit_every or \
+           (self._pending_changes and time.monotonic() - self._last_commit >= self.commit_interval):
+            self.commit()
+
+    def commit(self):
+        for callback in self._before_commit:
+            callback()
+        self.conn.commit()
+        self._pending_changes = 0
+        self._last_commit = time.monotonic()
+
+    def reset(self):
+        """Verwirft den gesamten gespeicherten Zustand (kompletter Neustart)."""
+        for table in ("frontier", "visited", "failed_attempts", "outlinks", "github_links", "page_state", "content_index"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self._next_generation()
+        self.commit()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    # --- Lesen ---
+    def load_frontier(self):
+        """Liefert (url, priority) aller offenen URLs in Einfüge-Reihenfolge."""
+        return self.conn.execute("SELECT url, priority FROM frontier ORDER BY rowid").fetchall()
+
+    def load_visited(self):
+        """Liefert (url, unreachable) aller besuchten URLs."""
+        return list(self.iter_visited())
+
+    def iter_visited(self, after_rowid=0):
+        """Liefert (url, unreachable) der besuchten URLs nach `after_rowid`, ohne sie alle im Speicher zu halten."""
+        for url, unreachable in self.conn.execute("SELECT url, unreachable FROM visited WHERE rowid > ?", (after_rowid,)):
+            yield url, bool(unreachable)
+
+    def load_failed_attempts(self):
+        return dict(self.conn.execute("SELECT url, attempts FROM failed_attempts"))
+
+    def load_github_links(self, after_rowid=0):
+        return [row[0] for row in self.conn.execute("SELECT url FROM github_links WHERE rowid > ?", (after_rowid,))]
+
+    def _generation(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def url_index_watermark(self):
+        """Stand von visited und github_links, gegen den ein Sidecar-Index geprüft wird (siehe url_set.py)."""
+        visited_rowid, visited, unreachable = self.conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0), COUNT(*), COALESCE(SUM(unreachable), 0) FROM visited"
+        ).fetchone()
+        github_rowid, github_links = self.conn.execute("SELECT COALESCE(MAX(rowid), 0), COUNT(*) FROM github_links").fetchone()
+        return {
+            "generation": self._generation(),
+            "visited_rowid": visited_rowid, "visited": visited, "unreachable": unreachable,
+            "github_rowid": github_rowid, "github_links": github_links,
+        }
+
+    def matches_url_index(self, watermark):
+        """True, wenn die Zeilen bis zum Wasserstand eines Sidecar-Index unverändert sind."""
+        if self._generation() != watermark["generation"]:
+            return False
+        visited, unreachable = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(unreachable), 0) FROM visited WHERE rowid <= ?", (watermark["visited_rowid"],)
+        ).fetchone()
+        github_links = self.conn.execute(
+            "SELECT COUNT(*) FROM github_links WHERE rowid <= ?", (watermark["github_rowid"],)
+        ).fetchone()[0]
+        return (visited, unreachable, github_links) == (watermark["visited"], watermark["unreachable"], watermark["github_links"])
+
+    def load_content_index(self):
+        """Liefert {Inhalts-Hash: URL} aller geschriebenen Segmente."""
+        return dict(self.conn.execute("SELECT digest, url FROM content_index"))
+
+    def get_page_state(self, url):
+        """Liefert die gespeicherten Validatoren und Hashes einer URL als Dict oder None."""
+        row = self.conn.execute(
+            "SELECT etag, last_modified, body_hash, body_size, content_hash FROM page_state WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("etag", "last_modified", "body_hash", "body_size", "content_hash"), row))
+
+    def get_outlinks(self, url):
+        """Liefert (doc_links, github_links) einer früher verarbeiteten Seite oder None."""
+        row = self.conn.execute("SELECT links FROM outlinks WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        links = json.loads(row[0])
+        return links["doc"], [tuple(link) for link in links["github"]]
+
+    def iter_linked_urls(self):
+        """Liefert alle Doku-Links, die auf den bisher verarbeiteten Seiten gefunden wurden."""
+        for (links,) in self.conn.execute("SELECT links FROM outlinks"):
+            yield from json.loads(links)["doc"]
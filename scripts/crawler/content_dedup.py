@@ -0,0 +1,162 @@
+"""
+Deduplizierung der Doku-Segmente vor dem Schreiben.
+
+Derselbe Inhalt erscheint oft unter mehreren URLs (versionierte Pfade, Doxygen-Gruppen-
+und Dateiseiten, Weiterleitungsseiten). Der ContentDeduplicator prüft jeden Inhalt, bevor
+der Crawler ihn schreibt:
+
+1. Exakt: Hash über den normalisierten Inhalt (Kleinschreibung, Leerraum zusammengefasst).
+   Der Index (Hash -> erste URL) liegt im Checkpoint und gilt auch nach einem Neustart.
+2. Optional ähnlich (Near-Duplicates): MinHash-Signatur über Wort-Shingles mit
+   Locality-Sensitive Hashing (LSH). Kandidaten aus den LSH-Buckets werden über die
+   geschätzte Jaccard-Ähnlichkeit der Signaturen bestätigt. Der Index hält höchstens
+   `max_entries` Seiten (die ältesten fallen heraus) und gilt nur für den laufenden Prozess.
+
+Die Signatur nutzt One-Permutation-Hashing: jedes Shingle wird nur einmal gehasht und
+einem von `num_bins` Fächern zugeordnet, statt `num_bins` Hashfunktionen zu berechnen.
+Leere Fächer (sehr kurze Seiten) werden aus dem nächsten belegten Fach aufgefüllt.
+"""
+import hashlib
+from array import array
+from collections import OrderedDict
+
+_HASH_MASK = (1 << 64) - 1
+_EMPTY_BIN = _HASH_MASK # Platzhalter für ein Fach ohne Shingle
+
+
+def normalize_content(text):
+    """Normalisiert einen Inhalt für den Vergleich: Kleinschreibung, Leerraum zusammengefasst."""
+    return ' '.join(text.casefold().split())
+
+
+def _digest(normalized_text):
+    return hashlib.blake2b(normalized_text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH-Index mit fester Obergrenze für die Anzahl gespeicherter Seiten.
+
+    Die Shingle-Hashes verwenden Pythons hash(), sind also nur innerhalb eines Prozesses
+    vergleichbar; der Index wird deshalb nicht gespeichert.
+    """
+
+    def __init__(self, threshold=0.9, num_bins=64, bands=16, shingle_size=5, max_entries=50000):
+        if num_bins % bands:
+            raise ValueError("num_bins muss ein Vielfaches von bands sein.")
+        self.threshold = threshold
+        self.num_bins = num_bins
+        self.bands = bands
+        self.rows = num_bins // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # Eintrags-Nr. -> (url, Signatur), älteste zuerst
+        self._buckets = {} # Band-Schlüssel -> Eintrags-Nr.
+        self._next_id = 0
+
+    def signature(self, normalized_text):
+        """One-Permutation-MinHash über Wort-Shingles des (bereits normalisierten) Textes."""
+        tokens = normalized_text.split()
+        size = self.shingle_size
+        if len(tokens) <= size:
+            shingles = (tuple(tokens),)
+        else:
+            shingles = (tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+        num_bins = self.num_bins
+        bins = [_EMPTY_BIN] * num_bins
+        for shingle in shingles:
+            value = hash(shingle) & _HASH_MASK
+            index = value % num_bins
+            value //= num_bins
+            if value < bins[index]:
+                bins[index] = value
+
+        # Leere Fächer mit dem nächsten belegten Fach (zyklisch nach rechts) auffüllen
+        if _EMPTY_BIN in bins and any(value != _EMPTY_BIN for value in bins):
+            filled = list(bins)
+            for index, value in enumerate(bins):
+                distance = 1
+                while value == _EMPTY_BIN:
+                    value = bins[(index + distance) % num_bins]
+                    distance += 1
+                filled[index] = value if distance == 1 else (value + distance * 0x9E3779B97F4A7C15) & _HASH_MASK
+            bins = filled
+        return array('Q', bins)
+
+    def band_keys(self, signature):
+        """Ein Schlüssel pro LSH-Band (je `rows` Fächer der Signatur)."""
+        rows = self.rows
+        return [hash((band, *signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    @staticmethod
+    def similarity(signature_a, signature_b):
+        """Geschätzte Jaccard-Ähnlichkeit: Anteil übereinstimmender Fächer."""
+        return sum(a == b for a, b in zip(signature_a, signature_b)) / len(signature_a)
+
+    def find(self, signature, band_keys=None):
+        """Liefert (url, Ähnlichkeit) der ähnlichsten bekannten Seite über dem Schwellwert oder None."""
+        best = None
+        checked = set()
+        for key in band_keys or self.band_keys(signature):
+            entry_id = self._buckets.get(key)
+            if entry_id is None or entry_id in checked:
+                continue
+            checked.add(entry_id)
+            url, other = self._entries[entry_id]
+            score = self.similarity(signature, other)
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (url, score)
+        return best
+
+    def add(self, url, signature, band_keys=None):
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (url, signature)
+        for key in band_keys or self.band_keys(signature):
+            self._buckets[key] = entry_id
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        entry_id, (_, signature) = self._entries.popitem(last=False)
+        for key in self.band_keys(signature):
+            if self._buckets.get(key) == entry_id:
+                del self._buckets[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ContentDeduplicator:
+    """Erkennt exakte und (optional) ähnliche Duplikate, bevor ein Segment geschrieben wird."""
+
+    def __init__(self, exact_index=None, near_index=None):
+        self.exact_index = exact_index if exact_index is not None else {} # Inhalts-Hash -> erste URL
+        self.near_index = near_index # NearDuplicateIndex oder None
+
+    def check(self, url, text):
+        """Prüft einen Inhalt und nimmt ihn in die Indizes auf, wenn er neu ist.
+
+        Gibt (kind, original_url, digest) zurück: kind ist None (neu), "exact" oder "near".
+        """
+        normalized = normalize_content(text)
+        digest = _digest(normalized)
+        original_url = self.exact_index.get(digest)
+        if original_url is not None and original_url != url:
+            return "exact", original_url, digest
+
+        if self.near_index is not None:
+            signature = self.near_index.signature(normalized)
+            band_keys = self.near_index.band_keys(signature)
+            match = self.near_index.find(signature, band_keys)
+            if match is not None and match[0] != url:
+                return "near", match[0], digest
+            self.near_index.add(url, signature, band_keys)
+
+        self.exact_index[digest] = url
+        return None, None, digest
+
+    def release(self, digests):
+        """Vergisst Inhalts-Hashes (z.B. den alten Inhalt einer Seite, die sich geändert hat)."""
+        for digest in digests:
+            self.exact_index.pop(digest, None)
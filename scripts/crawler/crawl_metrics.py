@@ -0,0 +1,253 @@
+"""
+Metriken für den Web-Crawler: Zeit pro Verarbeitungsschritt, Zähler und Füllstände.
+
+Jede Seite durchläuft mehrere Schritte (siehe STAGES): Warten auf einen freien Slot,
+Verbindungsaufbau, Warten auf die Antwort, Download, Warten in der Parse-Queue, Parsen im
+Worker-Prozess, Bereinigung, Link-Discovery und das Übernehmen/Schreiben im Hauptprozess.
+CrawlMetrics sammelt pro Schritt Anzahl, Summe, Maximum und ein Histogramm der Dauer,
+dazu Zähler (Bytes, Statuscodes, Wiederholungen, übersprungene Seiten) und Füllstände
+(Frontier, Parse-Queue, laufende Anfragen), die der Event-Loop regelmäßig ausliest
+(refresh_gauges()); Momentaufnahme und HTTP-Endpunkt liefern den zuletzt gelesenen Stand.
+
+Ausgegeben wird als JSON-Momentaufnahme (eine Zeile pro Intervall) und optional über einen
+lokalen HTTP-Endpunkt im Prometheus-Textformat. Zusätzlich kann jede N-te Seite beim Parsen
+mit cProfile oder pyinstrument profiliert werden (run_profiled()).
+
+Ob ein langsamer Lauf am Netz oder am Parsen hängt, zeigt vor allem die Parse-Queue:
+ist sie dauerhaft voll und `parse_queue` lang, fehlen Worker; ist sie leer und `ttfb`
+bzw. `download` dominieren, wartet der Crawler auf den Server.
+"""
+import bisect
+import cProfile
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import pyinstrument
+except ImportError: # optionale Abhängigkeit, nur für PROFILER = "pyinstrument" nötig
+    pyinstrument = None
+
+# Verarbeitungsschritte in Pipeline-Reihenfolge (Name -> Beschreibung)
+STAGES = {
+    "slot_wait": "Warten auf einen freien Slot (Parallelität, Mindestabstand pro Host)",
+    "connect": "Verbindungsaufbau inkl. DNS und TLS (nur neue Verbindungen)",
+    "ttfb": "Anfrage gesendet bis Antwort-Header empfangen",
+    "download": "Body der Antwort lesen",
+    "parse_queue": "Geladene Seite wartet auf einen Parse-Worker (inkl. Backpressure)",
+    "worker": "Aufruf im Prozess-Pool insgesamt (inkl. Übertragung zwischen den Prozessen)",
+    "decode": "Bytes in Text dekodieren",
+    "parse": "HTML-Baum bauen und Hauptinhalt suchen (Extraktions-Engine)",
+    "cleanup": "Text bereinigen",
+    "links": "Links klassifizieren",
+    "dedup": "Duplikatprüfung",
+    "write": "Ergebnis übernehmen: Checkpoint, Segment schreiben, Links einreihen",
+}
+
+# Name des Labels im Prometheus-Format für aufgeschlüsselte Zähler (sonst "label")
+LABEL_NAMES = {"http_status": "code", "pages_skipped": "reason", "network_errors": "error"}
+
+# Obergrenzen der Histogramm-Fächer in Sekunden (das letzte Fach ist +Inf)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROFILERS = ("cProfile", "pyinstrument")
+PROFILE_EXTENSIONS = {"cProfile": ".prof", "pyinstrument": ".html"}
+
+
+class CrawlMetrics:
+    """Zeiten pro Schritt, Zähler und Füllstände eines Crawl-Laufs.
+
+    Geschrieben wird nur aus dem Event-Loop; der Prometheus-Endpunkt liest aus einem
+    eigenen Thread, deshalb sind alle Zugriffe über ein Lock geschützt. Die Füllstände
+    gehören dem Event-Loop und werden nur dort gelesen (refresh_gauges()); der Endpunkt
+    sieht nur die dabei gespeicherten Werte.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stages = {} # Schritt -> [Anzahl, Summe, Maximum, Fächer]
+        self._counters = {} # Name -> Wert oder {Label -> Wert}
+        self._gauges = {} # Name -> Funktion ohne Argumente (nur im Event-Loop aufrufen)
+        self._gauge_values = {} # Name -> Wert beim letzten refresh_gauges()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [0, 0.0, 0.0, [0] * (len(BUCKETS) + 1)]
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+            entry[3][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def observe_all(self, timings):
+        """Übernimmt mehrere Zeiten auf einmal, z.B. die eines Parse-Workers."""
+        for stage, seconds in timings.items():
+            self.observe(stage, seconds)
+
+    def count(self, name, value=1, label=None):
+        """Erhöht einen Zähler; mit `label` (z.B. Statuscode) wird nach Label aufgeschlüsselt."""
+        with self._lock:
+            if label is None:
+                self._counters[name] = self._counters.get(name, 0) + value
+            else:
+                values = self._counters.setdefault(name, {})
+                values[label] = values.get(label, 0) + value
+
+    def register_gauge(self, name, read):
+        """Füllstand, der bei jedem refresh_gauges() gelesen wird (z.B. `parse_queue.qsize`)."""
+        self._gauges[name] = read
+
+    def refresh_gauges(self):
+        """Liest alle Füllstände neu; nur aus dem Thread aufrufen, dem die gelesenen Objekte gehören."""
+        values = {name: read() for name, read in self._gauges.items()}
+        with self._lock:
+            self._gauge_values = values
+
+    def snapshot(self):
+        """Momentaufnahme als Dict (JSON-serialisierbar)."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": count,
+                    "total_s": round(total, 3),
+                    "avg_ms": round(total / count * 1000, 2),
+                    "max_ms": round(maximum * 1000, 2),
+                }
+                for stage, (count, total, maximum, _) in self._stages.items()
+            }
+            counters = {
+                name: dict(value) if isinstance(value, dict) else value
+                for name, value in self._counters.items()
+            }
+            gauges = dict(self._gauge_values)
+        return {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "stages": stages,
+            "counters": counters,
+            "gauges": gauges,
+        }
+
+    def write_snapshot(self, path):
+        """Hängt eine Momentaufnahme als JSON-Zeile an die Datei an."""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.snapshot(), ensure_ascii=False) + '\n')
+
+    def prometheus_text(self, prefix="crawler"):
+        """Alle Metriken im Prometheus-Textformat (Version 0.0.4)."""
+        with self._lock:
+            stages = [(stage, count, total, list(buckets)) for stage, (count, total, _, buckets) in self._stages.items()]
+            counters = [(name, dict(value) if isinstance(value, dict) else value) for name, value in self._counters.items()]
+            gauges = list(self._gauge_values.items())
+
+        lines = [
+            f"# HELP {prefix}_stage_seconds Dauer der Verarbeitungsschritte pro Seite.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for stage, count, total, buckets in stages:
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + ("+Inf",), buckets):
+                cumulative += bucket_count
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        for name, value in counters:
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            if isinstance(value, dict):
+                label_name = LABEL_NAMES.get(name, "label")
+                lines.extend(f'{prefix}_{name}_total{{{label_name}="{_escape_label(label)}"}} {count}' for label, count in value.items())
+            else:
+                lines.append(f"{prefix}_{name}_total {value}")
+
+        for name, value in gauges:
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {time.monotonic() - self.started:.1f}")
+        return '\n'.join(lines) + '\n'
+
+    def summary_lines(self):
+        """Tabelle der Schritte für das Log am Ende des Laufs."""
+        snapshot = self.snapshot()
+        lines = [f"{'Schritt':<12} {'Anzahl':>8} {'Summe s':>10} {'Mittel ms':>10} {'Max ms':>10}"]
+        for stage in [*STAGES, *(stage for stage in snapshot["stages"] if stage not in STAGES)]:
+            values = snapshot["stages"].get(stage)
+            if values:
+                lines.append(f"{stage:<12} {values['count']:>8} {values['total_s']:>10.2f} {values['avg_ms']:>10.2f} {values['max_ms']:>10.2f}")
+        for name, value in snapshot["counters"].items():
+            if isinstance(value, dict):
+                value = ", ".join(f"{label}: {count}" for label, count in sorted(value.items(), key=lambda item: str(item[0])))
+            lines.append(f"{name}: {value}")
+        return lines
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsServer:
+    """Lokaler HTTP-Endpunkt, der unter /metrics die Prometheus-Textausgabe liefert."""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Abfragen nicht auf stderr ausgeben
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def resolve_profiler(name):
+    """Prüft den Profiler-Namen und ob pyinstrument installiert ist."""
+    if name not in PROFILERS:
+        raise ValueError(f"Unbekannter Profiler '{name}' (erlaubt: {', '.join(PROFILERS)}).")
+    if name == "pyinstrument" and pyinstrument is None:
+        raise ImportError("Für PROFILER = 'pyinstrument' wird das Paket 'pyinstrument' benötigt (pip install pyinstrument).")
+    return name
+
+
+def run_profiled(profiler, output_path, func, *args):
+    """Führt func(*args) unter dem Profiler aus und schreibt das Profil nach `output_path`.
+
+    Läuft auch in den Worker-Prozessen des Parse-Pools. cProfile schreibt eine pstats-Datei
+    (`python -m pstats`, snakeviz), pyinstrument eine HTML-Ansicht.
+    """
+    if profiler == "pyinstrument":
+        session = pyinstrument.Profiler()
+        session.start()
+        try:
+            return func(*args)
+        finally:
+            session.stop()
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(session.output_html())
+
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func, *args)
+    finally:
+        profile.dump_stats(output_path)
@@ -0,0 +1,110 @@
+"""
+Bereinigung von Doxygen-Quelltextseiten (`..._source.html`) für den Web-Crawler.
+
+Ersetzt die frühere Bereinigung in page_extractor.py, die für jede Zeile mehrere
+Inline-Regexe auswertete und den Text danach für `#endif`-Suche, Footer-Suche und das
+Entfernen leerer Zeilen drei- bis viermal neu zerlegte und zusammensetzte. Das Ergebnis ist
+Zeichen für Zeichen dasselbe (geprüft in tests/test_doxygen_cleaner.py):
+
+1. Kopfbereich: Copyright-Kommentar, "Go to the documentation of this file." und alles
+   bis zur ersten Zeile mit `#ifndef`, `#define` oder zwei Wörtern wird übersprungen.
+2. Rumpf: führende Zeilennummern werden entfernt. Ab der ersten Footer-Zeile (nur ein
+   Bezeichner oder `datei.h:123`) wird der Rest verworfen.
+3. Abschluss: nach dem letzten `#endif` wird abgeschnitten; gibt es keins, werden
+   bekannte Doxygen-Tooltip-Zeilen am Ende entfernt. Leere Zeilen fallen weg.
+
+Alles passiert in einem Durchlauf über die Zeilen; der Text wird dabei nicht kopiert.
+"""
+import re
+
+# Kopfbereich
+_COPYRIGHT_RE = re.compile(r'\d*\s*/\*.*Copyright \(c\)')
+_HEADER_END_RE = re.compile(r'\d*\s*(?:#ifndef|#define|\w+\s+\w)')
+_DOCUMENTATION_LINK = "Go to the documentation of this file."
+
+# Beginn des Doxygen-Footers (Tooltips): nur ein Bezeichner oder eine Fundstelle wie "kernel.h:123"
+_FOOTER_START_RE = re.compile(r'(?:[a-zA-Z_]+\s*|.*\.h:\d+)$')
+
+# Tooltip-Texte, die ohne `#endif` am Ende der Seite stehen bleiben können
+_TRAILING_FOOTER_RE = re.compile(
+    r'(?:Macro utilities|BSD Sockets compatible API definitions|Generic sockaddr struct|Message struct)\.?$'
+)
+
+# Zeilenumbrüche außer \n, an denen str.splitlines() ebenfalls trennt
+_OTHER_LINE_BREAKS_RE = re.compile('[\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+_HEADER, _BODY = 0, 1
+
+
+def is_doxygen_source_page(url):
+    return "doxygen/html/" in url and "_source.html" in url
+
+
+def _iter_lines(text):
+    """Wie text.splitlines(), aber als Generator ohne Kopie des ganzen Textes."""
+    if _OTHER_LINE_BREAKS_RE.search(text):
+        yield from text.splitlines()
+        return
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            if start < len(text):
+                yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def _strip_line_number(line, stripped_line):
+    """Entfernt eine führende Zeilennummer ("123 code" -> "code")."""
+    if stripped_line and stripped_line[0].isdigit() and (' ' in stripped_line or '\t' in stripped_line):
+        number, separator, rest = stripped_line.partition(' ')
+        if separator and number.isdigit():
+            return rest
+    return line
+
+
+def clean_doxygen_source(text_content):
+    """Bereinigt den extrahierten Text einer Doxygen-Quelltextseite in einem Durchlauf."""
+    kept_lines = []
+    last_endif = None # (Index in kept_lines, Position in der Zeile) des letzten '#endif'
+    state = _HEADER
+
+    for line in _iter_lines(text_content):
+        stripped_line = line.strip()
+
+        if state == _HEADER:
+            if stripped_line == _DOCUMENTATION_LINK or _COPYRIGHT_RE.match(stripped_line):
+                continue
+            if not _HEADER_END_RE.match(stripped_line):
+                continue
+            state = _BODY
+        elif _FOOTER_START_RE.match(line):
+            break # alles ab hier ist Footer
+
+        cleaned_line = _strip_line_number(line, stripped_line)
+        endif_position = cleaned_line.rfind('#endif')
+        if endif_position != -1:
+            last_endif = (len(kept_lines), endif_position)
+        kept_lines.append(cleaned_line)
+
+    if last_endif is not None:
+        index, position = last_endif
+        if index == len(kept_lines) - 1:
+            # '#endif' in der letzten Zeile: der Rest dieser Zeile entfällt
+            kept_lines[index] = kept_lines[index][:position + len('#endif')]
+        else:
+            del kept_lines[index + 1:]
+    else:
+        cut_index = len(kept_lines)
+        for index in range(len(kept_lines) - 1, -1, -1):
+            stripped_line = kept_lines[index].strip()
+            if not stripped_line:
+                continue
+            if not _TRAILING_FOOTER_RE.match(stripped_line):
+                break
+            cut_index = index
+        del kept_lines[cut_index:]
+
+    return '\n'.join(filter(None, kept_lines)).strip()
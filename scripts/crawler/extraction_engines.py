@@ -0,0 +1,438 @@
+"""
+Schnelle Parser-Backends für die Inhalts-Extraktion (lxml, selectolax).
+
+Die Referenz ist BeautifulSoup mit `html.parser` (siehe page_extractor.py). Die Backends
+hier liefern dasselbe Ergebnis, laufen aber in C-Parsern und lösen die ganze
+Selektor-Kaskade in einem einzigen Durchlauf über den Baum auf: jedes <div> wird einmal
+gegen alle Selektoren geprüft, dabei werden auch das erste <h1>, das erste <title>,
+alle `memdoc`-Divs und alle Links eingesammelt.
+
+Der Text wird mit denselben Regeln wie BeautifulSoups `get_text()` gebildet: Texte in
+<script>, <style>, <template>, <rt> und <rp> sowie Kommentare zählen nicht mit.
+
+Einige Konstrukte wandeln die Parser unterschiedlich um: CR/LF, NUL-Zeichen, CDATA,
+unbekannte oder unvollständige Entities und fehlerhaftes HTML. html.parser baut den Baum
+so, wie die Tags dastehen; lxml und lexbor reparieren ihn (ein <div> schließt ein offenes
+<p>, verirrte End-Tags fallen weg, <textarea> und <xmp> enthalten Rohtext, ...). Seiten mit
+solchen Konstrukten erkennt `needs_reference_parser()`; page_extractor.py verarbeitet sie
+dann mit BeautifulSoup. Im Zweifel meldet die Prüfung lieber eine Seite zu viel.
+"""
+import html.entities
+import re
+
+try:
+    import lxml.html
+except ImportError: # optionale Abhängigkeit, nur für engine="lxml" nötig
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError: # optionale Abhängigkeit, nur für engine="selectolax" nötig
+    LexborHTMLParser = None
+
+# Texte unterhalb dieser Tags ignoriert BeautifulSoups get_text()
+SKIPPED_TEXT_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+_REFERENCE_RE = re.compile(r'&([#A-Za-z][^;&<>"\'\s]*;?)')
+# Entities, die HTML5 (und damit html.parser in Attributen) auch ohne Semikolon auflöst
+_LEGACY_ENTITIES = tuple(name for name in html.entities.html5 if not name.endswith(';'))
+
+# --- Prüfung der Tag-Struktur ---
+# Tags, Kommentare und Deklarationen so, wie html.parser sie erkennt ("<" vor einem Buchstaben, "/", "!" oder "?")
+_MARKUP_RE = re.compile(r'<(?:(/?)([a-zA-Z][^\t\n\f />]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>|!--|!|\?|/)')
+_ATTRIBUTE_RE = re.compile(r'([^\s/>="\']+)(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s"\'>]*))?')
+_SINGLE_ATTRIBUTE_RE = re.compile(r'\s*[^\s/>="\']+\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s"\'>]*)\s*/?')
+_DOCTYPE_RE = re.compile(r'<!doctype[^<>]*>', re.IGNORECASE)
+_TAG_NAME_ENDS = ('>', ' ', '\t', '\n', '\f', '/')
+
+# Leere Elemente, die BeautifulSoup und die C-Parser gleich behandeln
+_VOID_TAGS = frozenset(('area', 'base', 'br', 'col', 'hr', 'img', 'input', 'link', 'meta'))
+# Inhalt bleibt in beiden Parsern Rohtext
+_RAW_TEXT_TAGS = frozenset(('script', 'style'))
+# Rohtext nur in lxml/lexbor, in html.parser normales HTML: unkritisch, solange kein "<" darin steht
+_RCDATA_TAGS = frozenset(('title', 'textarea', 'xmp', 'iframe', 'noembed', 'noframes', 'noscript'))
+# ... und hier lösen lxml/lexbor auch keine Entities auf
+_RCDATA_RAW_TAGS = _RCDATA_TAGS - {'title', 'textarea'}
+# Veraltete oder seltene Tags, die die Parser unterschiedlich (leer oder nicht) behandeln
+_UNSAFE_TAGS = frozenset((
+    'plaintext', 'image', 'isindex', 'nextid', 'spacer', 'command', 'menuitem', 'keygen', 'bgsound', 'basefont',
+    'frame', 'frameset', 'param', 'svg', 'math', 'select', 'option', 'optgroup', 'ruby', 'rb', 'rt', 'rp', 'rtc',
+    'template', 'embed', 'source', 'track', 'wbr', # für html.parser leer, für libxml2 nicht
+))
+# Dürfen nicht (auch nicht indirekt) in sich selbst stehen, sonst schließen lxml/lexbor das äußere Element
+_NOT_NESTED_TAGS = frozenset(('form', 'button', 'nobr'))
+# Ein verirrtes </p> oder </br> erzeugt in lxml/lexbor ein neues Element
+_STRAY_END_TAG_UNSAFE = frozenset(('p', 'br'))
+# Elemente, in denen ein <p> offen bleiben darf (alles andere schließt es in lxml/lexbor)
+_PHRASING_TAGS = frozenset((
+    'a', 'abbr', 'acronym', 'b', 'bdi', 'bdo', 'big', 'br', 'cite', 'code', 'data', 'del', 'dfn', 'em', 'font', 'i',
+    'img', 'input', 'ins', 'kbd', 'label', 'mark', 'q', 's', 'samp', 'small', 'span', 'strike', 'strong', 'sub',
+    'sup', 'time', 'tt', 'u', 'var', 'script', 'style', 'canvas', 'audio', 'video', 'picture', 'meter', 'output',
+    'progress', 'map', 'area',
+))
+_HEADINGS = frozenset(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+_TABLE_PARTS = frozenset(('thead', 'tbody', 'tfoot'))
+# Offenes Element -> Start-Tags, die es in libxml2 implizit schließen (Auszug aus dessen
+# htmlStartClose-Tabelle, soweit nicht schon durch die Regeln unten abgedeckt)
+_LIBXML2_CLOSED_BY = {
+    'a': frozenset(('fieldset', 'table')),
+    **dict.fromkeys(('address', 'dir', 'menu'), frozenset(('dl', 'form', 'ul'))),
+    **dict.fromkeys(('b', 'i', 'font'), frozenset(('center', 'p'))),
+    **dict.fromkeys(('big', 's', 'small', 'strike', 'tt', 'u'), frozenset(('p',))),
+    **dict.fromkeys(('dl', 'ol'), frozenset(('form',))),
+    **dict.fromkeys(_HEADINGS, frozenset(('fieldset', 'form', 'p', 'table'))),
+    'legend': frozenset(('fieldset',)),
+    **dict.fromkeys(('listing', 'pre'), frozenset(('dl', 'fieldset', 'form', 'table', 'ul'))),
+    'ul': frozenset(('address', 'form', 'menu', 'pre')),
+}
+# Start-Tag -> Elemente, in denen es direkt stehen muss. Anderswo schließen lxml/lexbor
+# offene Listenpunkte, Zellen usw. implizit, html.parser verschachtelt sie.
+_REQUIRED_PARENTS = {
+    'li': frozenset(('ul', 'ol', 'menu')),
+    'dt': frozenset(('dl',)),
+    'dd': frozenset(('dl',)),
+    'tr': frozenset(('table',)) | _TABLE_PARTS,
+    'td': frozenset(('tr',)),
+    'th': frozenset(('tr',)),
+    'thead': frozenset(('table',)),
+    'tbody': frozenset(('table',)),
+    'tfoot': frozenset(('table',)),
+    'caption': frozenset(('table',)),
+    'colgroup': frozenset(('table',)),
+    'col': frozenset(('table', 'colgroup')),
+}
+# In diesen Elementen verschieben lexbor (und teils lxml) anderen Inhalt vor die Tabelle
+_TABLE_CONTEXT = frozenset(('table', 'thead', 'tbody', 'tfoot', 'tr', 'colgroup'))
+# Text direkt in diesen Elementen (oder vor <html>) hängen die Parser unterschiedlich ein
+_TEXT_UNSAFE_PARENTS = _TABLE_CONTEXT | {None, 'html', 'head'}
+_TABLE_CONTENT = frozenset(('caption', 'colgroup', 'col', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th', 'script', 'style'))
+_HEAD_CONTENT = frozenset(('title', 'meta', 'link', 'style', 'script', 'base'))
+
+
+def _is_safe_reference(reference):
+    """Wird diese Zeichenreferenz von html.parser und den C-Parsern gleich aufgelöst?"""
+    if not reference.endswith(';'):
+        # z.B. "&b=2" in einer Query: bleibt überall stehen, solange kein Entity-Name davorsteht
+        return reference[0] != '#' and not reference.startswith(_LEGACY_ENTITIES)
+    name = reference[:-1]
+    if name[0] != '#':
+        return name in html.entities.name2codepoint # HTML-4-Entities kennen alle Parser
+    try:
+        codepoint = int(name[2:], 16) if name[1:2] in ('x', 'X') else int(name[1:])
+    except ValueError:
+        return False
+    # 0x80-0x9F bildet BeautifulSoup auf Windows-1252 ab, die anderen Parser nicht
+    return 0 < codepoint <= 0x10FFFF and not 0x80 <= codepoint <= 0x9F and not 0xD800 <= codepoint <= 0xDFFF
+
+
+def _has_duplicate_attributes(attributes):
+    """True bei doppelten Attributen: html.parser übernimmt das letzte, lxml/lexbor das erste."""
+    count = attributes.count('=')
+    if count == 0 or count == 1 and _SINGLE_ATTRIBUTE_RE.fullmatch(attributes):
+        return False # ohne Werte ist es egal, welches Attribut gewinnt
+    names = _ATTRIBUTE_RE.findall(attributes.lower())
+    return len(names) != len(set(names))
+
+
+def _markup_needs_reference_parser(text):
+    """True, wenn lxml/lexbor aus dem Markup einen anderen Baum bauen könnten als html.parser.
+
+    Geht einmal über alle Tags und führt den Stapel offener Elemente so, wie BeautifulSoup
+    ihn aus html.parser aufbaut. Sicher ist nur sauber verschachteltes HTML: jedes End-Tag
+    schließt das zuletzt geöffnete Element, nichts wird implizit geschlossen oder umgehängt,
+    und nach </body> bzw. </html> folgt nichts mehr.
+    """
+    stack = []
+    top = None
+    lowered = None
+    seen_html = False
+    closed = False # </body> oder </html> gelesen
+    stray_end_tag = False # letztes Markup war ein End-Tag ohne offenes Element
+    position = 0
+    for match in _MARKUP_RE.finditer(text):
+        start = match.start()
+        if start < position:
+            continue # innerhalb eines Kommentars oder Rohtexts
+        if start > position:
+            gap = text[position:start]
+            # lxml/lexbor lassen ein verirrtes End-Tag einfach weg und verbinden die Texte davor und danach
+            if not gap.isspace() and (stray_end_tag or closed or top in _TEXT_UNSAFE_PARENTS):
+                return True
+        else:
+            gap = ''
+        stray_end_tag = False
+        position = match.end()
+        end_tag, name, attributes = match.groups()
+        if name is None:
+            if match.group(0) == '<!--':
+                end = text.find('-->', position)
+                comment = text[position:end]
+                if end < 0 or comment.startswith(('>', '->')) or '--!>' in comment:
+                    return True
+                position = end + 3
+                continue
+            doctype = _DOCTYPE_RE.match(text, start)
+            if doctype is None or seen_html: # nur ein DOCTYPE ganz am Anfang ist unkritisch
+                return True
+            position = doctype.end()
+            continue
+
+        name = name.lower()
+        if end_tag:
+            if name == top:
+                stack.pop()
+                top = stack[-1] if stack else None
+                if name == 'body' or name == 'html':
+                    closed = True
+            elif name in stack or name in _STRAY_END_TAG_UNSAFE or gap and not gap.isspace():
+                return True
+            else:
+                stray_end_tag = True # html.parser ignoriert es auch; unkritisch, solange kein Text angrenzt
+            continue
+
+        if closed or name in _UNSAFE_TAGS or attributes and ('<' in attributes or _has_duplicate_attributes(attributes)):
+            return True
+        if name in _PHRASING_TAGS:
+            if name == 'a' and 'a' in stack:
+                return True
+            if top in _TEXT_UNSAFE_PARENTS and not (top == 'head' and name in _HEAD_CONTENT):
+                return True
+        elif name == 'html':
+            if seen_html:
+                return True
+            seen_html = True
+        elif not seen_html:
+            return True # Inhalt vor <html>: lxml und BeautifulSoup hängen ihn unterschiedlich ein
+        elif name == 'head' or name == 'body':
+            if top != 'html' or len(stack) != 1:
+                return True
+        elif top == 'html' or top == 'head' and name not in _HEAD_CONTENT:
+            return True
+        elif 'p' in stack or name in _NOT_NESTED_TAGS and name in stack:
+            return True
+        elif name in _REQUIRED_PARENTS:
+            if top not in _REQUIRED_PARENTS[name]:
+                return True
+        elif name in _HEADINGS and top in _HEADINGS or top in _TABLE_CONTEXT and name not in _TABLE_CONTENT:
+            return True
+        elif top in _LIBXML2_CLOSED_BY and name in _LIBXML2_CLOSED_BY[top]:
+            return True
+
+        if name in _VOID_TAGS:
+            continue
+        if attributes and attributes[-1] == '/':
+            return True # <div/>: BeautifulSoup schließt das Element, lxml/lexbor nicht
+        if name in _RAW_TEXT_TAGS:
+            if lowered is None:
+                lowered = text.lower()
+            end = lowered.find(f'</{name}', position)
+        elif name in _RCDATA_TAGS:
+            end = text.find('<', position)
+            if not text.startswith(f'</{name}', end) or name in _RCDATA_RAW_TAGS and '&' in text[position:end]:
+                return True # Tags (oder Entities) im Inhalt von <title>, <textarea>, <xmp>, ...
+        else:
+            stack.append(name)
+            top = name
+            continue
+        after = end + 2 + len(name)
+        if end < 0 or text[after:after + 1] not in _TAG_NAME_ENDS:
+            return True
+        position = end
+        stack.append(name)
+        top = name
+    if position < len(text) and not text[position:].isspace():
+        return stray_end_tag or closed or top in _TEXT_UNSAFE_PARENTS
+    return False
+
+
+def needs_reference_parser(text, engine):
+    """True, wenn die Seite Konstrukte enthält, die nur html.parser exakt so behandelt wie bisher."""
+    if not text.strip(): # lxml lehnt leere Dokumente ab
+        return True
+    if '\r' in text or '\x00' in text or '<![CDATA[' in text:
+        return True
+    if not all(_is_safe_reference(reference) for reference in set(_REFERENCE_RE.findall(text))):
+        return True
+    return _markup_needs_reference_parser(text)
+
+
+def _selector_matches(selector, attrs, classes):
+    """Wie soup.find('div', attrs=selector): "class" muss eine der Klassen sein, alle anderen Attribute exakt passen."""
+    for name, value in selector.items():
+        if name == 'class':
+            if value not in classes:
+                return False
+        elif attrs.get(name) != value:
+            return False
+    return True
+
+
+def _record_div(attrs, node, selectors, matches, memdocs):
+    """Prüft ein <div> gegen alle Selektoren der Kaskade; pro Selektor zählt der erste Treffer."""
+    class_attr = attrs.get('class')
+    classes = class_attr.split() if class_attr else ()
+    for index, selector in enumerate(selectors):
+        if matches[index] is None and _selector_matches(selector, attrs, classes):
+            matches[index] = node
+    if 'memdoc' in classes:
+        memdocs.append(node)
+
+
+def _has_class(attrs, name):
+    class_attr = attrs.get('class')
+    return bool(class_attr) and name in class_attr.split()
+
+
+def _assemble(main_node, memdoc_parts, h1, title, get_text):
+    """Baut (Text, Titel) wie die bisherige Kaskade in find_main_content()."""
+    if main_node is not None:
+        text_content = get_text(main_node, '\n')
+        if h1 is not None:
+            page_title = get_text(h1, '')
+        else:
+            page_title = get_text(title, '') if title is not None else 'No Title Found'
+        return text_content, page_title
+    if memdoc_parts:
+        page_title = get_text(title, '') if title is not None else 'No Title Found (MemDocs)'
+        return '\n'.join(memdoc_parts), page_title
+    return None, None
+
+
+# --- lxml ---
+def _lxml_strings(element, out):
+    text = element.text
+    if text:
+        text = text.strip()
+        if text:
+            out.append(text)
+    for child in element:
+        tag = child.tag
+        # Kommentare/Processing Instructions haben keinen String-Tag; ihr Tail zählt trotzdem
+        if isinstance(tag, str) and tag not in SKIPPED_TEXT_TAGS:
+            _lxml_strings(child, out)
+        tail = child.tail
+        if tail:
+            tail = tail.strip()
+            if tail:
+                out.append(tail)
+
+
+def _lxml_text(element, separator):
+    out = []
+    _lxml_strings(element, out)
+    return separator.join(out)
+
+
+_LXML_PARSER = lxml.html.HTMLParser(encoding='utf-8') if lxml is not None else None
+
+
+def parse_with_lxml(text, selectors, extract_content=True):
+    """Wie page_extractor.parse_with_bs4(), aber mit lxml in einem Durchlauf."""
+    root = lxml.html.document_fromstring(text.encode('utf-8'), parser=_LXML_PARSER)
+
+    hrefs = []
+    matches = [None] * len(selectors)
+    memdocs = []
+    h1 = title = None
+    for element in root.iter('div', 'a', 'h1', 'title'):
+        tag = element.tag
+        if tag == 'a':
+            href = element.get('href')
+            if href is not None:
+                hrefs.append(href)
+        elif not extract_content:
+            continue
+        elif tag == 'div':
+            _record_div(element.attrib, element, selectors, matches, memdocs)
+        elif tag == 'h1':
+            if h1 is None:
+                h1 = element
+        elif title is None:
+            title = element
+
+    if not extract_content:
+        return None, None, hrefs
+
+    main_node = next((node for node in matches if node is not None), None)
+    memdoc_parts = []
+    if main_node is None:
+        for memdoc in memdocs:
+            memitem = next((parent for parent in memdoc.iterancestors('div') if _has_class(parent.attrib, 'memitem')), None)
+            if memitem is not None:
+                memtitle = next((heading for heading in memitem.iter('h2', 'h3') if _has_class(heading.attrib, 'memtitle')), None)
+                if memtitle is not None:
+                    memdoc_parts.append(f"TITLE: {_lxml_text(memtitle, ' ')}\n")
+            memdoc_parts.append(_lxml_text(memdoc, '\n'))
+            memdoc_parts.append("\n---\n")
+
+    text_content, page_title = _assemble(main_node, memdoc_parts, h1, title, _lxml_text)
+    return text_content, page_title, hrefs
+
+
+# --- selectolax (lexbor) ---
+def _lexbor_text(node, separator):
+    out = []
+    root_id = node.mem_id
+    current = node.child
+    while current is not None:
+        tag = current.tag
+        if tag == '-text':
+            text = current.text_content.strip()
+            if text:
+                out.append(text)
+        elif tag != '-comment' and tag not in SKIPPED_TEXT_TAGS and current.child is not None:
+            current = current.child
+            continue
+        # Zum nächsten Geschwister, ggf. über die Eltern zurück nach oben
+        while current is not None and current.next is None:
+            current = current.parent
+            if current is None or current.mem_id == root_id:
+                current = None
+        if current is not None:
+            current = current.next
+    return separator.join(out)
+
+
+def parse_with_selectolax(text, selectors, extract_content=True):
+    """Wie page_extractor.parse_with_bs4(), aber mit selectolax/lexbor in einem Durchlauf."""
+    tree = LexborHTMLParser(text)
+
+    hrefs = []
+    matches = [None] * len(selectors)
+    memdocs = []
+    h1 = title = None
+    for node in tree.css('div, a, h1, title'):
+        tag = node.tag
+        if tag == 'a':
+            href = node.attributes.get('href', False)
+            if href is not False:
+                hrefs.append(href or '') # Attribut ohne Wert liefert BeautifulSoup als ''
+        elif not extract_content:
+            continue
+        elif tag == 'div':
+            _record_div(node.attributes, node, selectors, matches, memdocs)
+        elif tag == 'h1':
+            if h1 is None:
+                h1 = node
+        elif title is None:
+            title = node
+
+    if not extract_content:
+        return None, None, hrefs
+
+    main_node = next((node for node in matches if node is not None), None)
+    memdoc_parts = []
+    if main_node is None:
+        for memdoc in memdocs:
+            memitem = memdoc.parent
+            while memitem is not None and not (memitem.tag == 'div' and _has_class(memitem.attributes, 'memitem')):
+                memitem = memitem.parent
+            if memitem is not None:
+                memtitle = next((heading for heading in memitem.css('h2, h3') if _has_class(heading.attributes, 'memtitle')), None)
+                if memtitle is not None:
+                    memdoc_parts.append(f"TITLE: {_lexbor_text(memtitle, ' ')}\n")
+            memdoc_parts.append(_lexbor_text(memdoc, '\n'))
+            memdoc_parts.append("\n---\n")
+
+    text_content, page_title = _assemble(main_node, memdoc_parts, h1, title, _lexbor_text)
+    return text_content, page_title, hrefs
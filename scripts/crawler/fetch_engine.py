@@ -0,0 +1,275 @@
+"""
+Asynchrone Fetch-Engine für den Web-Crawler.
+
+Die HTTP-Anfragen laufen weiterhin über eine gemeinsame requests.Session (Keep-Alive,
+Connection-Pooling), werden aber in einem Thread-Pool ausgeführt und über asyncio
+koordiniert. So können mehrere Anfragen gleichzeitig laufen, während pro Host eine
+Obergrenze gleichzeitiger Anfragen und ein Mindestabstand zwischen zwei Anfragen
+eingehalten werden.
+
+Mit `metrics` (crawl_metrics.CrawlMetrics) misst die Engine pro Anfrage die Wartezeit auf
+einen Slot, den Verbindungsaufbau (nur bei neuen Verbindungen), die Zeit bis zu den
+Antwort-Headern und den Download des Bodys.
+
+Der Body wird immer gestreamt gelesen. Mit `max_body_bytes` und `allowed_content_types`
+prüft die Engine vor dem Download Content-Type und Content-Length und bricht den Download
+ab, sobald die Obergrenze überschritten ist; fehlt ein brauchbarer Content-Type, entscheiden
+die ersten Bytes (Signaturen von Bildern, PDFs, Archiven). Abgelehnte Antworten werden als
+ResponseRejected gemeldet, sodass nie mehr als `max_body_bytes` im Speicher landen.
+
+Mit `archive` (response_archive.ResponseArchive) zeichnet die Engine alle Antworten der
+Session auf; mit `replay=True` beantwortet sie Anfragen stattdessen ohne Netzwerk aus dem
+Archiv. Fehlt eine Seite im Archiv, meldet fetch() ResponseRejected mit "not_archived".
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from response_archive import ARCHIVE_MISS_HEADER, RecordingAdapter, ReplayAdapter
+
+# Dauer der Verbindungsaufbauten der laufenden Anfrage, pro Fetch-Thread
+_connect_time = threading.local()
+
+CHUNK_SIZE = 64 * 1024
+
+# Content-Types ohne Aussagekraft: hier entscheiden die ersten Bytes des Bodys
+_GENERIC_CONTENT_TYPES = ("", "application/octet-stream", "binary/octet-stream", "application/unknown")
+# Anfänge von Binärformaten, die unter einer Dokumentations-URL auftauchen können
+_BINARY_SIGNATURES = (
+    b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'RIFF', b'%PDF', b'PK\x03\x04', b'\x1f\x8b',
+    b'BZh', b'\xfd7zXZ', b'7z\xbc\xaf', b'Rar!', b'\x7fELF', b'MZ', b'\x00\x00\x01\x00', b'wOFF', b'wOF2',
+)
+
+
+class ResponseRejected(Exception):
+    """Antwort wurde vor oder während des Downloads verworfen (falscher Typ oder zu groß).
+
+    `reason` ist "content_type", "too_large" oder (bei der Wiedergabe aus einem Archiv)
+    "not_archived". Keine requests-Exception: ein erneuter Versuch würde dasselbe Ergebnis liefern.
+    """
+
+    def __init__(self, url, reason, detail):
+        super().__init__(f"{detail} ({url})")
+        self.url = url
+        self.reason = reason
+
+
+def media_type(content_type):
+    """Medientyp ohne Parameter, z.B. "text/html" aus "text/html; charset=utf-8"."""
+    return (content_type or "").split(';', 1)[0].strip().lower()
+
+
+def header_charset(content_type):
+    """Zeichensatz aus dem Content-Type-Header oder None, wenn der Server keinen angibt.
+
+    Anders als requests' Response.encoding ohne den Ersatzwert ISO-8859-1 für text/*: fehlt
+    die Angabe, soll der Parse-Worker den Zeichensatz aus den Bytes bestimmen.
+    """
+    for parameter in (content_type or "").split(';')[1:]:
+        name, _, value = parameter.partition('=')
+        if name.strip().lower() == 'charset':
+            return value.strip().strip('"\'') or None
+    return None
+
+
+def looks_binary(head):
+    """True, wenn die ersten Bytes eines Bodys zu einem Binärformat gehören."""
+    return head.startswith(_BINARY_SIGNATURES) or b'\x00' in head[:1024]
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_time.seconds = getattr(_connect_time, 'seconds', 0.0) + time.perf_counter() - start
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter, dessen Verbindungen die Dauer von DNS-Auflösung, TCP- und TLS-Aufbau erfassen."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+
+class HostLimiter:
+    """Höflichkeitsregeln für einen einzelnen Host (Parallelität + Mindestabstand)."""
+
+    def __init__(self, max_concurrent, min_interval):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+
+    def reserve_slot(self):
+        """Reserviert den nächsten freien Zeitpunkt für diesen Host; gibt die Wartezeit bis dahin zurück."""
+        if self.min_interval <= 0:
+            return 0.0
+        now = time.monotonic()
+        start = max(now, self._next_slot)
+        self._next_slot = start + self.min_interval
+        return start - now
+
+    async def wait_for_slot(self):
+        # Da alles im selben Event-Loop läuft, ist kein Lock nötig: die Reservierung passiert vor dem await.
+        delay = self.reserve_slot()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class FetchEngine:
+    """Lädt URLs nebenläufig mit globaler und hostbezogener Begrenzung."""
+
+    def __init__(self, headers, timeout, max_concurrent=16, max_per_host=4,
+                 min_host_interval=0.0, session=None, metrics=None,
+                 max_body_bytes=None, allowed_content_types=None, archive=None, replay=False):
+        self.headers = headers
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes # None = unbegrenzt
+        self.allowed_content_types = allowed_content_types # None = alle Medientypen
+        self.max_per_host = max_per_host
+        self.min_host_interval = min_host_interval
+        self.metrics = metrics
+        self.replay = replay
+
+        # Connection-Pool so groß wie die maximale Parallelität, damit Keep-Alive-
+        # Verbindungen wiederverwendet statt verworfen werden.
+        self.session = session or requests.Session()
+        # Auch Anfragen direkt über die Session (robots.txt, Seeding) senden den User-Agent des Crawlers
+        self.session.headers.update(headers)
+        adapter_class = TimedHTTPAdapter if metrics is not None else HTTPAdapter
+        adapter = adapter_class(pool_connections=max_concurrent, pool_maxsize=max_concurrent)
+        if replay:
+            adapter = ReplayAdapter(archive)
+        elif archive is not None:
+            adapter = RecordingAdapter(adapter, archive)
+        self.adapter = adapter
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='fetch')
+        self._global_limit = asyncio.Semaphore(max_concurrent)
+        self._hosts = {}
+
+    def _limiter_for(self, url):
+        host = urlparse(url).netloc
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = HostLimiter(self.max_per_host, self.min_host_interval)
+            self._hosts[host] = limiter
+        return limiter
+
+    def wait_for_host_sync(self, url):
+        """Hält den Mindestabstand zum Host von `url` für eine synchrone Anfrage über self.session ein.
+
+        Für Anfragen vor dem Crawl, die blockierend laufen (URL-Seeding); sie zählen für
+        den Abstand genauso wie Anfragen über fetch().
+        """
+        delay = self._limiter_for(url).reserve_slot()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def fetch(self, url, headers=None):
+        """Lädt eine URL und gibt das requests.Response-Objekt zurück.
+
+        Netzwerkfehler werden als requests.exceptions.RequestException weitergereicht,
+        genau wie bei einem direkten session.get(). Verletzt eine erfolgreiche Antwort
+        `allowed_content_types` oder eine Antwort `max_body_bytes`, wird ResponseRejected
+        ausgelöst.
+        """
+        request_headers = self.headers if headers is None else {**self.headers, **headers}
+        limiter = self._limiter_for(url)
+        requested = time.perf_counter()
+        # Erst den Host-Slot, dann den globalen Slot belegen: so blockieren Anfragen an
+        # einen ausgelasteten Host keine globalen Slots für andere Hosts.
+        async with limiter.semaphore:
+            await limiter.wait_for_slot()
+            async with self._global_limit:
+                loop = asyncio.get_running_loop()
+                if self.metrics is None:
+                    return await loop.run_in_executor(self._executor, self._get, url, request_headers)
+                self.metrics.observe("slot_wait", time.perf_counter() - requested)
+                response, timings = await loop.run_in_executor(self._executor, self._timed_get, url, request_headers)
+                self.metrics.observe_all(timings)
+                return response
+
+    def _get(self, url, headers):
+        response = self.session.get(url, timeout=self.timeout, headers=headers, stream=True)
+        self._read_body(url, response)
+        return response
+
+    def _timed_get(self, url, headers):
+        """Wie _get(), misst aber Antwortzeit und Download getrennt."""
+        _connect_time.seconds = 0.0
+        start = time.perf_counter()
+        response = self.session.get(url, timeout=self.timeout, headers=headers, stream=True)
+        headers_received = time.perf_counter()
+        self._read_body(url, response)
+        connect = _connect_time.seconds
+        timings = {
+            "ttfb": headers_received - start - connect,
+            "download": time.perf_counter() - headers_received,
+        }
+        if connect:
+            timings["connect"] = connect # wiederverwendete Keep-Alive-Verbindung: kein Aufbau
+        return response, timings
+
+    def _read_body(self, url, response):
+        """Liest den Body blockweise nach response.content und prüft dabei Typ und Größe.
+
+        Bei einer Ablehnung wird die Verbindung geschlossen, statt den Rest zu lesen.
+        """
+        try:
+            if self.replay and response.headers.get(ARCHIVE_MISS_HEADER):
+                raise ResponseRejected(url, "not_archived", "Seite nicht im Archiv")
+            content_type = media_type(response.headers.get('Content-Type'))
+            check_type = self.allowed_content_types is not None and response.ok
+            if check_type and content_type not in _GENERIC_CONTENT_TYPES and content_type not in self.allowed_content_types:
+                raise ResponseRejected(url, "content_type", f"Content-Type {content_type} wird nicht gecrawlt")
+            declared_size = response.headers.get('Content-Length', '')
+            if self.max_body_bytes is not None and declared_size.isdigit() and int(declared_size) > self.max_body_bytes:
+                raise ResponseRejected(url, "too_large", f"Content-Length {declared_size} über der Grenze von {self.max_body_bytes} Bytes")
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if not chunks and check_type and content_type in _GENERIC_CONTENT_TYPES and looks_binary(chunk):
+                    raise ResponseRejected(url, "content_type", f"Binärdaten ohne passenden Content-Type ({content_type or 'keiner'})")
+                size += len(chunk)
+                if self.max_body_bytes is not None and size > self.max_body_bytes:
+                    raise ResponseRejected(url, "too_large", f"Body über der Grenze von {self.max_body_bytes} Bytes")
+                chunks.append(chunk)
+        except BaseException:
+            response.close()
+            raise
+        # Wie requests es ohne stream=True tut: response.content ist danach ohne weiteren Download verfügbar
+        response._content = b''.join(chunks)
+        response._content_consumed = True
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
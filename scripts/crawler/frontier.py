@@ -0,0 +1,126 @@
+"""
+Crawl-Frontier: Warteschlange der noch zu besuchenden URLs.
+
+Die Frontier ersetzt die bisherige deque. Sie ist eine Prioritäts-Warteschlange (FIFO
+innerhalb derselben Priorität) mit einem Index aller jemals eingereihten URLs, sodass
+die Prüfung "schon bekannt?" in O(1) statt durch einen Scan der ganzen Queue erfolgt.
+Für den Index werden URLs normalisiert, damit z.B. `.../foo/`, `.../foo` und
+`.../foo/index.html` nur einmal geladen werden. Geladen wird immer die Original-URL.
+Für sehr große Crawls kann der Index eine kompakte Menge sein (url_set.CompactUrlSet).
+"""
+import heapq
+import itertools
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Prioritäten: kleinere Zahl = früher laden
+PRIORITY_SEED = 0 # Start-URLs
+PRIORITY_CONTENT = 1 # normale Inhaltsseiten
+PRIORITY_LOW = 2 # z.B. Doxygen-Quelltextlisten (_source.html)
+
+_DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+
+def normalize_url(url):
+    """Liefert den Index-Schlüssel einer URL.
+
+    Schema und Host werden kleingeschrieben, Standard-Ports und Fragmente entfernt,
+    ein abschließendes `index.html` und abschließende Schrägstriche entfernt und die
+    Query-Parameter sortiert.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = _DEFAULT_PORTS.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+
+    path = parts.path or '/'
+    if path.endswith('/index.html'):
+        path = path[:-len('index.html')]
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query = parts.query
+    if query:
+        query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+class UrlFrontier:
+    """Prioritäts-Warteschlange mit O(1)-Mitgliedschaftsindex über normalisierte URLs."""
+
+    def __init__(self, low_priority_patterns=(), seen=None):
+        self.low_priority_patterns = tuple(low_priority_patterns)
+        self._heap = []
+        self._counter = itertools.count() # sorgt für FIFO-Reihenfolge innerhalb einer Priorität
+        self._queued = set() # Schlüssel der URLs, die gerade in der Queue stehen
+        self._seen = set() if seen is None else seen # Schlüssel aller URLs, die jemals eingereiht wurden
+
+    def priority_for(self, url):
+        if any(pattern in url for pattern in self.low_priority_patterns):
+            return PRIORITY_LOW
+        return PRIORITY_CONTENT
+
+    def _push(self, key, url, priority):
+        if priority is None:
+            priority = self.priority_for(url)
+        heapq.heappush(self._heap, (priority, next(self._counter), key, url))
+        self._queued.add(key)
+
+    def add(self, url, priority=None):
+        """Reiht eine URL ein, falls sie (normalisiert) noch nie eingereiht wurde.
+
+        Gibt True zurück, wenn die URL neu war.
+        """
+        key = normalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._push(key, url, priority)
+        return True
+
+    def requeue(self, url, priority=None):
+        """Reiht eine bereits bekannte URL erneut ein (z.B. für Wiederholungsversuche)."""
+        key = normalize_url(url)
+        if key in self._queued:
+            return False
+        self._seen.add(key)
+        self._push(key, url, priority)
+        return True
+
+    def mark_seen(self, url):
+        """Markiert eine URL als bekannt, ohne sie einzureihen."""
+        self._seen.add(normalize_url(url))
+
+    def is_seen(self, url):
+        return normalize_url(url) in self._seen
+
+    @property
+    def seen(self):
+        """Index aller jemals eingereihten Schlüssel (z.B. zum Speichern im Sidecar-Index)."""
+        return self._seen
+
+    def load_seen(self, seen):
+        """Übernimmt einen gespeicherten Index der bekannten Schlüssel (vor dem Einreihen aufrufen)."""
+        self._seen = seen
+
+    def pop(self):
+        """Entnimmt die URL mit der höchsten Priorität (IndexError, wenn leer)."""
+        _, _, key, url = heapq.heappop(self._heap)
+        self._queued.discard(key)
+        return url
+
+    def clear(self):
+        self._heap.clear()
+        self._queued.clear()
+        self._seen.clear()
+
+    def __contains__(self, url):
+        return normalize_url(url) in self._queued
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
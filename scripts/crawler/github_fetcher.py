@@ -0,0 +1,390 @@
+"""
+Zweite Crawler-Stufe: lädt die vom Web-Crawler gesammelten GitHub-Dateien.
+
+Der Web-Crawler schreibt nur die URLs interessanter Quelltextdateien in
+`[PROJECT_NAME]_github_links.jsonl` (siehe GITHUB_FILE_EXTENSIONS in web_crawler.py).
+Diese Stufe liest die Datei, schreibt `github.com/.../blob/...`-Links in die Raw-Form
+(`raw.githubusercontent.com/<owner>/<repo>/<ref>/<pfad>`) um, entfernt Duplikate über
+Repository/Ref/Pfad und lädt die Dateien nebenläufig über die FetchEngine
+(Connection-Pool, Parallelitätsgrenze, Mindestabstand zwischen Anfragen).
+
+Die Ausgabe ist inhaltsadressiert: die ID eines Segments ist der SHA-256 des
+Dateiinhalts, identische Dateien (z.B. dieselbe Datei unter zwei Refs) werden nur einmal
+gespeichert. Der Fortschritt steht in einer SQLite-Datei; ein erneuter Aufruf lädt nur,
+was noch fehlt, und neue Links aus einem späteren Crawl kommen automatisch dazu. Als
+erledigt gelten nur endgültige Fehler (z.B. 404, keine UTF-8-Datei, größer als
+GITHUB_MAX_FILE_SIZE_MB; solche Downloads bricht die Engine schon beim Lesen ab). Dateien,
+die auch nach allen Wiederholungen an Timeouts, Verbindungsfehlern, 5xx oder 429
+scheitern, lädt der nächste Aufruf erneut.
+
+Aufruf (vom Hauptverzeichnis des Projekts, nach web_crawler.py):
+    python scripts/crawler/github_fetcher.py
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import requests
+
+from fetch_engine import FetchEngine, ResponseRejected
+from retry_scheduler import RetryScheduler, parse_retry_after
+from segment_writer import SegmentWriter, open_text_lines
+from web_crawler import (
+    HEADERS, HTTP_TIMEOUT, MAX_RETRIES, PROJECT_NAME, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    SEGMENT_BATCH_SIZE, SEGMENT_COMPRESSION, SEGMENT_FLUSH_INTERVAL, SEGMENT_SHARD_SIZE_MB,
+    github_links_output_file,
+)
+
+
+# --- Datei- und Ordnerpfade ---
+github_segments_output_file = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data", "processed_data", f"{PROJECT_NAME}_github_segments.jsonl"
+)
+github_progress_file = os.path.join( # SQLite mit dem Stand jeder Datei (geladen, fehlgeschlagen, Inhalts-Hash)
+    os.path.dirname(__file__), "..", "..", "data", "processed_data", f"{PROJECT_NAME}_github_fetch_progress.sqlite"
+)
+github_log_file_path = os.path.join(
+    os.path.dirname(__file__), "..", "..", "logs", f"{PROJECT_NAME}_github_fetcher_output.log"
+)
+
+# Ziel der umgeschriebenen URLs; für Tests auf einen lokalen Server umstellbar (z.B. "http://127.0.0.1:8000/")
+GITHUB_RAW_BASE_URL = "https://raw.githubusercontent.com/"
+
+# Nebenläufigkeit und Höflichkeit gegenüber raw.githubusercontent.com
+GITHUB_MAX_CONCURRENT_REQUESTS = 8 # Anfragen gleichzeitig
+GITHUB_MIN_REQUEST_INTERVAL = 0.05 # Mindestabstand zwischen zwei Anfragen (Sekunden)
+GITHUB_MAX_FILE_SIZE_MB = 2 # größere Dateien (z.B. generierte Tabellen) werden nicht gespeichert
+
+# Fortschritt: gebündelte Commits wie beim Crawl-Checkpoint
+GITHUB_PROGRESS_COMMIT_EVERY = 500
+GITHUB_PROGRESS_COMMIT_INTERVAL = 5 # Sekunden
+GITHUB_PROGRESS_PRINT_INTERVAL = 2 # Sekunden zwischen zwei Fortschrittszeilen
+
+
+logger = logging.getLogger('github_fetcher_logger')
+
+_GITHUB_HOST = 'github.com'
+_RAW_HOST = 'raw.githubusercontent.com'
+
+GithubFile = namedtuple('GithubFile', 'owner repo ref path')
+
+
+def is_permanent_failure(e):
+    """Würde ein späterer Versuch dasselbe Ergebnis liefern? Ja bei 4xx außer 408 und 429."""
+    response = getattr(e, 'response', None)
+    return response is not None and 400 <= response.status_code < 500 and response.status_code not in (408, 429)
+
+
+def parse_github_file_url(url):
+    """Zerlegt einen Link auf eine GitHub-Datei in (owner, repo, ref, path) oder gibt None zurück.
+
+    Erkannt werden `github.com/<owner>/<repo>/blob|raw/<ref>/<pfad>` und
+    `raw.githubusercontent.com/<owner>/<repo>/<ref>/<pfad>`; Query und Fragment
+    (z.B. `#L42`) fallen weg. Refs der Form `refs/heads/<name>` bleiben zusammen.
+    Verzeichnisse (`/tree/`), Issues usw. liefern None.
+    """
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    segments = [segment for segment in parts.path.split('/') if segment]
+    if host == _GITHUB_HOST and len(segments) >= 5 and segments[2] in ('blob', 'raw'):
+        owner, repo, rest = segments[0], segments[1], segments[3:]
+    elif host == _RAW_HOST and len(segments) >= 4:
+        owner, repo, rest = segments[0], segments[1], segments[2:]
+    else:
+        return None
+    if rest[0] == 'refs' and len(rest) >= 4 and rest[1] in ('heads', 'tags'):
+        ref, path = '/'.join(rest[:3]), rest[3:]
+    else:
+        ref, path = rest[0], rest[1:]
+    return GithubFile(owner, repo, ref, '/'.join(path))
+
+
+def file_key(github_file):
+    """Schlüssel für die Deduplizierung: GitHub behandelt Owner und Repository case-insensitiv."""
+    return f"{github_file.owner.lower()}/{github_file.repo.lower()}/{github_file.ref}/{github_file.path}"
+
+
+def raw_url_for(github_file, raw_base_url=GITHUB_RAW_BASE_URL):
+    return f"{raw_base_url}{github_file.owner}/{github_file.repo}/{github_file.ref}/{github_file.path}"
+
+
+def load_github_files(links_file):
+    """Liest die GitHub-Links des Web-Crawlers und gibt ({key: (url, GithubFile)}, Anzahl Links, übersprungene) zurück."""
+    files = {}
+    link_count = skipped = 0
+    with open_text_lines(links_file) as f:
+        for line_num, line in enumerate(f):
+            try:
+                url = json.loads(line)['url']
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logger.warning(f"Ungültige Zeile {line_num+1} in {links_file}. Ignoriere Zeile.")
+                continue
+            link_count += 1
+            github_file = parse_github_file_url(url)
+            if github_file is None or not github_file.path:
+                skipped += 1
+                continue
+            files.setdefault(file_key(github_file), (url, github_file))
+    return files, link_count, skipped
+
+
+_PROGRESS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT PRIMARY KEY,
+    raw_url TEXT NOT NULL,
+    content_hash TEXT,
+    error TEXT
+);
+"""
+
+
+class GithubFetchProgress:
+    """Fortschritt der Stufe in SQLite: pro Datei der Inhalts-Hash oder der Fehler.
+
+    Wie beim CrawlCheckpoint werden Änderungen gebündelt committet, und vor jedem Commit
+    laufen die registrierten Hooks (fsync der Segment-Datei).
+    """
+
+    def __init__(self, path, commit_interval=5.0, commit_every=500):
+        self.commit_interval = commit_interval
+        self.commit_every = commit_every
+        self._pending_changes = 0
+        self._last_commit = time.monotonic()
+        self._before_commit = []
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_PROGRESS_SCHEMA)
+        self.conn.commit()
+
+    def add_commit_hook(self, callback):
+        self._before_commit.append(callback)
+
+    def record_done(self, key, raw_url, content_hash):
+        self.conn.execute("INSERT OR REPLACE INTO files (key, raw_url, content_hash) VALUES (?, ?, ?)", (key, raw_url, content_hash))
+        self._pending_changes += 1
+
+    def record_failed(self, key, raw_url, error):
+        """Endgültiger Fehler: die Datei wird bei keinem weiteren Aufruf erneut geladen."""
+        self.conn.execute("INSERT OR REPLACE INTO files (key, raw_url, error) VALUES (?, ?, ?)", (key, raw_url, error))
+        self._pending_changes += 1
+
+    def load_finished_keys(self):
+        """Schlüssel aller Dateien, die geladen wurden oder endgültig fehlgeschlagen sind."""
+        return {row[0] for row in self.conn.execute("SELECT key FROM files")}
+
+    def load_content_hashes(self):
+        """Hashes aller bereits als Segment gespeicherten Inhalte."""
+        return {row[0] for row in self.conn.execute("SELECT DISTINCT content_hash FROM files WHERE content_hash IS NOT NULL")}
+
+    def maybe_commit(self):
+        if self._pending_changes >= self.commit_every or \
+           (self._pending_changes and time.monotonic() - self._last_commit >= self.commit_interval):
+            self.commit()
+
+    def commit(self):
+        for callback in self._before_commit:
+            callback()
+        self.conn.commit()
+        self._pending_changes = 0
+        self._last_commit = time.monotonic()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class GithubFetcher:
+    """Lädt GitHub-Dateien nebenläufig und schreibt sie inhaltsadressiert und dedupliziert."""
+
+    def __init__(self, segment_writer, progress, raw_base_url=GITHUB_RAW_BASE_URL,
+                 max_concurrent=GITHUB_MAX_CONCURRENT_REQUESTS, min_interval=GITHUB_MIN_REQUEST_INTERVAL,
+                 max_file_size=GITHUB_MAX_FILE_SIZE_MB * 1024 * 1024, source=f"{PROJECT_NAME}_github",
+                 progress_interval=GITHUB_PROGRESS_PRINT_INTERVAL):
+        self.segment_writer = segment_writer
+        self.progress = progress
+        self.raw_base_url = raw_base_url
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self.max_file_size = max_file_size
+        self.source = source
+        self.progress_interval = progress_interval
+        self.retry_scheduler = RetryScheduler(base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY) # nur für backoff_delay()
+        self.written_hashes = progress.load_content_hashes()
+        self.stats = {"fetched": 0, "written": 0, "duplicate_content": 0, "failed": 0, "retry_later": 0}
+
+    async def _download(self, engine, raw_url):
+        """Lädt eine Datei; 429, 5xx und Netzwerkfehler werden mit Backoff wiederholt."""
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                response = await engine.fetch(raw_url)
+                response.raise_for_status()
+                return response.content
+            except requests.exceptions.RequestException as e:
+                response = getattr(e, 'response', None)
+                retryable = response is None or response.status_code >= 500 or response.status_code == 429
+                if not retryable or attempt == MAX_RETRIES:
+                    raise
+                delay = None
+                if response is not None and response.status_code in (429, 503):
+                    delay = parse_retry_after(response.headers.get('Retry-After'))
+                if delay is None:
+                    delay = self.retry_scheduler.backoff_delay(attempt)
+                logger.info(f"{raw_url} wird in {delay:.1f} s erneut versucht ({attempt}/{MAX_RETRIES} Versuch): {e}")
+                await asyncio.sleep(delay)
+
+    def _store(self, key, github_file, raw_url, content):
+        """Schreibt den Inhalt als Segment, sofern derselbe Inhalt noch nicht gespeichert ist."""
+        try:
+            text = content.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ValueError("Datei ist keine UTF-8-Textdatei")
+
+        content_hash = hashlib.sha256(content).hexdigest()
+        if content_hash in self.written_hashes:
+            self.stats["duplicate_content"] += 1
+        else:
+            self.segment_writer.write({
+                "id": content_hash,
+                "url": raw_url,
+                "repo": f"{github_file.owner}/{github_file.repo}",
+                "ref": github_file.ref,
+                "path": github_file.path,
+                "content": text,
+                "source": self.source,
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            })
+            self.written_hashes.add(content_hash)
+            self.stats["written"] += 1
+        self.progress.record_done(key, raw_url, content_hash)
+
+    async def _process(self, engine, key, github_file):
+        raw_url = raw_url_for(github_file, self.raw_base_url)
+        try:
+            content = await self._download(engine, raw_url)
+            self.stats["fetched"] += 1
+            self._store(key, github_file, raw_url, content)
+        except requests.exceptions.RequestException as e:
+            if is_permanent_failure(e):
+                self._record_failed(key, raw_url, e)
+            else:
+                # Nicht als erledigt speichern: der nächste Aufruf versucht die Datei erneut
+                logger.warning(f"GitHub-Datei {raw_url} vorerst nicht geladen, wird beim nächsten Aufruf erneut versucht: {e}")
+                self.stats["retry_later"] += 1
+        except (ResponseRejected, ValueError) as e:
+            self._record_failed(key, raw_url, e)
+        self.progress.maybe_commit()
+
+    def _record_failed(self, key, raw_url, e):
+        logger.warning(f"GitHub-Datei {raw_url} wird nicht gespeichert: {e}")
+        self.stats["failed"] += 1
+        self.progress.record_failed(key, raw_url, str(e))
+
+    async def fetch_all(self, files):
+        """Lädt alle (key, GithubFile)-Paare mit begrenzter Parallelität."""
+        engine = FetchEngine(
+            HEADERS, HTTP_TIMEOUT,
+            max_concurrent=self.max_concurrent,
+            max_per_host=self.max_concurrent,
+            min_host_interval=self.min_interval,
+            max_body_bytes=self.max_file_size, # zu große Dateien gar nicht erst vollständig laden
+        )
+        pending = iter(files)
+        total = len(files)
+        done = 0
+        last_print = time.monotonic()
+        # Im Terminal wird die Zeile überschrieben, in Logdateien steht jede Zeile für sich
+        line_end = '\r' if sys.stdout.isatty() else '\n'
+
+        async def worker():
+            nonlocal done, last_print
+            # Alle Worker teilen sich einen Iterator; das ist im Event-Loop ohne Lock sicher
+            for key, github_file in pending:
+                await self._process(engine, key, github_file)
+                done += 1
+                now = time.monotonic()
+                if now - last_print >= self.progress_interval or done == total:
+                    last_print = now
+                    print(f"GitHub-Dateien: {done}/{total} | Gespeichert: {self.stats['written']} | Fehler: {self.stats['failed']}    ", end=line_end)
+
+        try:
+            # Doppelt so viele Worker wie Slots, damit wartende Wiederholungen keine Slots blockieren
+            await asyncio.gather(*(worker() for _ in range(self.max_concurrent * 2)))
+        finally:
+            engine.close()
+            self.progress.commit()
+
+
+def setup_environment():
+    os.makedirs(os.path.dirname(github_segments_output_file), exist_ok=True)
+    os.makedirs(os.path.dirname(github_progress_file), exist_ok=True)
+    os.makedirs(os.path.dirname(github_log_file_path), exist_ok=True)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(github_log_file_path, encoding='utf-8')
+        ]
+    )
+
+
+def main():
+    setup_environment()
+    if not os.path.exists(github_links_output_file):
+        print(f"Keine GitHub-Links gefunden ({github_links_output_file}). Bitte zuerst web_crawler.py ausführen.")
+        return
+
+    files, link_count, skipped = load_github_files(github_links_output_file)
+    progress = GithubFetchProgress(
+        github_progress_file,
+        commit_interval=GITHUB_PROGRESS_COMMIT_INTERVAL,
+        commit_every=GITHUB_PROGRESS_COMMIT_EVERY,
+    )
+    segment_writer = SegmentWriter(
+        github_segments_output_file,
+        batch_size=SEGMENT_BATCH_SIZE,
+        flush_interval=SEGMENT_FLUSH_INTERVAL,
+        compression=SEGMENT_COMPRESSION,
+        shard_size_mb=SEGMENT_SHARD_SIZE_MB,
+    )
+    progress.add_commit_hook(segment_writer.sync)
+
+    finished_keys = progress.load_finished_keys()
+    todo = [(key, github_file) for key, (_, github_file) in files.items() if key not in finished_keys]
+    summary = (
+        f"{link_count} GitHub-Links gelesen: {len(files)} eindeutige Dateien, {link_count - skipped - len(files)} doppelte Links, "
+        f"{skipped} keine Datei-Links. {len(files) - len(todo)} bereits erledigt, {len(todo)} werden geladen."
+    )
+    logger.info(summary)
+    print(summary)
+
+    fetcher = GithubFetcher(segment_writer, progress)
+    try:
+        asyncio.run(fetcher.fetch_all(todo))
+    finally:
+        progress.close()
+        segment_writer.close()
+
+    stats = fetcher.stats
+    summary = (
+        f"GitHub-Dateien geladen: {stats['fetched']}, davon {stats['written']} neu gespeichert und "
+        f"{stats['duplicate_content']} mit bereits gespeichertem Inhalt. {stats['failed']} fehlgeschlagen, "
+        f"{stats['retry_later']} vorübergehend nicht erreichbar (werden beim nächsten Aufruf erneut versucht). "
+        f"Daten gespeichert in: {github_segments_output_file}"
+    )
+    logger.info(summary)
+    print("\n" + summary)
+
+
+if __name__ == '__main__':
+    main()
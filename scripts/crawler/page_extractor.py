@@ -0,0 +1,310 @@
+"""
+Inhalts-Extraktion und Link-Discovery für den Web-Crawler.
+
+Dieses Modul läuft in den Worker-Prozessen des Parse-Pools. Es bekommt die rohen Bytes
+einer Seite, baut den HTML-Baum, extrahiert den Hauptinhalt, bereinigt ihn und sammelt die
+Link-Kandidaten. Alles, was globalen Crawler-Zustand braucht (visited_urls, robots.txt,
+Ausgabedateien), bleibt im Hauptprozess. Das Modul importiert deshalb nichts aus
+web_crawler.py und kann gefahrlos in Worker-Prozessen geladen werden.
+
+Den HTML-Baum baut eine austauschbare Extraktions-Engine (siehe ENGINES): die Referenz
+ist BeautifulSoup mit `html.parser`, schneller sind lxml und selectolax aus
+extraction_engines.py. Alle Engines liefern denselben Rohtext; Bereinigung und
+Link-Klassifizierung sind gemeinsam.
+"""
+import codecs
+import os
+import re
+import time
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+from requests.compat import chardet
+
+import extraction_engines
+from doxygen_cleaner import clean_doxygen_source, is_doxygen_source_page
+
+# Warnungen für XMLParsedAsHTMLWarning unterdrücken (auch in den Worker-Prozessen)
+import warnings
+from bs4 import XMLParsedAsHTMLWarning
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+# Selektor-Kaskade für den Hauptinhalt: das erste <div>, das auf den ersten passenden Selektor
+# zutrifft, ist der Inhalt. Ein Selektor ist ein Dict von Attributen wie bei soup.find('div', attrs=...);
+# "class" prüft eine einzelne Klasse. Passt keiner, werden die Doxygen-`memdoc`-Blöcke gesammelt.
+DEFAULT_CONTENT_SELECTORS = (
+    {"itemprop": "articleBody"},
+    {"role": "main", "class": "document"},
+    {"class": "textblock"},
+    {"class": "contents"},
+    {"id": "doc-content"},
+    {"id": "content"},
+)
+
+
+# Byte Order Marks haben Vorrang vor jeder anderen Angabe (wie im Browser)
+_BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+# <meta charset="..."> bzw. <meta http-equiv="Content-Type" content="...; charset=..."> im Kopf der Seite
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+_META_PRESCAN_BYTES = 1024
+
+
+def _codec_name(label):
+    """Python-Codec zu einem Zeichensatz-Namen oder None, wenn unbekannt.
+
+    ISO-8859-1 und ASCII werden wie im Browser als windows-1252 gelesen, damit typografische
+    Anführungszeichen und Gedankenstriche nicht als Steuerzeichen ankommen.
+    """
+    try:
+        name = codecs.lookup(label).name
+    except (LookupError, TypeError):
+        return None
+    return 'cp1252' if name in ('latin-1', 'iso8859-1', 'ascii') else name
+
+
+def detect_encoding(content, encoding=None):
+    """Bestimmt den Zeichensatz der Antwort-Bytes.
+
+    Reihenfolge: BOM, Zeichensatz aus dem Content-Type-Header (`encoding`), <meta charset>
+    in den ersten 1024 Bytes, gültiges UTF-8, chardet (falls installiert), windows-1252.
+    """
+    for bom, name in _BOMS:
+        if content.startswith(bom):
+            return name
+    for label in (encoding, *_META_CHARSET_RE.findall(content[:_META_PRESCAN_BYTES])[:1]):
+        name = _codec_name(label.decode('ascii') if isinstance(label, bytes) else label) if label else None
+        if name is not None:
+            return name
+    try:
+        content.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    if chardet is not None:
+        name = _codec_name(chardet.detect(content)["encoding"])
+        if name is not None:
+            return name
+    return 'cp1252'
+
+
+def decode_body(content, encoding=None):
+    """Dekodiert die rohen Antwort-Bytes; `encoding` ist der Zeichensatz aus dem Header (oder None)."""
+    if not content:
+        return ""
+    return str(content, detect_encoding(content, encoding), errors='replace')
+
+
+def find_main_content(soup, selectors=DEFAULT_CONTENT_SELECTORS):
+    """Sucht den Hauptinhalt über die Selektor-Kaskade (Referenz-Implementierung mit BeautifulSoup).
+
+    Gibt den unbereinigten (text_content, page_title) zurück oder (None, None), wenn kein
+    Selektor passt.
+    """
+    # Selektoren in der Reihenfolge der Präferenz/Umfassung
+    main_content_div = None
+    for selector in selectors:
+        main_content_div = soup.find('div', attrs=selector)
+        if main_content_div:
+            break
+    
+    memdoc_contents = [] 
+    if not main_content_div: # Nur versuchen, wenn bisher kein Haupt-Div gefunden wurde
+        all_memdocs = soup.find_all('div', class_='memdoc')
+        if all_memdocs:
+            for memdoc_div in all_memdocs:
+                memitem_parent = memdoc_div.find_parent('div', class_='memitem')
+                if memitem_parent:
+                    memtitle_tag = memitem_parent.find(['h2', 'h3'], class_='memtitle') 
+                    if memtitle_tag:
+                        memdoc_contents.append(f"TITLE: {memtitle_tag.get_text(separator=' ', strip=True)}\n")
+                
+                memdoc_contents.append(memdoc_div.get_text(separator='\n', strip=True))
+                memdoc_contents.append("\n---\n") 
+            
+            if memdoc_contents:
+                main_content_div = "MEMDOCS_COLLECTED" 
+
+
+    text_content = ""
+    page_title = ""
+
+    if main_content_div and main_content_div != "MEMDOCS_COLLECTED": 
+        text_content = main_content_div.get_text(separator='\n', strip=True)
+        
+        page_title_tag = soup.find('h1')
+        page_title = page_title_tag.get_text(strip=True) if page_title_tag else \
+                     (soup.find('title').get_text(strip=True) if soup.find('title') else 'No Title Found')
+    elif main_content_div == "MEMDOCS_COLLECTED" and memdoc_contents: 
+        text_content = '\n'.join(memdoc_contents) 
+        page_title = soup.find('title').get_text(strip=True) if soup.find('title') else 'No Title Found (MemDocs)'
+    else:
+        return None, None
+
+    return text_content, page_title
+
+
+def clean_text(text_content, current_url):
+    """Bereinigt den extrahierten Text (Sonderzeichen, Doxygen-Quelltextseiten)."""
+    # --- TEXTBEREINIGUNG START ---
+    # 1. Allgemeine Sonderzeichenbereinigung (den Zeichensatz bestimmt bereits decode_body())
+    text_content = text_content.replace('\uf0c1', '') # Link-Symbol der Sphinx-Überschriften (Icon-Font)
+    text_content = text_content.replace('\u200b', '').replace('\u00a0', ' ') # Unicode Zero Width Space, Non-breaking Space
+    
+    # 2. Spezifische Bereinigung für Doxygen Source-Dateien (.h_source.html, .c_source.html)
+    if is_doxygen_source_page(current_url):
+        text_content = clean_doxygen_source(text_content)
+
+    # --- ENDE DER TEXTBEREINIGUNG ---
+
+    return text_content
+
+
+def not_found_warning(current_url):
+    return f"Konnte Hauptinhalts-Div für {current_url} nicht finden (alle Selektoren fehlgeschlagen). Inhalt wird nicht gespeichert."
+
+
+def classify_links(hrefs, current_url, settings):
+    """Klassifiziert die href-Werte aller <a>-Links einer Seite (in Dokument-Reihenfolge).
+
+    Gibt (doc_links, github_links) zurück: doc_links sind Links innerhalb von base_url,
+    github_links sind (url, file_extension)-Paare für interessante GitHub-Dateien.
+    robots.txt und bereits besuchte URLs prüft der Hauptprozess.
+    """
+    base_url = settings['base_url']
+    base_netloc = urlparse(base_url).netloc
+    doc_links = []
+    github_links = []
+
+    for href in hrefs:
+        full_url = urljoin(current_url, href)
+
+        parsed_full_url = urlparse(full_url)
+        full_url_domain = parsed_full_url.netloc
+        path_without_query_fragment = parsed_full_url.path
+        _, file_extension = os.path.splitext(path_without_query_fragment)
+        file_extension = file_extension.lower()
+        
+        if not file_extension and '.' not in os.path.basename(path_without_query_fragment): 
+            if 'kconfig' in os.path.basename(path_without_query_fragment).lower():
+                file_extension = 'kconfig' 
+
+        is_zephyr_doc_link = (full_url_domain == base_netloc and full_url.startswith(base_url))
+        
+        is_github_link = False
+        if full_url_domain in settings['github_domains']:
+            if file_extension in settings['github_file_extensions'] or \
+               (not file_extension and 'kconfig' in os.path.basename(path_without_query_fragment).lower()):
+                is_github_link = True
+
+        if file_extension in settings['ignored_extensions'] or "#" in full_url:
+            continue 
+        if any(pattern in full_url for pattern in settings.get('ignored_url_patterns', ())):
+            continue
+
+        if is_zephyr_doc_link:
+            doc_links.append(full_url)
+        elif is_github_link:
+            github_links.append((full_url, file_extension))
+
+    return doc_links, github_links
+
+
+# --- Extraktions-Engines ---
+def parse_with_bs4(text, selectors, extract_content=True):
+    """Referenz-Engine: baut den Baum mit html.parser und wendet die Selektor-Kaskade an.
+
+    Wie alle Engines gibt sie (text_content, page_title, hrefs) zurück; text_content ist
+    der unbereinigte Text oder None, wenn kein Selektor passt.
+    """
+    soup = BeautifulSoup(text, 'html.parser')
+    text_content = page_title = None
+    if extract_content:
+        text_content, page_title = find_main_content(soup, selectors)
+    return text_content, page_title, [link['href'] for link in soup.find_all('a', href=True)]
+
+
+ENGINES = {
+    "bs4": parse_with_bs4,
+    "lxml": extraction_engines.parse_with_lxml,
+    "selectolax": extraction_engines.parse_with_selectolax,
+}
+
+# Ist die Bibliothek der jeweiligen Engine installiert?
+_ENGINE_AVAILABLE = {
+    "bs4": True,
+    "lxml": extraction_engines.lxml is not None,
+    "selectolax": extraction_engines.LexborHTMLParser is not None,
+}
+
+
+def resolve_engine(name):
+    """Wählt die Extraktions-Engine: "auto" nimmt lxml, falls installiert, sonst BeautifulSoup."""
+    if name == "auto":
+        return "lxml" if _ENGINE_AVAILABLE["lxml"] else "bs4"
+    if name not in ENGINES:
+        raise ValueError(f"Unbekannte Extraktions-Engine '{name}' (erlaubt: auto, {', '.join(ENGINES)}).")
+    if not _ENGINE_AVAILABLE[name]:
+        raise ImportError(f"Für die Extraktions-Engine '{name}' wird das Paket '{name}' benötigt (pip install {name}).")
+    return name
+
+
+def parse_html(text, settings, extract_content=True):
+    """Baut den Baum mit der Engine aus `settings`; gibt (text_content, page_title, hrefs) zurück."""
+    engine = settings.get('extraction_engine', 'bs4')
+    if engine != 'bs4' and extraction_engines.needs_reference_parser(text, engine):
+        engine = 'bs4' # Sonderfälle, die nur html.parser exakt wie bisher auflöst
+    selectors = settings.get('content_selectors', DEFAULT_CONTENT_SELECTORS)
+    return ENGINES[engine](text, selectors, extract_content)
+
+
+def finish_content(current_url, text_content, page_title, settings):
+    """Bereinigt den Rohtext aus parse_html(); gibt (title, content, warning) zurück.
+
+    Fehlt der Inhalt oder ist er nach der Bereinigung kürzer als min_content_length, sind
+    title und content None und warning enthält die Log-Meldung.
+    """
+    if text_content is None:
+        return None, None, not_found_warning(current_url)
+    text_content = clean_text(text_content, current_url)
+    if len(text_content) < settings['min_content_length']:
+        return None, None, f"Inhalt von {current_url} ist zu kurz ({len(text_content)} Zeichen) oder leer nach Bereinigung. Nicht gespeichert."
+    return page_title, text_content, None
+
+
+def extract_page(current_url, content, encoding, settings, extract_content=True, measure=False):
+    """Einstiegspunkt für den Parse-Pool: verarbeitet eine geladene Seite vollständig.
+
+    `settings` ist ein kleines Dict mit base_url, min_content_length, ignored_extensions,
+    ignored_url_patterns, github_domains, github_file_extensions, extraction_engine und
+    content_selectors. Das Ergebnis ist ein
+    Dict, das der Hauptprozess auswertet (Segment schreiben, Links einreihen, Warnungen loggen).
+    Mit `measure=True` enthält es zusätzlich "timings": Sekunden für decode, parse, cleanup
+    und links (siehe crawl_metrics.STAGES).
+    """
+    started = time.perf_counter()
+    text = decode_body(content, encoding)
+    decoded = time.perf_counter()
+    text_content, page_title, hrefs = parse_html(text, settings, extract_content)
+    parsed = time.perf_counter()
+
+    result = {
+        "title": None,
+        "content": None,
+        "warning": None,
+    }
+
+    # === Hauptinhalts-Extraktion (NUR wenn die Seite noch NICHT besucht wurde) ===
+    if extract_content:
+        result["title"], result["content"], result["warning"] = finish_content(current_url, text_content, page_title, settings)
+    cleaned = time.perf_counter()
+
+    # === Link-Discovery (IMMER ausführen nach erfolgreichem Download & Parse) ===
+    result["doc_links"], result["github_links"] = classify_links(hrefs, current_url, settings)
+    if measure:
+        result["timings"] = {
+            "decode": decoded - started,
+            "parse": parsed - decoded,
+            "cleanup": cleaned - parsed,
+            "links": time.perf_counter() - cleaned,
+        }
+    return result
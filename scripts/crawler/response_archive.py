@@ -0,0 +1,227 @@
+"""
+Aufzeichnen und Wiedergeben von HTTP-Antworten für Offline-Läufe und Benchmarks.
+
+Ein Archiv ist ein Ordner mit einem Index (responses.jsonl, eine Zeile pro Antwort: URL,
+Status, Header, Hash des Bodys) und den Bodys unter bodies/, gzip-komprimiert und nach
+ihrem SHA-256 abgelegt. Gleiche Bodys (z.B. nach einem erneuten Aufzeichnen) liegen nur
+einmal auf der Platte. Ein späterer Eintrag für dieselbe URL ersetzt einen früheren.
+
+Beide Modi hängen sich als Transport-Adapter in die requests.Session der FetchEngine.
+Damit laufen auch robots.txt, Sitemaps, Inventare und Weiterleitungen über das Archiv:
+
+* RecordingAdapter reicht jede Anfrage an den eigentlichen Adapter weiter und schreibt
+  die Antwort mit, während der Crawler den Body liest. Bricht der Crawler einen Download
+  ab (ResponseRejected), wird der bis dahin gelesene Teil als "truncated" gespeichert, damit
+  die Wiedergabe dieselbe Ablehnung auslöst.
+* ReplayAdapter beantwortet Anfragen ohne Netzwerk aus dem Archiv. If-None-Match und
+  If-Modified-Since werden wie vom Server mit 304 beantwortet. Fehlt eine URL, antwortet
+  er mit 404 und dem Header ARCHIVE_MISS_HEADER.
+
+Gespeichert wird der bereits entpackte Body (ohne Content-Encoding); Status, Reason und
+alle übrigen Header bleiben erhalten.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.response import HTTPResponse
+
+INDEX_FILE = "responses.jsonl"
+BODY_DIR = "bodies"
+ARCHIVE_MISS_HEADER = "X-Archive-Miss"
+
+# Beschreiben den übertragenen, nicht den gespeicherten (entpackten) Body
+_TRANSFER_HEADERS = frozenset(("content-encoding", "transfer-encoding", "content-length"))
+
+
+class ResponseArchive:
+    """Index und Body-Speicher eines Archivordners; thread-sicher beim Aufzeichnen."""
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        self._entries = {} # URL -> letzter Index-Eintrag
+        self._lock = threading.Lock()
+        self._index_file = None
+
+        index_path = os.path.join(path, INDEX_FILE)
+        if not writable and not os.path.exists(index_path):
+            raise FileNotFoundError(f"Kein Antwort-Archiv in {path} (es fehlt {INDEX_FILE}).")
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["url"]] = entry
+        if writable:
+            os.makedirs(os.path.join(path, BODY_DIR), exist_ok=True)
+            self._index_file = open(index_path, 'a', encoding='utf-8')
+
+    def _body_path(self, digest):
+        return os.path.join(self.path, BODY_DIR, digest[:2], digest + ".gz")
+
+    def record(self, url, status, reason, headers, body, truncated=False):
+        """Speichert eine Antwort; `headers` ist eine Liste von (Name, Wert)-Paaren."""
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp_path, body_path)
+        entry = {
+            "url": url,
+            "status": status,
+            "reason": reason,
+            "headers": [[name, value] for name, value in headers],
+            "body": digest,
+            "size": len(body),
+            "truncated": truncated,
+        }
+        with self._lock:
+            self._entries[url] = entry
+            self._index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._index_file.flush() # nach einem Abbruch bleibt alles bis hierher nutzbar
+
+    def lookup(self, url):
+        """Index-Eintrag einer URL oder None."""
+        return self._entries.get(url)
+
+    def read_body(self, entry):
+        with gzip.open(self._body_path(entry["body"]), 'rb') as f:
+            return f.read()
+
+    def entries(self):
+        return list(self._entries.values())
+
+    def body_count(self):
+        return len({entry["body"] for entry in self._entries.values()})
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+
+class _RecordingBody:
+    """Hülle um die urllib3-Antwort: merkt sich jeden gelesenen Block und speichert beim Ende."""
+
+    def __init__(self, raw, on_finished):
+        self._raw = raw
+        self._on_finished = on_finished
+        self._chunks = []
+        self._finished = False
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        try:
+            for chunk in self._raw.stream(amt, decode_content=decode_content):
+                self._chunks.append(chunk)
+                yield chunk
+        except Exception:
+            # Verbindungsfehler mitten im Body: nicht speichern, sonst gäbe die Wiedergabe einen Teil als Erfolg zurück
+            self._finished = True
+            self._chunks = []
+            raise
+        self._finish(truncated=False)
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        data = self._raw.read(amt, decode_content=decode_content, **kwargs)
+        self._chunks.append(data)
+        if amt is None or not data:
+            self._finish(truncated=False)
+        return data
+
+    def _finish(self, truncated):
+        if not self._finished:
+            self._finished = True
+            self._on_finished(b''.join(self._chunks), truncated)
+            self._chunks = []
+
+    def close(self):
+        self._finish(truncated=True) # Body nicht vollständig gelesen
+        self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class RecordingAdapter(BaseAdapter):
+    """Transport-Adapter, der Anfragen über `adapter` ausführt und die Antworten im Archiv speichert."""
+
+    def __init__(self, adapter, archive):
+        super().__init__()
+        self.adapter = adapter
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        if request.method != 'GET':
+            return response
+        status, reason = response.status_code, response.reason
+        raw_headers = getattr(response.raw, 'headers', None) or response.headers # urllib3: doppelte Header einzeln
+
+        def on_finished(body, truncated):
+            # Nach einem Abbruch bleibt die angekündigte Größe erhalten, damit die Wiedergabe genauso prüft
+            headers = [(name, value) for name, value in raw_headers.items()
+                       if name.lower() not in _TRANSFER_HEADERS or (truncated and name.lower() == "content-length")]
+            self.archive.record(request.url, status, reason, headers, body, truncated=truncated)
+
+        response.raw = _RecordingBody(response.raw, on_finished)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport-Adapter, der Anfragen ohne Netzwerk aus dem Archiv beantwortet (Antworten wie HTTPAdapter)."""
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+        self.hits = 0
+        self.misses = 0
+
+    def send(self, request, **kwargs):
+        entry = self.archive.lookup(request.url) if request.method == 'GET' else None
+        if entry is None:
+            self.misses += 1
+            return self._build(request, 404, "Not Found", [(ARCHIVE_MISS_HEADER, "1")], b'')
+        self.hits += 1
+        headers = entry["headers"]
+        if self._not_modified(request, headers):
+            return self._build(request, 304, "Not Modified", headers, b'')
+        body = self.archive.read_body(entry)
+        if not entry["truncated"]:
+            headers = headers + [["Content-Length", str(len(body))]]
+        return self._build(request, entry["status"], entry["reason"], headers, body)
+
+    @staticmethod
+    def _not_modified(request, headers):
+        recorded = {name.lower(): value for name, value in headers}
+        etag = request.headers.get('If-None-Match')
+        if etag is not None:
+            return etag == recorded.get('etag')
+        modified_since = request.headers.get('If-Modified-Since')
+        return modified_since is not None and modified_since == recorded.get('last-modified')
+
+    def _build(self, request, status, reason, headers, body):
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=status,
+            reason=reason,
+            preload_content=False,
+            decode_content=False,
+            enforce_content_length=False,
+            request_url=request.url,
+        )
+        return self.build_response(request, raw)
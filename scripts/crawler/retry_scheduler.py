@@ -0,0 +1,157 @@
+"""
+Wiederholungsversuche und Circuit-Breaker für den Web-Crawler.
+
+Fehlgeschlagene URLs landen nicht sofort wieder in der Warteschlange, sondern in einer
+Verzögerungs-Queue, sortiert nach dem Zeitpunkt, ab dem sie wieder geladen werden dürfen
+(exponentielles Backoff mit Jitter oder der Wert aus `Retry-After`). Währenddessen läuft
+der Rest der Frontier normal weiter.
+
+Der HostCircuitBreaker sperrt einen Host nach mehreren aufeinanderfolgenden Fehlern für
+eine Abkühlzeit. URLs dieses Hosts werden in der Zeit geparkt. Danach wird genau eine
+Probe-Anfrage durchgelassen: Klappt sie, werden alle geparkten URLs freigegeben,
+schlägt sie fehl, bleibt der Host weiter gesperrt.
+"""
+import datetime
+import email.utils
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+
+
+def parse_retry_after(value, max_delay=3600):
+    """Wandelt einen Retry-After-Header (Sekunden oder HTTP-Datum) in Sekunden um."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), max_delay)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    delay = (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    return min(max(delay, 0.0), max_delay)
+
+
+class RetryScheduler:
+    """Verzögerungs-Queue für Wiederholungsversuche, sortiert nach Fälligkeit."""
+
+    def __init__(self, base_delay=2.0, max_delay=300.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._heap = []
+        self._counter = itertools.count()
+
+    def backoff_delay(self, attempt):
+        """Exponentielles Backoff mit Jitter: zufällig zwischen der Hälfte und dem vollen Wert."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def schedule(self, url, delay):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), url))
+
+    def pop_due(self, now=None):
+        """Entnimmt alle URLs, deren Wartezeit abgelaufen ist."""
+        now = time.monotonic() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def next_due_in(self, now=None):
+        """Sekunden bis zur nächsten fälligen URL oder None, wenn nichts wartet."""
+        if not self._heap:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._heap[0][0] - now)
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class HostCircuitBreaker:
+    """Sperrt Hosts nach wiederholten Fehlern und parkt deren URLs bis zur Erholung."""
+
+    def __init__(self, failure_threshold=5, cooldown=60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = {} # Host -> aufeinanderfolgende Fehler
+        self._open_until = {} # Host -> Zeitpunkt (monotonic), bis zu dem gesperrt ist
+        self._trial = {} # Host -> URL der laufenden Probe-Anfrage
+        self._parked = {} # Host -> deque geparkter URLs
+
+    def allow(self, host, url, now=None):
+        """Darf `url` jetzt geladen werden? Im halb-offenen Zustand nur die Probe-Anfrage."""
+        open_until = self._open_until.get(host)
+        if open_until is None:
+            return True
+        now = time.monotonic() if now is None else now
+        if now < open_until:
+            return False
+        trial = self._trial.get(host)
+        if trial is None:
+            self._trial[host] = url
+            return True
+        return trial == url
+
+    def park(self, host, url):
+        self._parked.setdefault(host, deque()).append(url)
+
+    def release_trials(self, now=None):
+        """Gibt für jeden abgekühlten Host ohne laufende Probe eine geparkte URL als Probe frei."""
+        now = time.monotonic() if now is None else now
+        trials = []
+        for host, open_until in self._open_until.items():
+            parked = self._parked.get(host)
+            if now >= open_until and host not in self._trial and parked:
+                url = parked.popleft()
+                self._trial[host] = url
+                trials.append(url)
+        return trials
+
+    def record_success(self, host):
+        """Host hat geantwortet: Sperre aufheben und geparkte URLs zurückgeben."""
+        self._failures.pop(host, None)
+        self._trial.pop(host, None)
+        if self._open_until.pop(host, None) is None:
+            return []
+        return list(self._parked.pop(host, ()))
+
+    def finish_trial(self, host, url):
+        """Die Probe-Anfrage `url` ist ohne Aussage über den Host beendet (z.B. zu viele Weiterleitungen).
+
+        Der Host bleibt gesperrt; die nächste geparkte URL darf als neue Probe laufen.
+        """
+        if self._trial.get(host) == url:
+            del self._trial[host]
+
+    def reset_trials(self):
+        """Vergisst alle laufenden Probe-Anfragen (Notausgang, falls eine Probe ohne Ergebnis verloren ging)."""
+        self._trial.clear()
+
+    def record_failure(self, host, now=None):
+        """Zählt einen Fehler; gibt True zurück, wenn der Host dadurch (erneut) gesperrt wird."""
+        self._failures[host] = self._failures.get(host, 0) + 1
+        self._trial.pop(host, None)
+        if self._failures[host] >= self.failure_threshold:
+            now = time.monotonic() if now is None else now
+            self._open_until[host] = now + self.cooldown
+            return True
+        return False
+
+    def is_open(self, host):
+        return host in self._open_until
+
+    def parked_count(self):
+        return sum(len(parked) for parked in self._parked.values())
+
+    def next_release_in(self, now=None):
+        """Sekunden, bis der nächste gesperrte Host mit geparkten URLs wieder proben darf."""
+        now = time.monotonic() if now is None else now
+        waits = [max(0.0, open_until - now) for host, open_until in self._open_until.items()
+                 if self._parked.get(host) and host not in self._trial]
+        return min(waits, default=None)
@@ -0,0 +1,64 @@
+"""
+robots.txt-Cache für den Web-Crawler: eine geladene robots.txt pro Host.
+
+Crawlen mehrere Seiten desselben Hosts im selben Prozess (z.B. /latest/ und /sdk/ auf
+docs.zephyrproject.org), wird die robots.txt nur einmal geladen und geteilt. Geladen wird
+über die gemeinsame requests.Session des Crawlers (gleiche Header, Connection-Pool).
+
+Die Auswertung des Statuscodes entspricht urllib.robotparser.RobotFileParser.read():
+401/403 sperren alles, andere 4xx erlauben alles. Ist die robots.txt nicht erreichbar
+(Netzwerkfehler, 5xx), gilt sie als leer, und die Quelle wird an `on_error` gemeldet.
+"""
+import urllib.robotparser
+from urllib.parse import urlsplit
+
+import requests
+
+
+def robots_url_for(url):
+    """URL der robots.txt für den Host einer URL (immer im Wurzelverzeichnis)."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/robots.txt"
+
+
+class RobotsCache:
+    """Lädt die robots.txt jedes Hosts beim ersten Zugriff und hält sie für alle Seiten bereit."""
+
+    def __init__(self, session, timeout, on_error=None):
+        self.session = session
+        self.timeout = timeout
+        self.on_error = on_error or (lambda url, e: None)
+        self._parsers = {} # robots.txt-URL -> RobotFileParser
+
+    def parser_for(self, url):
+        robots_url = robots_url_for(url)
+        parser = self._parsers.get(robots_url)
+        if parser is None:
+            parser = self._parsers[robots_url] = self._load(robots_url)
+        return parser
+
+    def can_fetch(self, user_agent, url):
+        return self.parser_for(url).can_fetch(user_agent, url)
+
+    def _load(self, robots_url):
+        parser = urllib.robotparser.RobotFileParser(robots_url)
+        try:
+            response = self.session.get(robots_url, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self.on_error(robots_url, e)
+            parser.allow_all = True
+        else:
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif 400 <= response.status_code < 500:
+                parser.allow_all = True
+            elif response.status_code >= 500:
+                self.on_error(robots_url, requests.exceptions.HTTPError(f"{response.status_code} Server Error", response=response))
+                parser.allow_all = True
+            else:
+                parser.parse(response.content.decode('utf-8', errors='replace').splitlines())
+        parser.modified() # sonst verweigert can_fetch() jede URL
+        return parser
+
+    def __len__(self):
+        return len(self._parsers)
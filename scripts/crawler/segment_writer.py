@@ -0,0 +1,134 @@
+"""
+Gepufferter JSONL-Writer für die Ausgabedateien des Crawlers.
+
+Statt für jeden Datensatz die Datei zu öffnen, eine Zeile zu schreiben und sie wieder zu
+schließen, sammelt der SegmentWriter Datensätze und schreibt sie gebündelt in eine offen
+gehaltene Datei (nach `batch_size` Datensätzen oder `flush_interval` Sekunden).
+`sync()` schreibt alles und ruft fsync auf; der Crawler macht das vor jedem
+Checkpoint-Commit. Optional wird gzip- oder zstd-komprimiert und in rollierende Dateien
+zu je `shard_size_mb` MB aufgeteilt; jeder geschriebene Batch ist dabei ein eigenes,
+vollständiges gzip-Member bzw. zstd-Frame.
+"""
+import glob
+import gzip
+import io
+import json
+import os
+import re
+import time
+
+try:
+    import zstandard
+except ImportError: # optionale Abhängigkeit, nur für compression="zstd" nötig
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _check_compression(compression):
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unbekannte Kompression '{compression}' (erlaubt: None, 'gzip', 'zstd').")
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("Für compression='zstd' wird das Paket 'zstandard' benötigt (pip install zstandard).")
+
+
+def segment_files(path, compression=None, sharded=False):
+    """Liefert alle vorhandenen Ausgabedateien zu einem Basispfad in Schreibreihenfolge."""
+    suffix = COMPRESSION_SUFFIXES[compression]
+    if not sharded:
+        return [path + suffix] if os.path.exists(path + suffix) else []
+    stem, ext = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(stem)}-[0-9][0-9][0-9][0-9][0-9]{ext}{suffix}"))
+
+
+def open_text_lines(file_path):
+    """Öffnet eine (ggf. komprimierte) JSONL-Datei zum zeilenweisen Lesen."""
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, 'rt', encoding='utf-8')
+    if file_path.endswith('.zst'):
+        _check_compression('zstd')
+        raw = open(file_path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(file_path, 'r', encoding='utf-8')
+
+
+class SegmentWriter:
+    """Schreibt JSONL-Datensätze gebündelt, optional komprimiert und in Shards aufgeteilt."""
+
+    def __init__(self, path, batch_size=200, flush_interval=5.0, compression=None, shard_size_mb=None):
+        _check_compression(compression)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compression = compression
+        self.shard_size = int(shard_size_mb * 1024 * 1024) if shard_size_mb else None
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._file = None # offen gehaltene Ausgabedatei
+        self._shard_index = self._last_shard_index()
+        self.records_written = 0
+
+    # --- Dateiverwaltung ---
+    def existing_files(self):
+        return segment_files(self.path, self.compression, sharded=self.shard_size is not None)
+
+    def _last_shard_index(self):
+        if self.shard_size is None:
+            return 0
+        indices = [int(re.search(r'-(\d{5})\.', os.path.basename(f)).group(1)) for f in self.existing_files()]
+        return max(indices, default=1)
+
+    def current_file(self):
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        if self.shard_size is None:
+            return self.path + suffix
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}-{self._shard_index:05d}{ext}{suffix}"
+
+    def _compress(self, data):
+        # Jeder Batch wird ein vollständiges gzip-Member bzw. ein zstd-Frame. Mehrere davon
+        # hintereinander ergeben eine gültige Datei, auch wenn später angehängt wird.
+        if self.compression == 'gzip':
+            return gzip.compress(data)
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor().compress(data)
+        return data
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- Schreiben ---
+    def write(self, record):
+        self._buffer.append(json.dumps(record, ensure_ascii=False) + '\n')
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Schreibt den Puffer in die Datei (ohne fsync)."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._file = open(self.current_file(), 'ab')
+        self._file.write(self._compress(''.join(self._buffer).encode('utf-8')))
+        self.records_written += len(self._buffer)
+        self._buffer.clear()
+
+        if self.shard_size is not None and self._file.tell() >= self.shard_size:
+            self._close_file()
+            self._shard_index += 1
+
+    def sync(self):
+        """Schreibt alles bis auf die Platte (fsync), z.B. vor einem Checkpoint-Commit."""
+        self.flush()
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        self._close_file()
@@ -0,0 +1,445 @@
+"""
+Gemeinsame Frontier für den verteilten Crawl.
+
+Mehrere Worker-Prozesse (auf einem oder mehreren Rechnern) teilen sich die Warteschlange,
+die Menge aller bekannten URLs und die gesammelten GitHub-Links. Jeder Worker lädt und
+parst wie gewohnt mit seiner eigenen FetchEngine und schreibt seine eigenen Ausgabedateien;
+zusammengeführt wird am Ende mit `web_crawler.py --merge`.
+
+- Partitionierung: jede URL fällt per Hash in eine von `partitions` Partitionen, wahlweise
+  nach Host (alle URLs eines Hosts beim selben Worker, Höflichkeitsregeln bleiben lokal)
+  oder nach Pfad (für eine einzelne Seite auf einem Host). Die Partitionen werden reihum
+  auf die lebenden Worker verteilt; fällt ein Worker weg, übernehmen die anderen.
+- Leases: eine entnommene URL gehört `lease_seconds` lang dem Worker, der sie entnommen
+  hat. Der Worker verlängert seine Leases regelmäßig (`heartbeat()` + `renew()`). Stürzt
+  er ab, laufen sie aus und die URLs werden erneut vergeben.
+
+Backends: SQLite (eine Datei, für mehrere Prozesse auf einem Rechner) und Redis bzw. ein
+Redis-kompatibler Server (mehrere Rechner; benötigt das Paket redis). Die Uhren der
+Rechner sollten synchron laufen, da Leases und Heartbeats mit time.time() arbeiten.
+"""
+import hashlib
+import os
+import socket
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+from frontier import normalize_url
+
+try:
+    import redis
+except ImportError: # optionale Abhängigkeit, nur für das Redis-Backend nötig
+    redis = None
+
+PARTITION_BY = ("host", "path")
+
+# Zustände einer URL im SQLite-Backend
+_PENDING, _LEASED, _DONE = 0, 1, 2
+
+
+def partition_for(url, partitions, by="path"):
+    """Partition einer URL: Hash über den Host oder über die normalisierte URL."""
+    key = urlsplit(url).netloc.lower() if by == "host" else normalize_url(url)
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big') % partitions
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SharedFrontier:
+    """Gemeinsame Logik beider Backends: Partitionen, Heartbeats und die Zuordnung zu Workern.
+
+    Die Backends implementieren `add`, `_claim`, `renew`, `complete`, `release`,
+    `release_worker`, `add_github_link`, `acquire_once`, `stats`, `is_finished`,
+    `_heartbeat`, `_live_workers` und `close`.
+    """
+
+    def __init__(self, worker_id, partitions=64, partition_by="path", lease_seconds=120.0):
+        if partition_by not in PARTITION_BY:
+            raise ValueError(f"Unbekannte Partitionierung '{partition_by}' (erlaubt: {', '.join(PARTITION_BY)}).")
+        self.worker_id = worker_id
+        self.partitions = partitions
+        self.partition_by = partition_by
+        self.lease_seconds = lease_seconds
+
+    def partition_for(self, url):
+        return partition_for(url, self.partitions, self.partition_by)
+
+    def heartbeat(self):
+        """Meldet den Worker als lebendig; nötig, damit er Partitionen zugeteilt bekommt."""
+        self._heartbeat(time.time())
+
+    def owned_partitions(self):
+        """Partitionen dieses Workers: reihum verteilt auf alle Worker mit aktuellem Heartbeat."""
+        workers = sorted(self._live_workers(time.time() - self.lease_seconds))
+        if self.worker_id not in workers:
+            workers = sorted(workers + [self.worker_id])
+        index = workers.index(self.worker_id)
+        return [p for p in range(self.partitions) if p % len(workers) == index]
+
+    def claim(self, limit):
+        """Entnimmt bis zu `limit` URLs aus den eigenen Partitionen und least sie.
+
+        Zuerst werden abgelaufene Leases übernommen (URLs abgestürzter Worker), dann
+        offene URLs in der Reihenfolge ihrer Priorität. Gibt (url, priority)-Paare zurück.
+        """
+        self.heartbeat()
+        now = time.time()
+        return self._claim(self.owned_partitions(), limit, now, now + self.lease_seconds)
+
+
+class SqliteSharedFrontier(SharedFrontier):
+    """Gemeinsame Frontier in einer SQLite-Datei.
+
+    Jede Entnahme läuft in einer Schreibtransaktion (BEGIN IMMEDIATE), sodass zwei Worker
+    nie dieselbe URL bekommen. Geeignet für mehrere Prozesse auf einem Rechner; auf
+    Netzlaufwerken sind SQLite-Sperren nicht zuverlässig.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS urls (
+        url_key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        partition INTEGER NOT NULL,
+        priority INTEGER NOT NULL,
+        state INTEGER NOT NULL,
+        worker TEXT,
+        lease_expires REAL,
+        unreachable INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS urls_state ON urls (state, partition, priority);
+    CREATE TABLE IF NOT EXISTS github_links (
+        url TEXT PRIMARY KEY
+    );
+    CREATE TABLE IF NOT EXISTS workers (
+        worker TEXT PRIMARY KEY,
+        last_seen REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS flags (
+        name TEXT PRIMARY KEY,
+        worker TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path, worker_id, **options):
+        super().__init__(worker_id, **options)
+        self.path = path
+        # Autocommit; Schreibtransaktionen werden explizit begonnen
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self._SCHEMA)
+
+    def describe(self):
+        return f"SQLite {self.path}"
+
+    def _transaction(self, statements):
+        """Führt (sql, parameter)-Paare in einer Schreibtransaktion aus."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                self.conn.execute(sql, params)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def add(self, entries):
+        """Reiht (url, priority)-Paare ein, deren normalisierte URL noch unbekannt ist; gibt die Anzahl neuer zurück."""
+        if not entries:
+            return 0
+        before = self.conn.total_changes
+        self._transaction(
+            ("INSERT OR IGNORE INTO urls (url_key, url, partition, priority, state) VALUES (?, ?, ?, ?, ?)",
+             (normalize_url(url), url, self.partition_for(url), priority, _PENDING))
+            for url, priority in entries
+        )
+        return self.conn.total_changes - before
+
+    def _claim(self, partitions, limit, now, expires):
+        placeholders = ','.join('?' * len(partitions))
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                f"SELECT url_key, url, priority FROM urls WHERE state = ? AND lease_expires < ? "
+                f"AND partition IN ({placeholders}) LIMIT ?",
+                (_LEASED, now, *partitions, limit),
+            ).fetchall()
+            if len(rows) < limit:
+                rows += self.conn.execute(
+                    f"SELECT url_key, url, priority FROM urls WHERE state = ? AND partition IN ({placeholders}) "
+                    f"ORDER BY priority, rowid LIMIT ?",
+                    (_PENDING, *partitions, limit - len(rows)),
+                ).fetchall()
+            self.conn.executemany(
+                "UPDATE urls SET state = ?, worker = ?, lease_expires = ? WHERE url_key = ?",
+                [(_LEASED, self.worker_id, expires, url_key) for url_key, _, _ in rows],
+            )
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return [(url, priority) for _, url, priority in rows]
+
+    def renew(self, urls):
+        """Verlängert die Leases dieses Workers für die angegebenen URLs."""
+        expires = time.time() + self.lease_seconds
+        self._transaction(
+            ("UPDATE urls SET lease_expires = ? WHERE url_key = ? AND state = ? AND worker = ?",
+             (expires, normalize_url(url), _LEASED, self.worker_id))
+            for url in urls
+        )
+
+    def complete(self, url, unreachable=False):
+        """Markiert eine URL als fertig (egal, welcher Worker sie zuletzt geleast hatte)."""
+        self.conn.execute(
+            "UPDATE urls SET state = ?, worker = NULL, lease_expires = NULL, unreachable = ? WHERE url_key = ?",
+            (_DONE, int(unreachable), normalize_url(url)),
+        )
+
+    def release(self, urls):
+        """Gibt noch nicht fertige URLs dieses Workers sofort wieder frei (z.B. beim Beenden)."""
+        self._transaction(
+            ("UPDATE urls SET state = ?, worker = NULL, lease_expires = NULL WHERE url_key = ? AND state = ? AND worker = ?",
+             (_PENDING, normalize_url(url), _LEASED, self.worker_id))
+            for url in urls
+        )
+
+    def release_worker(self):
+        """Gibt alle Leases frei, die noch auf diesen Worker laufen (Neustart mit derselben Worker-ID)."""
+        self.conn.execute(
+            "UPDATE urls SET state = ?, worker = NULL, lease_expires = NULL WHERE state = ? AND worker = ?",
+            (_PENDING, _LEASED, self.worker_id),
+        )
+
+    def add_github_link(self, url):
+        """True, wenn kein Worker diesen GitHub-Link bisher gesammelt hat."""
+        return self.conn.execute("INSERT OR IGNORE INTO github_links (url) VALUES (?)", (url,)).rowcount == 1
+
+    def acquire_once(self, name):
+        """True für genau einen Worker (z.B. für das URL-Seeding, das nur einmal laufen soll)."""
+        return self.conn.execute(
+            "INSERT OR IGNORE INTO flags (name, worker) VALUES (?, ?)", (name, self.worker_id)
+        ).rowcount == 1
+
+    def stats(self):
+        counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall())
+        return {"pending": counts.get(_PENDING, 0), "leased": counts.get(_LEASED, 0), "done": counts.get(_DONE, 0)}
+
+    def is_finished(self):
+        """True, wenn keine URL mehr offen oder geleast ist."""
+        return not self.conn.execute("SELECT EXISTS(SELECT 1 FROM urls WHERE state < ?)", (_DONE,)).fetchone()[0]
+
+    def _heartbeat(self, now):
+        self.conn.execute(
+            "INSERT INTO workers (worker, last_seen) VALUES (?, ?) "
+            "ON CONFLICT(worker) DO UPDATE SET last_seen = excluded.last_seen",
+            (self.worker_id, now),
+        )
+
+    def _live_workers(self, since):
+        return [row[0] for row in self.conn.execute("SELECT worker FROM workers WHERE last_seen >= ?", (since,))]
+
+    def close(self):
+        self.conn.close()
+
+
+class RedisSharedFrontier(SharedFrontier):
+    """Gemeinsame Frontier auf einem Redis-kompatiblen Server (Redis, Valkey, KeyDB, fakeredis).
+
+    Verwendet nur einfache Datentypen und WATCH/MULTI-Transaktionen, keine Lua-Skripte.
+    Schlüssel (unter `<prefix>:`): seen (Set der normalisierten URLs), pending:<p> (Sorted
+    Set je Partition, Score = Priorität und Reihenfolge), leases (Sorted Set, Score =
+    Ablaufzeit), owners/priorities (Hashes je URL), done/unreachable, github_links,
+    workers (Sorted Set, Score = letzter Heartbeat), flag:<name>.
+    """
+
+    _SEQUENCE_FACTOR = 1e12 # Score = Priorität * Faktor + laufende Nummer (FIFO innerhalb einer Priorität)
+
+    def __init__(self, client, prefix, worker_id, **options):
+        super().__init__(worker_id, **options)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, prefix, worker_id, **options):
+        if redis is None:
+            raise ImportError("Für das Redis-Backend wird das Paket 'redis' benötigt (pip install redis).")
+        return cls(redis.Redis.from_url(url, decode_responses=True), prefix, worker_id, **options)
+
+    def describe(self):
+        return f"Redis {self.prefix}"
+
+    def _key(self, name):
+        return f"{self.prefix}:{name}"
+
+    def _pending_key(self, partition):
+        return self._key(f"pending:{partition}")
+
+    def add(self, entries):
+        if not entries:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        for url, _ in entries:
+            pipe.sadd(self._key("seen"), normalize_url(url))
+        new_entries = [entry for entry, added in zip(entries, pipe.execute()) if added]
+        if not new_entries:
+            return 0
+        last = self.client.incrby(self._key("sequence"), len(new_entries))
+        pipe = self.client.pipeline(transaction=True)
+        for offset, (url, priority) in enumerate(new_entries):
+            score = priority * self._SEQUENCE_FACTOR + last - len(new_entries) + offset
+            pipe.zadd(self._pending_key(self.partition_for(url)), {url: score})
+            pipe.hset(self._key("priorities"), url, priority)
+        pipe.execute()
+        return len(new_entries)
+
+    def _lease(self, pipe, urls, expires):
+        pipe.zadd(self._key("leases"), {url: expires for url in urls})
+        pipe.hset(self._key("owners"), mapping={url: self.worker_id for url in urls})
+
+    def _claim_expired(self, partitions, limit, now, expires):
+        candidates = self.client.zrangebyscore(self._key("leases"), '-inf', f"({now}")
+        own = set(partitions)
+        candidates = [url for url in candidates if self.partition_for(url) in own][:limit]
+        if not candidates:
+            return []
+        with self.client.pipeline(transaction=True) as pipe:
+            try:
+                # Zwei Worker können dieselbe abgelaufene Lease sehen; nur einer setzt sich durch
+                pipe.watch(self._key("leases"))
+                scores = [pipe.zscore(self._key("leases"), url) for url in candidates]
+                candidates = [url for url, score in zip(candidates, scores) if score is not None and score < now]
+                pipe.multi()
+                if candidates:
+                    self._lease(pipe, candidates, expires)
+                pipe.execute()
+            except redis.WatchError:
+                return []
+        return candidates
+
+    def _claim_pending(self, partition, limit, expires):
+        key = self._pending_key(partition)
+        with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    urls = pipe.zrange(key, 0, limit - 1)
+                    if not urls:
+                        pipe.unwatch()
+                        return []
+                    priorities = pipe.hmget(self._key("priorities"), urls)
+                    pipe.multi()
+                    pipe.zrem(key, *urls)
+                    self._lease(pipe, urls, expires)
+                    pipe.execute()
+                    return [(url, int(priority)) for url, priority in zip(urls, priorities)]
+                except redis.WatchError:
+                    continue # Partition wurde währenddessen geändert (z.B. neue URLs): erneut versuchen
+
+    def _claim(self, partitions, limit, now, expires):
+        claimed = []
+        expired = self._claim_expired(partitions, limit, now, expires)
+        if expired:
+            priorities = self.client.hmget(self._key("priorities"), expired)
+            claimed = [(url, int(priority)) for url, priority in zip(expired, priorities)]
+        # Bevorzugt Partitionen mit den wichtigsten URLs (kleinster Score)
+        pipe = self.client.pipeline(transaction=False)
+        for partition in partitions:
+            pipe.zrange(self._pending_key(partition), 0, 0, withscores=True)
+        heads = [(head[0][1], partition) for head, partition in zip(pipe.execute(), partitions) if head]
+        for _, partition in sorted(heads):
+            if len(claimed) >= limit:
+                break
+            claimed += self._claim_pending(partition, limit - len(claimed), expires)
+        return claimed
+
+    def renew(self, urls):
+        urls = list(urls)
+        if not urls:
+            return
+        owners = self.client.hmget(self._key("owners"), urls)
+        own = [url for url, owner in zip(urls, owners) if owner == self.worker_id]
+        if own:
+            expires = time.time() + self.lease_seconds
+            self.client.zadd(self._key("leases"), {url: expires for url in own}, xx=True)
+
+    def complete(self, url, unreachable=False):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zrem(self._key("leases"), url)
+        pipe.hdel(self._key("owners"), url)
+        pipe.sadd(self._key("done"), url)
+        if unreachable:
+            pipe.sadd(self._key("unreachable"), url)
+        pipe.execute()
+
+    def _requeue(self, urls):
+        priorities = self.client.hmget(self._key("priorities"), urls)
+        last = self.client.incrby(self._key("sequence"), len(urls))
+        pipe = self.client.pipeline(transaction=True)
+        for offset, (url, priority) in enumerate(zip(urls, priorities)):
+            pipe.zrem(self._key("leases"), url)
+            pipe.hdel(self._key("owners"), url)
+            score = int(priority) * self._SEQUENCE_FACTOR + last - len(urls) + offset
+            pipe.zadd(self._pending_key(self.partition_for(url)), {url: score})
+        pipe.execute()
+
+    def release(self, urls):
+        urls = list(urls)
+        if not urls:
+            return
+        owners = self.client.hmget(self._key("owners"), urls)
+        own = [url for url, owner in zip(urls, owners) if owner == self.worker_id]
+        if own:
+            self._requeue(own)
+
+    def release_worker(self):
+        own = [url for url, owner in self.client.hscan_iter(self._key("owners")) if owner == self.worker_id]
+        if own:
+            self._requeue(own)
+
+    def add_github_link(self, url):
+        return self.client.sadd(self._key("github_links"), url) == 1
+
+    def acquire_once(self, name):
+        return bool(self.client.set(self._key(f"flag:{name}"), self.worker_id, nx=True))
+
+    def stats(self):
+        pipe = self.client.pipeline(transaction=False)
+        for partition in range(self.partitions):
+            pipe.zcard(self._pending_key(partition))
+        pipe.zcard(self._key("leases"))
+        pipe.scard(self._key("done"))
+        *pending, leased, done = pipe.execute()
+        return {"pending": sum(pending), "leased": leased, "done": done}
+
+    def is_finished(self):
+        stats = self.stats()
+        return not stats["pending"] and not stats["leased"]
+
+    def _heartbeat(self, now):
+        self.client.zadd(self._key("workers"), {self.worker_id: now})
+
+    def _live_workers(self, since):
+        return self.client.zrangebyscore(self._key("workers"), since, '+inf')
+
+    def close(self):
+        self.client.close()
+
+
+def open_shared_frontier(spec, namespace, worker_id, default_dir, **options):
+    """Öffnet das Backend zu einer Angabe wie in SHARED_FRONTIER (web_crawler.py).
+
+    "sqlite" legt die Datei in `default_dir` an, "sqlite:<ordner>" im angegebenen Ordner,
+    "redis://host:port/db" (bzw. rediss://) verbindet mit einem Redis-kompatiblen Server.
+    `namespace` (der Projektname) trennt die Frontiers mehrerer Seiten.
+    """
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedFrontier.from_url(spec, f"crawler:{namespace}", worker_id, **options)
+    if spec == "sqlite" or spec.startswith("sqlite:"):
+        directory = spec[len("sqlite:"):] or default_dir
+        os.makedirs(directory, exist_ok=True)
+        return SqliteSharedFrontier(os.path.join(directory, f"{namespace}_shared_frontier.sqlite"), worker_id, **options)
+    raise ValueError(f"Unbekanntes Backend für die gemeinsame Frontier: '{spec}' (erlaubt: sqlite, sqlite:<ordner>, redis://...).")
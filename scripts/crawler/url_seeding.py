@@ -0,0 +1,216 @@
+"""
+URL-Seeding für den Web-Crawler: Sitemaps, Sphinx-Inventare und Doxygen-Indexseiten.
+
+Ohne Seeding findet der Crawler neue Seiten nur über die Links bereits geladener Seiten,
+die Frontier wächst also erst nach und nach. Sphinx-Seiten veröffentlichen aber eine
+`sitemap.xml` und ein `objects.inv` (Inventar aller dokumentierten Objekte mit ihrer
+Seite), Doxygen hat Indexseiten (Dateien, Klassen, Gruppen). Daraus wird die Frontier
+schon vor dem Crawl befüllt.
+
+Alle Quellen werden gestreamt verarbeitet: die Antwort wird in Blöcken gelesen und
+sofort geparst (XMLPullParser, zlib-Dekompressionsobjekt, inkrementeller HTMLParser),
+jede gefundene URL wird direkt geliefert. Welche URLs eingereiht werden (base_url,
+robots.txt, Dateiendungen), entscheidet der Crawler.
+"""
+import codecs
+import re
+import xml.etree.ElementTree as ET
+import zlib
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin, urlparse
+
+CHUNK_SIZE = 64 * 1024
+
+# Quellen, nach denen die Seeding-Statistik aufgeschlüsselt wird
+SOURCE_SITEMAP = "sitemap"
+SOURCE_SPHINX_INVENTORY = "objects.inv"
+SOURCE_DOXYGEN_INDEX = "doxygen"
+
+# Zeile im Inventar: "name domain:role priority uri dispname" (wie sphinx.util.inventory)
+_INVENTORY_LINE_RE = re.compile(r'(.+?)\s+(\S+)\s+(-?\d+)\s+?(\S*)\s+(.*)')
+_INVENTORY_HEADER_LINES = 4
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def fetch_chunks(session, url, timeout, headers=None):
+    """Lädt eine URL blockweise; HTTP-Fehler werden als requests-Exception weitergereicht."""
+    with session.get(url, timeout=timeout, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        yield from response.iter_content(CHUNK_SIZE)
+
+
+def _gunzip_chunks(chunks):
+    """Entpackt gzip-Daten (z.B. sitemap.xml.gz ohne Content-Encoding), sonst unverändert."""
+    chunks = iter(chunks)
+    decompressor = None
+    for chunk in chunks:
+        if decompressor is None:
+            if not chunk.startswith(_GZIP_MAGIC):
+                yield chunk
+                yield from chunks
+                return
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        yield decompressor.decompress(chunk)
+    if decompressor is not None:
+        yield decompressor.flush()
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_sitemap(chunks):
+    """Liefert (kind, loc) aus einer Sitemap; kind ist "url" oder bei einem Sitemap-Index "sitemap"."""
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    for chunk in _gunzip_chunks(chunks):
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = element
+                continue
+            kind = _local_name(element.tag)
+            if kind not in ('url', 'sitemap'):
+                continue
+            loc = next((child.text for child in element if _local_name(child.tag) == 'loc'), None)
+            if loc and loc.strip():
+                yield kind, loc.strip()
+            root.clear() # verarbeitete Einträge nicht im Speicher halten
+    parser.close()
+
+
+def iter_sphinx_inventory(chunks):
+    """Liefert (name, domain_role, uri) aus einem Sphinx-Inventar (objects.inv, Version 2)."""
+    chunks = iter(chunks)
+    buffer = b''
+    while buffer.count(b'\n') < _INVENTORY_HEADER_LINES:
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ValueError("Unvollständiger Kopf im Sphinx-Inventar.")
+        buffer += chunk
+    header_lines = buffer.split(b'\n', _INVENTORY_HEADER_LINES)
+    if header_lines[0].rstrip() != b'# Sphinx inventory version 2':
+        raise ValueError(f"Nicht unterstütztes Inventar-Format: {header_lines[0][:60]!r}")
+    if b'zlib' not in header_lines[3]:
+        raise ValueError("Sphinx-Inventar ist nicht zlib-komprimiert.")
+
+    decompressor = zlib.decompressobj()
+    pending = b''
+
+    def parse_lines(data):
+        lines = (pending + data).split(b'\n')
+        for line in lines[:-1]:
+            match = _INVENTORY_LINE_RE.match(line.decode('utf-8', errors='replace').rstrip())
+            if match:
+                yield match.group(1), match.group(2), match.group(4)
+        return lines[-1]
+
+    for data in (header_lines[_INVENTORY_HEADER_LINES], *chunks):
+        pending = yield from parse_lines(decompressor.decompress(data))
+    pending = yield from parse_lines(decompressor.flush() + b'\n')
+
+
+def inventory_page_url(inventory_url, name, uri):
+    """Seite eines Inventar-Eintrags: "$" steht für den Objektnamen, der Anker fällt weg."""
+    if uri.endswith('$'):
+        uri = uri[:-1] + name
+    return urldefrag(urljoin(inventory_url, uri))[0]
+
+
+class _LinkCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href is not None:
+                self.hrefs.append(href)
+
+
+def iter_html_links(chunks):
+    """Liefert die href-Werte aller <a>-Links einer HTML-Seite, während sie geladen wird."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    collector = _LinkCollector()
+    for chunk in chunks:
+        collector.feed(decoder.decode(chunk))
+        yield from collector.hrefs
+        collector.hrefs.clear()
+    collector.feed(decoder.decode(b'', final=True))
+    collector.close()
+    yield from collector.hrefs
+
+
+class UrlSeeder:
+    """Sammelt Seiten-URLs aus Sitemaps, Sphinx-Inventaren und Doxygen-Indexseiten.
+
+    `iter_seeds()` liefert (source, url, referrer)-Tupel; referrer ist die Inventar- oder
+    Indexseite, relativ zu der die URL aufgelöst wurde. Fehler einer Quelle werden an
+    `on_error(url, exception)` gemeldet, die übrigen Quellen laufen weiter.
+
+    Jede Anfrage sendet `headers`; vor jeder Anfrage wird `before_request(url)` aufgerufen
+    (im Crawler: Mindestabstand pro Host der FetchEngine).
+    """
+
+    def __init__(self, session, timeout, on_error=None, max_sitemap_depth=3, headers=None, before_request=None):
+        self.session = session
+        self.timeout = timeout
+        self.on_error = on_error or (lambda url, e: None)
+        self.max_sitemap_depth = max_sitemap_depth
+        self.headers = headers
+        self.before_request = before_request or (lambda url: None)
+
+    def _chunks(self, url):
+        self.before_request(url)
+        return fetch_chunks(self.session, url, self.timeout, self.headers)
+
+    def _guarded(self, url, generator):
+        """Reicht die Einträge einer Quelle durch und fängt ihre Fehler ab."""
+        try:
+            yield from generator
+        except Exception as e:
+            self.on_error(url, e)
+
+    def sitemap_urls(self, sitemap_url):
+        """Seiten aus einer Sitemap; verschachtelte Sitemap-Indizes auf demselben Host werden verfolgt."""
+        host = urlparse(sitemap_url).netloc
+        pending = [(sitemap_url, 0)]
+        seen = {sitemap_url}
+        while pending:
+            url, depth = pending.pop()
+            for kind, loc in self._guarded(url, iter_sitemap(self._chunks(url))):
+                loc = urljoin(url, loc)
+                if kind == 'url':
+                    yield SOURCE_SITEMAP, loc, url
+                elif depth < self.max_sitemap_depth and urlparse(loc).netloc == host and loc not in seen:
+                    seen.add(loc)
+                    pending.append((loc, depth + 1))
+
+    def inventory_urls(self, inventory_url):
+        """Seiten aus einem Sphinx-Inventar (jede Seite nur einmal, auch bei vielen Objekten)."""
+        pages = set()
+        for name, _, uri in self._guarded(inventory_url, iter_sphinx_inventory(self._chunks(inventory_url))):
+            page_url = inventory_page_url(inventory_url, name, uri)
+            if page_url not in pages:
+                pages.add(page_url)
+                yield SOURCE_SPHINX_INVENTORY, page_url, inventory_url
+
+    def index_page_urls(self, index_url):
+        """Links einer Doxygen-Indexseite (files.html, annotated.html, ...), inklusive der Seite selbst."""
+        yielded_index = False
+        for href in self._guarded(index_url, iter_html_links(self._chunks(index_url))):
+            if not yielded_index:
+                # Erst nach der ersten Antwort, damit nicht vorhandene Indexseiten nicht eingereiht werden
+                yield SOURCE_DOXYGEN_INDEX, index_url, index_url
+                yielded_index = True
+            yield SOURCE_DOXYGEN_INDEX, urljoin(index_url, href), index_url
+
+    def iter_seeds(self, sitemaps=(), inventories=(), doxygen_index_pages=()):
+        for url in sitemaps:
+            yield from self.sitemap_urls(url)
+        for url in inventories:
+            yield from self.inventory_urls(url)
+        for url in doxygen_index_pages:
+            yield from self.index_page_urls(url)
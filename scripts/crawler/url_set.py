@@ -0,0 +1,177 @@
+"""
+Kompakte URL-Mengen für sehr große Crawls.
+
+Statt die vollständigen URL-Strings in einem Python-set zu halten (gut 100 Bytes pro URL),
+speichert CompactUrlSet nur einen 64-Bit-Hash jeder URL: die Masse liegt sortiert in einem
+array('Q') (8 Bytes pro URL, Suche per bisect), neue URLs kommen zunächst in einen kleinen
+Puffer (set), der regelmäßig in das Array eingemischt wird. Bei 10 Mio. URLs liegt die
+Wahrscheinlichkeit einer Hash-Kollision (eine neue URL gilt fälschlich als bekannt) bei
+etwa 3 * 10^-6.
+
+Die Mengen lassen sich als Sidecar-Index neben dem Checkpoint speichern (save_url_index)
+und beim nächsten Start direkt laden (load_url_index), ohne jede URL aus der SQLite-Datei
+oder den JSONL-Dateien erneut zu lesen und zu hashen.
+"""
+import array
+import bisect
+import hashlib
+import heapq
+import json
+import os
+import struct
+import sys
+
+_INDEX_MAGIC = b'KIURLIX1'
+_HEADER_SIZE = struct.Struct('<I')
+
+
+def url_hash(url):
+    """Stabiler 64-Bit-Hash einer URL (gleich in allen Prozessen, anders als hash())."""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class CompactUrlSet:
+    """Menge von URLs als sortierte 64-Bit-Hashes; unterstützt add, update, in, len und clear.
+
+    Die URLs selbst werden nicht gespeichert, die Menge ist deshalb nicht iterierbar.
+    Der Puffer wird eingemischt, sobald er 1/`merge_fraction` der Array-Größe (mindestens
+    `min_merge` Einträge) erreicht; so bleibt der Zusatzspeicher klein und das Einmischen
+    amortisiert linear.
+    """
+
+    bulk_run_size = 1 << 18
+
+    def __init__(self, merge_fraction=16, min_merge=65536):
+        self.merge_fraction = merge_fraction
+        self.min_merge = min_merge
+        self._sorted = array.array('Q')
+        self._recent = set()
+
+    @classmethod
+    def from_hashes(cls, hashes, **options):
+        """Menge aus einem bereits sortierten, duplikatfreien array('Q') (z.B. aus dem Sidecar-Index)."""
+        url_set = cls(**options)
+        url_set._sorted = hashes
+        return url_set
+
+    def _contains_hash(self, value):
+        if value in self._recent:
+            return True
+        index = bisect.bisect_left(self._sorted, value)
+        return index < len(self._sorted) and self._sorted[index] == value
+
+    def add(self, url):
+        value = url_hash(url)
+        if self._contains_hash(value):
+            return
+        self._recent.add(value)
+        if len(self._recent) >= max(self.min_merge, len(self._sorted) // self.merge_fraction):
+            self._merge()
+
+    def update(self, urls):
+        """Fügt viele URLs hinzu; in eine leere Menge (Aufbau aus dem Checkpoint) in einem Durchgang.
+
+        Die Hashes werden dann in sortierten Läufen von höchstens `bulk_run_size` Einträgen
+        gesammelt und am Ende zusammengemischt, statt das Array immer wieder neu aufzubauen.
+        """
+        if self:
+            for url in urls:
+                self.add(url)
+            return
+        runs = []
+        run = array.array('Q')
+        for url in urls:
+            run.append(url_hash(url))
+            if len(run) >= self.bulk_run_size:
+                runs.append(array.array('Q', sorted(run)))
+                run = array.array('Q')
+        runs.append(array.array('Q', sorted(run)))
+        merged = array.array('Q')
+        last = None
+        for value in heapq.merge(*runs):
+            if value != last:
+                merged.append(value)
+                last = value
+        self._sorted = merged
+
+    def _merge(self):
+        # Die Lücken zwischen den neuen Hashes werden als Ganzes kopiert: nur die neuen Werte
+        # werden einzeln angefasst, das Array wird nie in eine Liste von Python-ints umgewandelt
+        merged = array.array('Q')
+        current = self._sorted
+        start = 0
+        for value in sorted(self._recent):
+            index = bisect.bisect_left(current, value, start)
+            merged += current[start:index]
+            if index == len(current) or current[index] != value:
+                merged.append(value)
+            start = index
+        merged += current[start:]
+        self._sorted = merged
+        self._recent.clear()
+
+    def hashes(self):
+        """Alle Hashes als sortiertes array('Q') (mischt den Puffer ein)."""
+        if self._recent:
+            self._merge()
+        return self._sorted
+
+    def memory_bytes(self):
+        """Ungefährer Speicherbedarf in Bytes (Array und Puffer)."""
+        return sys.getsizeof(self._sorted) + sys.getsizeof(self._recent) + 32 * len(self._recent)
+
+    def clear(self):
+        self._sorted = array.array('Q')
+        self._recent.clear()
+
+    def __contains__(self, url):
+        return self._contains_hash(url_hash(url))
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def __bool__(self):
+        return bool(self._sorted or self._recent)
+
+
+def save_url_index(path, url_sets, meta):
+    """Schreibt mehrere CompactUrlSets und ein JSON-Dict `meta` atomar in eine Datei.
+
+    Format: Magic, Länge und Inhalt eines JSON-Kopfs (meta, Anzahl je Menge), danach die
+    Hashes jeder Menge als Little-Endian-uint64.
+    """
+    sections = {name: url_set.hashes() for name, url_set in url_sets.items()}
+    header = json.dumps({"meta": meta, "sections": {name: len(hashes) for name, hashes in sections.items()}}).encode('utf-8')
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_INDEX_MAGIC)
+        f.write(_HEADER_SIZE.pack(len(header)))
+        f.write(header)
+        for hashes in sections.values():
+            if sys.byteorder != 'little':
+                hashes = array.array('Q', hashes)
+                hashes.byteswap()
+            hashes.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_url_index(path):
+    """Liest einen Sidecar-Index; gibt (meta, {Name: CompactUrlSet}) zurück oder None, wenn er fehlt oder defekt ist."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(_INDEX_MAGIC)) != _INDEX_MAGIC:
+                return None
+            (header_size,) = _HEADER_SIZE.unpack(f.read(_HEADER_SIZE.size))
+            header = json.loads(f.read(header_size))
+            url_sets = {}
+            for name, count in header["sections"].items():
+                hashes = array.array('Q')
+                hashes.fromfile(f, count)
+                if sys.byteorder != 'little':
+                    hashes.byteswap()
+                url_sets[name] = CompactUrlSet.from_hashes(hashes)
+    except (OSError, EOFError, ValueError, KeyError, struct.error):
+        return None
+    return header["meta"], url_sets
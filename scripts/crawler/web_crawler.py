@@ -1,37 +1,75 @@
 import os
 import json
 import datetime
+import hashlib
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-from collections import deque
-import time
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import glob
+import re
+import shutil
+import asyncio
 import logging
-import urllib.robotparser
-import re # Für reguläre Ausdrücke
+import time
 
-# Warnungen für XMLParsedAsHTMLWarning unterdrücken
-import warnings
-from bs4 import XMLParsedAsHTMLWarning
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+from fetch_engine import FetchEngine, ResponseRejected, header_charset
+from frontier import PRIORITY_SEED, UrlFrontier, normalize_url
+from checkpoint import CrawlCheckpoint
+from content_dedup import ContentDeduplicator, NearDuplicateIndex
+from crawl_metrics import PROFILE_EXTENSIONS, CrawlMetrics, MetricsServer, resolve_profiler, run_profiled
+from segment_writer import SegmentWriter, open_text_lines, segment_files
+from page_extractor import DEFAULT_CONTENT_SELECTORS, classify_links, extract_page, resolve_engine
+from response_archive import ResponseArchive
+from retry_scheduler import HostCircuitBreaker, RetryScheduler, parse_retry_after
+from robots_cache import RobotsCache
+from shared_frontier import PARTITION_BY, default_worker_id, open_shared_frontier
+from url_seeding import UrlSeeder
+from url_set import CompactUrlSet, load_url_index, save_url_index
 
 
 # --- Projekt-Konfiguration ---
 PROJECT_NAME = "zephyr" # <--- HIER DEN PROJEKTNAMEN FESTLEGEN (z.B. "zephyr", "arduino", "my_company")
 base_url = "https://docs.zephyrproject.org/latest/" # <--- Basis-URL für diesen spezifischen Crawl
 
+# Mehrere Seiten in einem Prozess: JSON-Datei mit einer Liste von Seiten, jede mit eigenem Projektnamen,
+# eigener Basis-URL, Selektoren, Ignorier-Regeln und Ausgabedateien (siehe sites.example.json).
+# None = nur die Seite aus PROJECT_NAME/base_url. Auf der Kommandozeile: --config <datei>
+SITES_CONFIG_FILE = None
+
 # --- Datei- und Ordnerpfade ---
-jsonl_output_file = os.path.join(
-    os.path.dirname(__file__), "..", "..", "data", "processed_data", f"{PROJECT_NAME}_docs_segments.jsonl"
-)
-log_file_path = os.path.join(
-    os.path.dirname(__file__), "..", "..", "logs", f"{PROJECT_NAME}_crawler_output.log"
-)
-unreachable_urls_file = os.path.join(
-    os.path.dirname(__file__), "..", "..", "data", "processed_data", f"{PROJECT_NAME}_docs_unreachable_urls.jsonl"
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "processed_data")
+LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "logs")
+
+
+def project_files(project_name, worker_id=None):
+    """Ausgabe-, Checkpoint- und Log-Dateien eines Projekts; jede Seite hat ihre eigenen.
+
+    Im verteilten Crawl schreibt jeder Worker eigene Dateien ([PROJECT_NAME]_worker-<id>_...),
+    die `--merge` zu den normalen Ausgabedateien zusammenführt.
+    """
+    prefix = project_name if worker_id is None else f"{project_name}_worker-{worker_id}"
+    return {
+        "segments": os.path.join(DATA_DIR, f"{prefix}_docs_segments.jsonl"),
+        "unreachable": os.path.join(DATA_DIR, f"{prefix}_docs_unreachable_urls.jsonl"),
+        "github_links": os.path.join(DATA_DIR, f"{prefix}_github_links.jsonl"), # gesammelte GitHub-Links
+        # SQLite-Checkpoint mit Frontier, besuchten URLs, Fehlversuchen und Outlinks
+        "checkpoint": os.path.join(DATA_DIR, f"{prefix}_crawl_checkpoint.sqlite"),
+        # Kompakte URL-Mengen zum Checkpoint (nur mit COMPACT_URL_SETS)
+        "url_index": os.path.join(DATA_DIR, f"{prefix}_crawl_url_index.bin"),
+        # Seiten aus Sitemap/Inventaren, auf die keine gecrawlte Seite verlinkt
+        "orphaned": os.path.join(DATA_DIR, f"{prefix}_docs_orphaned_urls.jsonl"),
+        "log": os.path.join(LOG_DIR, f"{prefix}_crawler_output.log"),
+    }
+
+
+log_file_path = project_files(PROJECT_NAME)["log"]
+github_links_output_file = project_files(PROJECT_NAME)["github_links"] # Eingabe der GitHub-Stufe (github_fetcher.py)
+metrics_file = os.path.join( # Momentaufnahmen der Metriken (eine JSON-Zeile pro Intervall)
+    LOG_DIR, f"{PROJECT_NAME}_crawl_metrics.jsonl"
 )
-github_links_output_file = os.path.join( # Pfad zur Datei für gesammelte GitHub-Links
-    os.path.dirname(__file__), "..", "..", "data", "processed_data", f"{PROJECT_NAME}_github_links.jsonl"
+profile_dir = os.path.join( # Profile einzelner Seiten (PROFILE_EVERY_N_PAGES)
+    LOG_DIR, f"{PROJECT_NAME}_profiles"
 )
 
 # Dateierweiterungen, die ignoriert werden sollen
@@ -41,15 +79,113 @@ IGNORED_EXTENSIONS = (
     '.css', '.js', # Stylesheets / JavaScript
     '.ico', # Favicons
 )
+# URLs, die eine dieser Zeichenketten enthalten, werden nicht gecrawlt (z.B. "/_sources/" oder "/genindex")
+IGNORED_URL_PATTERNS = ()
+
+# Downloads werden gestreamt: Antworten mit einem anderen Content-Type (z.B. Binärdateien ohne passende
+# Endung) oder über MAX_PAGE_BYTES werden vor bzw. während des Downloads abgebrochen und als unerreichbar protokolliert.
+# Ohne Content-Type entscheiden die ersten Bytes (Signaturen von Bildern, PDFs, Archiven).
+MAX_PAGE_BYTES = 20 * 1024 * 1024 # Obergrenze für den Body einer Seite; None = unbegrenzt
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "application/xml", "text/xml") # None = alle
 
 # Maximale Wiederholungsversuche pro URL
 MAX_RETRIES = 3 
 # Timeout für HTTP-Anfragen in Sekunden
 HTTP_TIMEOUT = 30 # Sekunden
 
+# Inkrementeller Recrawl: bereits besuchte Seiten erneut prüfen (z.B. nach einem neuen Zephyr-Release).
+# Gesendet wird If-None-Match/If-Modified-Since; unveränderte Seiten werden weder geparst noch neu gespeichert.
+INCREMENTAL_RECRAWL = False
+
+# Ausgabe der Segmente: gebündelt schreiben, optional komprimiert und in rollierende Dateien aufgeteilt
+SEGMENT_BATCH_SIZE = 200 # Datensätze pro Schreibvorgang
+SEGMENT_FLUSH_INTERVAL = 5 # spätestens nach so vielen Sekunden schreiben
+SEGMENT_COMPRESSION = None # None, "gzip" oder "zstd" (zstd benötigt das Paket zstandard); hängt .gz/.zst an
+SEGMENT_SHARD_SIZE_MB = None # z.B. 256 -> [PROJECT_NAME]_docs_segments-00001.jsonl, -00002.jsonl, ...; None = eine Datei
+
+# Deduplizierung vor dem Schreiben: Inhalt, der (nach Angleichen von Groß-/Kleinschreibung und Leerraum)
+# schon unter einer anderen URL gespeichert wurde, wird nicht erneut geschrieben. Optional auch sehr ähnliche Seiten.
+DEDUP_SEGMENTS = True
+DEDUP_NEAR_DUPLICATES = False # MinHash/LSH über Wort-5-Gramme
+NEAR_DUPLICATE_THRESHOLD = 0.9 # geschätzte Jaccard-Ähnlichkeit, ab der eine Seite als Duplikat gilt
+NEAR_DUPLICATE_INDEX_SIZE = 50000 # max. Seiten im Ähnlichkeits-Index (ca. 2 KB pro Seite), ältere fallen heraus
+
+# Sehr große Crawls: besuchte/unerreichbare URLs, GitHub-Links und der Index der Frontier als 64-Bit-Hashes
+# (ca. 8 Bytes statt gut 100 Bytes pro URL, siehe url_set.py). Beim Beenden wird ein Sidecar-Index neben den
+# Checkpoint geschrieben ([PROJECT_NAME]_crawl_url_index.bin), aus dem der nächste Start die Mengen direkt lädt.
+COMPACT_URL_SETS = False
+
+# Checkpoint: gebündelte Commits nach so vielen Änderungen bzw. spätestens nach so vielen Sekunden
+CHECKPOINT_COMMIT_EVERY = 500
+CHECKPOINT_COMMIT_INTERVAL = 5 # Sekunden
+
+# Nebenläufigkeit und Höflichkeit gegenüber dem Server (gilt gemeinsam für alle Seiten eines Laufs)
+MAX_CONCURRENT_REQUESTS = 16 # Maximale Anzahl gleichzeitig laufender Anfragen (gesamt)
+MAX_REQUESTS_PER_HOST = 4 # Maximale Anzahl gleichzeitiger Anfragen pro Host
+MIN_REQUEST_INTERVAL_PER_HOST = 0.1 # Mindestabstand zwischen zwei Anfragen an denselben Host (Sekunden)
+# Wiederholungsversuche: exponentielles Backoff mit Jitter (2 s, 4 s, 8 s, ... bis RETRY_MAX_DELAY).
+# Bei 429/503 mit Retry-After-Header wird stattdessen die Vorgabe des Servers eingehalten.
+RETRY_BASE_DELAY = 2 # Sekunden
+RETRY_MAX_DELAY = 300 # Sekunden
+# Circuit-Breaker: nach so vielen Fehlern in Folge (Verbindungsfehler, Timeouts, 5xx, 429) wird ein Host
+# für CIRCUIT_BREAKER_COOLDOWN Sekunden pausiert; danach prüft eine einzelne Anfrage, ob er wieder antwortet.
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_COOLDOWN = 60 # Sekunden
+
+# Verteilter Crawl: mehrere Worker-Prozesse oder Rechner teilen sich Frontier, bekannte URLs und GitHub-Links
+# (siehe shared_frontier.py). Jeder Worker schreibt eigene Ausgabedateien; zusammenführen mit --merge.
+# None = Einzelbetrieb; "sqlite" (Datei in DATA_DIR), "sqlite:<ordner>" oder "redis://host:6379/0" (pip install redis).
+# Auf der Kommandozeile: --shared <backend> --worker-id <name>
+SHARED_FRONTIER = None
+WORKER_ID = None # Name dieses Workers (Dateinamen, Leases); None = <Rechnername>-<PID>
+SHARED_PARTITIONS = 64 # Anzahl Partitionen, auf die die URLs per Hash verteilt werden
+SHARED_PARTITION_BY = "auto" # "host", "path" oder "auto" (nach Pfad, wenn alle Seiten auf einem Host liegen)
+LEASE_SECONDS = 120 # So lange gehört eine entnommene URL einem Worker; ohne Verlängerung übernimmt sie ein anderer
+SHARED_POLL_INTERVAL = 1.0 # Sekunden zwischen zwei Abfragen, wenn die eigene Warteschlange leer ist
+
+# Aufzeichnen und Wiedergeben (siehe response_archive.py): RECORD_ARCHIVE speichert alle Antworten eines normalen
+# Crawls (auch robots.txt, Sitemaps, Weiterleitungen) in einem Ordner; REPLAY_ARCHIVE crawlt ohne Netzwerk aus so
+# einem Ordner, z.B. für Benchmarks (scripts/benchmarks/bench_replay.py). Bei der Wiedergabe entfällt der
+# Mindestabstand pro Host; Seiten, die nicht im Archiv liegen, werden als unerreichbar protokolliert.
+# None = aus. Auf der Kommandozeile: --record <ordner> bzw. --replay <ordner>
+RECORD_ARCHIVE = None
+REPLAY_ARCHIVE = None
+
+# Parse-Pipeline: geladene Seiten werden in Worker-Prozessen geparst und extrahiert
+PARSE_WORKERS = os.cpu_count() or 2 # Anzahl Worker-Prozesse für BeautifulSoup/Extraktion
+PARSE_QUEUE_SIZE = 64 # Maximale Anzahl geladener, noch nicht geparster Seiten (Backpressure)
+
+# Extraktions-Engine: "bs4" (BeautifulSoup/html.parser, Referenz), "lxml", "selectolax" oder "auto" (lxml, falls
+# installiert, sonst bs4). lxml/selectolax sind ein Vielfaches schneller; Seiten mit fehlerhaftem HTML oder anderen
+# Sonderfällen verarbeiten sie trotzdem mit html.parser (siehe extraction_engines.needs_reference_parser).
+EXTRACTION_ENGINE = "bs4"
+
+# URL-Seeding: vor dem Crawl wird die Frontier aus den Inventaren der Seite befüllt (Pfade relativ zu base_url).
+# Zusätzlich werden die Sitemap:-Einträge der robots.txt gelesen. Ein leeres Tupel schaltet eine Quelle ab.
+URL_SEEDING = True
+SEED_SITEMAPS = ("sitemap.xml",)
+SEED_SPHINX_INVENTORIES = ("objects.inv",)
+SEED_DOXYGEN_INDEX_PAGES = ( # Dateien, Datenstrukturen, Gruppen (Doxygen >= 1.9.8: topics.html, davor modules.html)
+    "doxygen/html/files.html", "doxygen/html/annotated.html", "doxygen/html/topics.html", "doxygen/html/modules.html",
+)
+
+# Metriken: Zeit pro Verarbeitungsschritt (Verbindung, Antwortzeit, Download, Parsen, Bereinigung, Schreiben),
+# Zähler (Bytes, Statuscodes, Wiederholungen, übersprungene Seiten) und Füllstände der Warteschlangen.
+METRICS_SNAPSHOT_INTERVAL = 30 # Sekunden zwischen zwei Momentaufnahmen in metrics_file; None = keine
+METRICS_PORT = None # z.B. 9464 -> http://127.0.0.1:9464/metrics im Prometheus-Textformat; None = kein Endpunkt
+METRICS_GAUGE_INTERVAL = 1 # Sekunden zwischen zwei Ablesungen der Füllstände (für Endpunkt und Momentaufnahme)
+PROFILE_EVERY_N_PAGES = None # z.B. 500 -> jede 500. Seite wird im Parse-Worker profiliert (Ausgabe in profile_dir)
+PROFILER = "cProfile" # "cProfile" (.prof für pstats/snakeviz) oder "pyinstrument" (.html, pip install pyinstrument)
+
+# URLs, die diese Muster enthalten, werden erst nach den normalen Inhaltsseiten geladen
+LOW_PRIORITY_URL_PATTERNS = ('_source.html',) # Doxygen-Quelltextlisten
+
 # Mindestlänge des Textinhalts (in Zeichen). Anpassen nach Bedarf.
 MIN_CONTENT_LENGTH = 100 
 
+# Selektoren für den Hauptinhalt, der Reihe nach geprüft (Attribute eines <div>, siehe page_extractor.py)
+CONTENT_SELECTORS = DEFAULT_CONTENT_SELECTORS
+
 # HTTP-Header für Anfragen
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.88 Safari/537.36',
@@ -57,7 +193,6 @@ HEADERS = {
     'Accept-Language': 'en-US,en;q=0.5',
     'Connection': 'keep-alive'
 }
-
 # NEU: Domains, die als GitHub-Links gesammelt werden sollen
 GITHUB_DOMAINS = ["github.com", "raw.githubusercontent.com"]
 # NEU: Dateierweiterungen, die von GitHub-Links interessant sind
@@ -72,404 +207,1360 @@ GITHUB_FILE_EXTENSIONS = (
 )
 
 
-# Sicherstellen, dass die Zielordner existieren
-os.makedirs(os.path.dirname(jsonl_output_file), exist_ok=True)
-os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
-os.makedirs(os.path.dirname(unreachable_urls_file), exist_ok=True)
-os.makedirs(os.path.dirname(github_links_output_file), exist_ok=True)
+logger = logging.getLogger('web_crawler_logger') 
+
 
+# --- Seiten-Konfiguration ---
+# Einstellungen, die jede Seite eines Laufs selbst festlegen kann (Schlüssel in der Konfigurationsdatei).
+# Fehlt ein Schlüssel, gilt die Konstante oben.
+SITE_SETTING_DEFAULTS = {
+    "project_name": PROJECT_NAME,
+    "base_url": base_url,
+    "content_selectors": CONTENT_SELECTORS,
+    "ignored_extensions": IGNORED_EXTENSIONS,
+    "ignored_url_patterns": IGNORED_URL_PATTERNS,
+    "low_priority_url_patterns": LOW_PRIORITY_URL_PATTERNS,
+    "min_content_length": MIN_CONTENT_LENGTH,
+    "extraction_engine": EXTRACTION_ENGINE,
+    "github_domains": GITHUB_DOMAINS,
+    "github_file_extensions": GITHUB_FILE_EXTENSIONS,
+    "incremental_recrawl": INCREMENTAL_RECRAWL,
+    "url_seeding": URL_SEEDING,
+    "seed_sitemaps": SEED_SITEMAPS,
+    "seed_sphinx_inventories": SEED_SPHINX_INVENTORIES,
+    "seed_doxygen_index_pages": SEED_DOXYGEN_INDEX_PAGES,
+    "dedup_segments": DEDUP_SEGMENTS,
+    "dedup_near_duplicates": DEDUP_NEAR_DUPLICATES,
+    "segment_compression": SEGMENT_COMPRESSION,
+    "segment_shard_size_mb": SEGMENT_SHARD_SIZE_MB,
+    "compact_url_sets": COMPACT_URL_SETS,
+}
 
-# --- Logging-Setup ---
-logging.basicConfig(
-    level=logging.INFO, # Logge alle Meldungen ab INFO-Level
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file_path, encoding='utf-8')
-    ]
+# Einstellungen für den ganzen Lauf (oberste Ebene der Konfigurationsdatei)
+RUN_SETTING_DEFAULTS = {
+    "max_concurrent_requests": MAX_CONCURRENT_REQUESTS,
+    "max_requests_per_host": MAX_REQUESTS_PER_HOST,
+    "min_request_interval_per_host": MIN_REQUEST_INTERVAL_PER_HOST,
+    "parse_workers": PARSE_WORKERS,
+    "metrics_port": METRICS_PORT,
+    "max_page_bytes": MAX_PAGE_BYTES,
+    "allowed_content_types": ALLOWED_CONTENT_TYPES,
+}
+
+# Listen aus der JSON-Datei werden zu Tupeln (wie die Konstanten oben)
+_TUPLE_SETTINGS = (
+    "content_selectors", "ignored_extensions", "ignored_url_patterns", "low_priority_url_patterns",
+    "github_domains", "github_file_extensions", "seed_sitemaps", "seed_sphinx_inventories", "seed_doxygen_index_pages",
 )
-logger = logging.getLogger('web_crawler_logger') 
 
 
-# --- Globale Crawler-Variablen ---
-visited_urls = set() 
-urls_to_visit = deque()
-newly_processed_count = 0 
-failed_attempts = {} 
-unreachable_urls = set() 
-collected_github_links = set() # Für Links zu GitHub-Dateien
+def site_settings(overrides=None):
+    """Einstellungen einer Seite: die Konstanten oben, überschrieben durch `overrides`."""
+    overrides = overrides or {}
+    unknown = set(overrides) - set(SITE_SETTING_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unbekannte Einstellung(en) für eine Seite: {', '.join(sorted(unknown))}")
+    settings = {**SITE_SETTING_DEFAULTS, **overrides}
+    for key in _TUPLE_SETTINGS:
+        settings[key] = tuple(settings[key])
+    if not settings["base_url"].endswith('/'):
+        raise ValueError(f"base_url muss mit '/' enden: {settings['base_url']}")
+    resolve_engine(settings["extraction_engine"]) # unbekannte oder nicht installierte Engine sofort melden
+    return settings
 
-session = requests.Session()
 
-rp = urllib.robotparser.RobotFileParser()
-rp.set_url(urljoin(base_url, 'robots.txt'))
-try:
-    rp.read()
-    logger.info(f"Robots.txt von {urljoin(base_url, 'robots.txt')} erfolgreich geladen.")
-except Exception as e:
-    logger.warning(f"FEHLER beim Laden oder Parsen der robots.txt: {e}. Crawler wird ohne robots.txt-Regeln fortfahren.")
+def load_sites_config(path):
+    """Liest eine Konfigurationsdatei; gibt (Lauf-Einstellungen, Liste der Seiten-Einstellungen) zurück.
 
+    Format: {"sites": [{"project_name": ..., "base_url": ..., ...}, ...], "max_concurrent_requests": ...}
+    Jede Seite braucht einen eigenen project_name, weil daraus ihre Ausgabedateien entstehen.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    sites = config.pop("sites", None)
+    if not sites:
+        raise ValueError(f"Keine Seiten in {path} ('sites' fehlt oder ist leer).")
+    unknown = set(config) - set(RUN_SETTING_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unbekannte Einstellung(en) in {path}: {', '.join(sorted(unknown))}")
 
-# --- Verbesserte Resume-Logik ---
-logger.info("Prüfe auf vorherigen Crawling-Status...")
-if os.path.exists(jsonl_output_file):
-    logger.info(f"Bestehende Datei '{jsonl_output_file}' gefunden. Lade bereits verarbeitete URLs und setze Startpunkte...")
-    
-    try:
-        with open(jsonl_output_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f):
-                try:
-                    data = json.loads(line)
-                    if 'url' in data:
-                        visited_urls.add(data['url'])
-                except json.JSONDecodeError:
-                    logger.warning(f"JSON-Fehler in Zeile {line_num+1} von {jsonl_output_file}. Ignoriere Zeile.")
-        
-        if os.path.exists(unreachable_urls_file):
-            logger.info(f"Lade bereits unerreichbare URLs aus '{unreachable_urls_file}'.")
-            try:
-                with open(unreachable_urls_file, 'r', encoding='utf-8') as f_unreachable:
-                    for line_unreachable_num, line_unreachable in enumerate(f_unreachable):
-                        try:
-                            unreachable_url_data = json.loads(line_unreachable)
-                            if 'url' in unreachable_url_data:
-                                unreachable_urls.add(unreachable_url_data['url'])
-                                visited_urls.add(unreachable_url_data['url']) 
-                        except json.JSONDecodeError:
-                            logger.warning(f"JSON-Fehler in Zeile {line_unreachable_num+1} von {unreachable_urls_file}. Ignoriere Zeile.")
-            except Exception as e:
-                logger.error(f"FEHLER beim Laden der unerreichbaren URLs: {e}")
+    site_list = []
+    for entry in sites:
+        if "project_name" not in entry or "base_url" not in entry:
+            raise ValueError(f"Jede Seite in {path} braucht project_name und base_url: {entry}")
+        site_list.append(site_settings(entry))
+    names = [site["project_name"] for site in site_list]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"project_name mehrfach vergeben in {path}: {', '.join(duplicates)}")
+    return {**RUN_SETTING_DEFAULTS, **config}, site_list
+
+
+def extraction_settings(site):
+    """Einstellungen, die die Worker-Prozesse für Extraktion und Link-Discovery einer Seite brauchen."""
+    return {
+        "base_url": site["base_url"],
+        "min_content_length": site["min_content_length"],
+        "ignored_extensions": site["ignored_extensions"],
+        "ignored_url_patterns": site["ignored_url_patterns"],
+        "github_domains": site["github_domains"],
+        "github_file_extensions": site["github_file_extensions"],
+        "extraction_engine": resolve_engine(site["extraction_engine"]),
+        "content_selectors": site["content_selectors"],
+    }
+
+
+# Einstellungen der Standard-Seite (PROJECT_NAME/base_url), z.B. für die Benchmarks
+EXTRACTION_SETTINGS = extraction_settings(site_settings())
+
+
+# --- Hilfsfunktionen ---
+def hash_content(title, content):
+    return hashlib.sha256(f"{title}\0{content}".encode('utf-8')).hexdigest()
+
+
+def segment_id(url):
+    """Lesbare, kollisionsfreie Segment-ID: Pfad der URL plus Kurz-Hash der normalisierten URL.
+
+    Der Pfad allein war nicht eindeutig ("a/b.html" und "a_b.html" ergaben dieselbe ID,
+    Query-Parameter fielen weg). Pfad und Hash stammen beide aus der normalisierten URL, daher
+    erhalten `.../foo/` und `.../foo/index.html` dieselbe ID.
+    """
+    normalized = normalize_url(url)
+    path_part = urlparse(normalized).path.strip('/').replace('/', '_').replace('.', '_') or "homepage"
+    url_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+    return f"{path_part}-{url_hash}"
+
+
+def conditional_headers(page_state):
+    """Baut If-None-Match/If-Modified-Since aus den gespeicherten Validatoren."""
+    headers = {}
+    if page_state["etag"]:
+        headers['If-None-Match'] = page_state["etag"]
+    if page_state["last_modified"]:
+        headers['If-Modified-Since'] = page_state["last_modified"]
+    return headers
+
+
+def is_host_failure(e):
+    """Fehler, die auf einen überlasteten oder ausgefallenen Host hindeuten (nicht z.B. 404)."""
+    if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(e, 'response', None)
+    return response is not None and (response.status_code >= 500 or response.status_code == 429)
+
+
+class SiteCrawler:
+    """Crawl-Zustand und Verarbeitung einer einzelnen Seite (Frontier, Checkpoint, Ausgabedateien).
+
+    Verbindungen, Prozess-Pool, robots.txt-Cache und Metriken gehören dem CrawlRunner und
+    werden von allen Seiten eines Laufs geteilt.
+    """
+
+    def __init__(self, site, runner):
+        self.site = site
+        self.runner = runner
+        self.metrics = runner.metrics
+        self.project_name = site["project_name"]
+        self.base_url = site["base_url"]
+        self.files = project_files(self.project_name, runner.worker_id)
+        self.extraction_settings = extraction_settings(site)
+        self.logger = logging.getLogger(f'web_crawler_logger.{self.project_name}')
+        self.status_prefix = f"[{self.project_name}] " if len(runner.sites_config) > 1 else ""
+
+        url_set = CompactUrlSet if site["compact_url_sets"] else set # Mengen mit sehr vielen URLs
+        self.visited_urls = url_set()
+        self.urls_to_visit = UrlFrontier(site["low_priority_url_patterns"], seen=url_set()) # Frontier mit O(1)-Index über normalisierte URLs
+        self.newly_processed_count = 0
+        self.total_urls_processed_in_this_run = 0
+        self.failed_attempts = {}
+        self.unreachable_urls = url_set()
+        self.collected_github_links = url_set() # Für Links zu GitHub-Dateien
+        self.url_index_ready = False # Mengen vollständig geladen, Sidecar-Index darf geschrieben werden
+        self.urls_in_progress = set() # URLs, die gerade geladen/verarbeitet werden
+        self.fetch_tasks = set()
+        self.parse_queue = None # asyncio.Queue, wird in crawl() angelegt
+        self.checkpoint = None # CrawlCheckpoint, wird in open() geöffnet
+        self.segment_writer = None # SegmentWriter für die Doku-Segmente
+        self.github_links_writer = None # SegmentWriter für die gesammelten GitHub-Links
+        self.unreachable_writer = None # SegmentWriter für unerreichbare URLs (jede URL wird sofort geschrieben)
+        self.deduplicator = None # ContentDeduplicator, wird in open() mit dem Index aus dem Checkpoint erzeugt
+        self.retry_scheduler = RetryScheduler(base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY) # wartende Wiederholungsversuche
+        self.circuit_breaker = HostCircuitBreaker(failure_threshold=CIRCUIT_BREAKER_THRESHOLD, cooldown=CIRCUIT_BREAKER_COOLDOWN)
+        self.seeded_urls = {} # normalisierte URL -> (url, Quelle) aller Seiten aus Sitemaps/Inventaren (für verwaiste Seiten)
+        self.rp = None # RobotFileParser des Hosts aus dem RobotsCache
+        self.shared_frontier = None # SharedFrontier im verteilten Crawl, wird in open() geöffnet
+        self.leased_urls = set() # aus der gemeinsamen Frontier entnommene, noch nicht fertige URLs
+        self.removed_segment_urls = set() # normalisierte URLs, deren Segment compact_segments() entfernt
+
+        # Herkunft der in diesem Lauf neu eingereihten URLs
+        self.url_origin_stats = {
+            "seeded": {}, # Quelle (sitemap, objects.inv, doxygen) -> Anzahl
+            "discovered": 0, # über Links geladener Seiten gefunden
+        }
+
+        # Statistik für den inkrementellen Recrawl
+        self.recrawl_stats = {
+            "not_modified": 0, # Antwort 304, Body nicht übertragen
+            "unchanged_body": 0, # Antwort 200, aber Body-Hash unverändert -> nicht geparst
+            "unchanged_content": 0, # geparst, aber extrahierter Inhalt unverändert -> kein neues Segment
+            "updated": 0, # Inhalt geändert -> neues Segment ersetzt das alte
+            "removed": 0, # jetzt Duplikat oder ohne Inhalt -> altes Segment wird entfernt
+            "bytes_not_transferred": 0,
+            "bytes_not_parsed": 0,
+        }
+
+        # Statistik der Deduplizierung im aktuellen Lauf
+        self.dedup_stats = {
+            "exact": 0, # identischer Inhalt
+            "near": 0, # sehr ähnlicher Inhalt
+            "bytes_dropped": 0, # nicht geschriebener Inhalt (UTF-8)
+        }
+
+    def open(self):
+        """Legt die Zielordner an und öffnet Checkpoint und Ausgabedateien."""
+        for path in self.files.values():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if self.files["log"] != self.runner.log_file:
+            # Mehrere Seiten: jede Seite hat zusätzlich ihre eigene Log-Datei
+            handler = logging.FileHandler(self.files["log"], encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+            self.logger.addHandler(handler)
+
+        self.checkpoint = CrawlCheckpoint(
+            self.files["checkpoint"],
+            commit_interval=CHECKPOINT_COMMIT_INTERVAL,
+            commit_every=CHECKPOINT_COMMIT_EVERY,
+        )
+        self.segment_writer = SegmentWriter(
+            self.files["segments"],
+            batch_size=SEGMENT_BATCH_SIZE,
+            flush_interval=SEGMENT_FLUSH_INTERVAL,
+            compression=self.site["segment_compression"],
+            shard_size_mb=self.site["segment_shard_size_mb"],
+        )
+        self.github_links_writer = SegmentWriter(
+            self.files["github_links"],
+            batch_size=SEGMENT_BATCH_SIZE,
+            flush_interval=SEGMENT_FLUSH_INTERVAL,
+        )
+        self.unreachable_writer = SegmentWriter(self.files["unreachable"], batch_size=1)
+        if self.site["dedup_segments"]:
+            near_index = None
+            if self.site["dedup_near_duplicates"]:
+                near_index = NearDuplicateIndex(threshold=NEAR_DUPLICATE_THRESHOLD, max_entries=NEAR_DUPLICATE_INDEX_SIZE)
+            self.deduplicator = ContentDeduplicator(self.checkpoint.load_content_index(), near_index)
+        # Vor jedem Checkpoint-Commit müssen die zugehörigen Segmente auf der Platte sein
+        self.checkpoint.add_commit_hook(self.segment_writer.sync)
+        self.checkpoint.add_commit_hook(self.github_links_writer.sync)
+
+        if self.runner.shared_frontier_spec:
+            self.shared_frontier = open_shared_frontier(
+                self.runner.shared_frontier_spec, self.project_name, self.runner.worker_id, DATA_DIR,
+                partitions=SHARED_PARTITIONS,
+                partition_by=self.runner.partition_by,
+                lease_seconds=LEASE_SECONDS,
+            )
+            # Leases eines früheren Laufs mit derselben Worker-ID sofort freigeben
+            self.shared_frontier.release_worker()
+            self.shared_frontier.heartbeat()
+
+    def close(self):
+        """Schreibt alle Puffer und schließt den Checkpoint (auch nach einem Abbruch)."""
+        if self.url_index_ready:
+            self.save_url_index()
+        for resource in (self.checkpoint, self.segment_writer, self.github_links_writer, self.unreachable_writer):
+            if resource is not None:
+                resource.close()
+        if self.shared_frontier is not None:
+            # Nicht fertige URLs sofort an die anderen Worker zurückgeben, statt auf den Ablauf der Leases zu warten
+            self.shared_frontier.release(self.leased_urls)
+            self.shared_frontier.close()
+
+    def prepare(self, engine, robots):
+        """Alles vor dem eigentlichen Crawl: robots.txt, vorheriger Stand, URL-Seeding."""
+        self.rp = robots.parser_for(self.base_url)
+        self.load_previous_state()
+        self.url_index_ready = self.site["compact_url_sets"]
+        # Im verteilten Crawl befüllt nur der erste Worker die gemeinsame Frontier
+        if self.site["url_seeding"] and (self.shared_frontier is None or self.shared_frontier.acquire_once("seeding")):
+            self.seed_frontier(engine)
+        self.print_status()
+
+    # --- Zustandsänderungen (Frontier + Checkpoint) ---
+    def enqueue(self, url, priority=None):
+        """Reiht eine URL in die Frontier ein und hält sie im Checkpoint fest."""
+        if priority is None:
+            priority = self.urls_to_visit.priority_for(url)
+        if self.shared_frontier is not None:
+            return self.shared_frontier.add([(url, priority)]) == 1
+        if self.urls_to_visit.add(url, priority=priority):
+            self.checkpoint.record_enqueued(url, priority)
+            return True
+        return False
+
+    def enqueue_many(self, urls):
+        """Reiht mehrere URLs ein (in der gemeinsamen Frontier in einer Transaktion); gibt die Anzahl neuer zurück."""
+        if self.shared_frontier is not None:
+            return self.shared_frontier.add([(url, self.urls_to_visit.priority_for(url)) for url in urls])
+        return sum(1 for url in urls if self.enqueue(url))
+
+    def claim_urls(self, limit):
+        """Holt URLs aus den eigenen Partitionen der gemeinsamen Frontier in die lokale Warteschlange."""
+        for url, priority in self.shared_frontier.claim(limit):
+            self.leased_urls.add(url)
+            self.urls_to_visit.requeue(url, priority=priority)
+
+    def mark_visited(self, url, unreachable=False):
+        """Markiert eine URL als fertig (optional als dauerhaft unerreichbar)."""
+        self.visited_urls.add(url)
+        if unreachable:
+            self.unreachable_urls.add(url)
+        # War die URL die Probe-Anfrage eines gesperrten Hosts, darf die nächste geparkte URL proben
+        self.circuit_breaker.finish_trial(urlparse(url).netloc, url)
+        self.checkpoint.record_visited(url, unreachable=unreachable)
+        if self.shared_frontier is not None:
+            self.shared_frontier.complete(url, unreachable=unreachable)
+            self.leased_urls.discard(url)
+
+    def mark_unreachable(self, url, reason):
+        """Markiert eine URL als dauerhaft unerreichbar und schreibt sie sofort in die Ausgabedatei."""
+        self.mark_visited(url, unreachable=True)
+        self.metrics.count("pages_unreachable")
+        self.unreachable_writer.write({
+            "url": url,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "reason": reason,
+        })
+
+    # --- Verbesserte Resume-Logik ---
+    def load_previous_state(self):
+        """Lädt bereits verarbeitete URLs aus den Ausgabedateien und befüllt die Warteschlange."""
+        logger = self.logger
+        unreachable_urls_file = self.files["unreachable"]
+        github_links_output_file = self.files["github_links"]
+
+        logger.info("Prüfe auf vorherigen Crawling-Status...")
+        if self.shared_frontier is not None:
+            self.load_shared_state()
+        elif self.checkpoint.has_state():
+            self.load_checkpoint_state()
+            if self.site["incremental_recrawl"] and not self.urls_to_visit:
+                self.start_incremental_recrawl()
+        elif self.segment_writer.existing_files():
+            logger.info(f"Bestehende Datei '{self.files['segments']}' gefunden. Lade bereits verarbeitete URLs und setze Startpunkte...")
 
-        # Lade auch bereits gesammelte GitHub-Links, falls vorhanden
-        if os.path.exists(github_links_output_file):
-            logger.info(f"Lade bereits gesammelte GitHub-Links aus '{github_links_output_file}'.")
             try:
-                with open(github_links_output_file, 'r', encoding='utf-8') as f_github_links:
-                    for line_github_num, line_github in enumerate(f_github_links):
-                        try:
-                            github_link_data = json.loads(line_github)
-                            if 'url' in github_link_data:
-                                collected_github_links.add(github_link_data['url'])
-                        except json.JSONDecodeError:
-                            logger.warning(f"JSON-Fehler in Zeile {line_github_num+1} von {github_links_output_file}. Ignoriere Zeile.")
+                previous_urls = [] # Reihenfolge für das erneute Einreihen (kompakte Mengen sind nicht iterierbar)
+                for segment_file in self.segment_writer.existing_files():
+                    with open_text_lines(segment_file) as f:
+                        for line_num, line in enumerate(f):
+                            try:
+                                data = json.loads(line)
+                                if 'url' in data and data['url'] not in self.visited_urls:
+                                    self.visited_urls.add(data['url'])
+                                    previous_urls.append(data['url'])
+                            except json.JSONDecodeError:
+                                logger.warning(f"JSON-Fehler in Zeile {line_num+1} von {segment_file}. Ignoriere Zeile.")
+
+                if os.path.exists(unreachable_urls_file):
+                    logger.info(f"Lade bereits unerreichbare URLs aus '{unreachable_urls_file}'.")
+                    try:
+                        with open(unreachable_urls_file, 'r', encoding='utf-8') as f_unreachable:
+                            for line_unreachable_num, line_unreachable in enumerate(f_unreachable):
+                                try:
+                                    unreachable_url_data = json.loads(line_unreachable)
+                                    if 'url' in unreachable_url_data:
+                                        self.unreachable_urls.add(unreachable_url_data['url'])
+                                        if unreachable_url_data['url'] not in self.visited_urls:
+                                            self.visited_urls.add(unreachable_url_data['url'])
+                                            previous_urls.append(unreachable_url_data['url'])
+                                except json.JSONDecodeError:
+                                    logger.warning(f"JSON-Fehler in Zeile {line_unreachable_num+1} von {unreachable_urls_file}. Ignoriere Zeile.")
+                    except Exception as e:
+                        logger.error(f"FEHLER beim Laden der unerreichbaren URLs: {e}")
+
+                # Lade auch bereits gesammelte GitHub-Links, falls vorhanden
+                if os.path.exists(github_links_output_file):
+                    logger.info(f"Lade bereits gesammelte GitHub-Links aus '{github_links_output_file}'.")
+                    try:
+                        with open(github_links_output_file, 'r', encoding='utf-8') as f_github_links:
+                            for line_github_num, line_github in enumerate(f_github_links):
+                                try:
+                                    github_link_data = json.loads(line_github)
+                                    if 'url' in github_link_data:
+                                        self.collected_github_links.add(github_link_data['url'])
+                                except json.JSONDecodeError:
+                                    logger.warning(f"JSON-Fehler in Zeile {line_github_num+1} von {github_links_output_file}. Ignoriere Zeile.")
+                    except Exception as e:
+                        logger.error(f"FEHLER beim Laden der GitHub-Links: {e}")
+
+
+                # Ohne Checkpoint (Daten eines älteren Laufs) werden die besuchten Seiten
+                # erneut geladen, um ihre Links wiederzufinden. Ab jetzt führt der Checkpoint.
+                self.enqueue(self.base_url, priority=PRIORITY_SEED)
+                for url in previous_urls:
+                    self.enqueue(url)
+
+                self.newly_processed_count = len(self.visited_urls)
+
+                logger.info(f"{len(self.visited_urls)} URLs bereits erfolgreich verarbeitet und in 'visited_urls' markiert.")
+                logger.info(f"{len(self.urls_to_visit)} URLs initial in der Warteschlange für den Neustart (inkl. bereits besuchter für Link-Discovery).")
+                logger.info(f"Crawler startet effektiv bei {self.newly_processed_count} bereits verarbeiteten Seiten.")
+
             except Exception as e:
-                logger.error(f"FEHLER beim Laden der GitHub-Links: {e}")
-
-
-        for url in visited_urls:
-            urls_to_visit.append(url)
-            
-        if base_url not in urls_to_visit:
-            urls_to_visit.appendleft(base_url)
-
-        newly_processed_count = len(visited_urls)
-        
-        logger.info(f"{len(visited_urls)} URLs bereits erfolgreich verarbeitet und in 'visited_urls' markiert.")
-        logger.info(f"{len(urls_to_visit)} URLs initial in der Warteschlange für den Neustart (inkl. bereits besuchter für Link-Discovery).")
-        logger.info(f"Crawler startet effektiv bei {newly_processed_count} bereits verarbeiteten Seiten.")
-
-    except Exception as e:
-        logger.error(f"FEHLER beim Laden des bestehenden Crawling-Status: {e}")
-        logger.info("Starte Crawling komplett neu.")
-        visited_urls.clear()
-        urls_to_visit.clear()
-        urls_to_visit.append(base_url)
-        newly_processed_count = 0
-        failed_attempts.clear()
-        unreachable_urls.clear() 
-        collected_github_links.clear() # Bei komplettem Neustart auch GitHub-Links leeren
-else:
-    logger.info("Keine bestehende Datei gefunden. Starte Crawling neu.")
-    urls_to_visit.append(base_url)
-    collected_github_links.clear()
-
-# --- Initialer Status-Output auf Konsole (für sofortiges Feedback) ---
-print("\n--- Aktueller Crawler-Status ---")
-print(f"Gesamt-URLs in Datei (visited_urls): {len(visited_urls)}")
-print(f"URLs in der Warteschlange (urls_to_visit): {len(urls_to_visit)}")
-print(f"Neu verarbeitete Seiten im aktuellen Lauf (inkl. geladener): {newly_processed_count}") 
-print("----------------------------------\n")
-
-
-# --- Haupt-Crawler-Logik ---
-total_urls_processed_in_this_run = 0 
-while urls_to_visit:
-    current_url = urls_to_visit.popleft()
-    
-    total_urls_processed_in_this_run += 1
-
-    if current_url in unreachable_urls:
-        logger.info(f"Überspringe dauerhaft unerreichbare URL: {current_url}")
-        continue 
-
-    print(f"Verarbeitet: {total_urls_processed_in_this_run} | Queue: {len(urls_to_visit)} | Neu gesichert: {newly_processed_count} | Gesamt gesichert: {len(visited_urls)}    ", end='\r')
-    
-    try:
-        response = session.get(current_url, timeout=HTTP_TIMEOUT, headers=HEADERS) 
-        response.raise_for_status() 
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # === Hauptinhalts-Extraktion und Speicherung (NUR wenn noch NICHT besucht) ===
-        if current_url not in visited_urls: 
-            # Selektoren in der Reihenfolge der Präferenz/Umfassung
-            main_content_div = soup.find('div', itemprop="articleBody")
-            if not main_content_div:
-                main_content_div = soup.find('div', role="main", class_="document")
-            if not main_content_div: 
-                main_content_div = soup.find('div', class_='textblock')
-            if not main_content_div: 
-                main_content_div = soup.find('div', class_='contents') 
-            if not main_content_div: 
-                main_content_div = soup.find('div', id='doc-content')
-            if not main_content_div: 
-                main_content_div = soup.find('div', id='content')
-            
-            memdoc_contents = [] 
-            if not main_content_div: # Nur versuchen, wenn bisher kein Haupt-Div gefunden wurde
-                all_memdocs = soup.find_all('div', class_='memdoc')
-                if all_memdocs:
-                    for memdoc_div in all_memdocs:
-                        memitem_parent = memdoc_div.find_parent('div', class_='memitem')
-                        if memitem_parent:
-                            memtitle_tag = memitem_parent.find(['h2', 'h3'], class_='memtitle') 
-                            if memtitle_tag:
-                                memdoc_contents.append(f"TITLE: {memtitle_tag.get_text(separator=' ', strip=True)}\n")
-                        
-                        memdoc_contents.append(memdoc_div.get_text(separator='\n', strip=True))
-                        memdoc_contents.append("\n---\n") 
-                    
-                    if memdoc_contents:
-                        main_content_div = "MEMDOCS_COLLECTED" 
-
-
-            text_content = ""
-            page_title = ""
-
-            if main_content_div and main_content_div != "MEMDOCS_COLLECTED": 
-                text_content = main_content_div.get_text(separator='\n', strip=True)
-                
-                page_title_tag = soup.find('h1')
-                page_title = page_title_tag.get_text(strip=True) if page_title_tag else \
-                             (soup.find('title').get_text(strip=True) if soup.find('title') else 'No Title Found')
-            elif main_content_div == "MEMDOCS_COLLECTED" and memdoc_contents: 
-                text_content = '\n'.join(memdoc_contents) 
-                page_title = soup.find('title').get_text(strip=True) if soup.find('title') else 'No Title Found (MemDocs)'
+                logger.error(f"FEHLER beim Laden des bestehenden Crawling-Status: {e}")
+                logger.info("Starte Crawling komplett neu.")
+                self.visited_urls.clear()
+                self.urls_to_visit.clear()
+                self.checkpoint.reset()
+                if self.deduplicator is not None:
+                    self.deduplicator.exact_index.clear()
+                self.enqueue(self.base_url, priority=PRIORITY_SEED)
+                self.newly_processed_count = 0
+                self.failed_attempts.clear()
+                self.unreachable_urls.clear()
+                self.collected_github_links.clear() # Bei komplettem Neustart auch GitHub-Links leeren
+        else:
+            logger.info("Keine bestehende Datei gefunden. Starte Crawling neu.")
+            self.enqueue(self.base_url, priority=PRIORITY_SEED)
+            self.collected_github_links.clear()
+
+    def load_checkpoint_state(self):
+        """Stellt Frontier, besuchte URLs, Fehlversuche und GitHub-Links aus dem Checkpoint wieder her."""
+        self.logger.info(f"Checkpoint '{self.files['checkpoint']}' gefunden. Setze den letzten Lauf ohne erneute Downloads fort...")
+        started = time.perf_counter()
+        watermark = self.restore_url_index() if self.site["compact_url_sets"] else None
+        # Mit Sidecar-Index fehlen nur die Zeilen, die nach dem Schreiben des Index dazugekommen sind
+        for url, unreachable in self.checkpoint.iter_visited(watermark["visited_rowid"] if watermark else 0):
+            self.visited_urls.add(url)
+            self.urls_to_visit.mark_seen(url)
+            if unreachable:
+                self.unreachable_urls.add(url)
+        self.failed_attempts.update(self.checkpoint.load_failed_attempts())
+        self.collected_github_links.update(self.checkpoint.load_github_links(watermark["github_rowid"] if watermark else 0))
+        # Der Index aus dem Sidecar kennt die offenen URLs bereits, add() würde sie verwerfen
+        enqueue_open_url = self.urls_to_visit.requeue if watermark else self.urls_to_visit.add
+        for url, priority in self.checkpoint.load_frontier():
+            enqueue_open_url(url, priority=priority)
+
+        self.newly_processed_count = len(self.visited_urls)
+        self.logger.info(f"Crawl-Zustand in {time.perf_counter() - started:.1f} s geladen.")
+
+        self.logger.info(f"{len(self.visited_urls)} URLs laut Checkpoint bereits verarbeitet ({len(self.unreachable_urls)} davon unerreichbar).")
+        self.logger.info(f"{len(self.urls_to_visit)} offene URLs aus dem Checkpoint in die Warteschlange übernommen.")
+
+    def restore_url_index(self):
+        """Übernimmt die kompakten URL-Mengen aus dem Sidecar-Index, sofern er zum Checkpoint passt.
+
+        Gibt den Wasserstand des Index zurück (ab welchen rowids der Checkpoint noch gelesen
+        werden muss) oder None, wenn die Mengen komplett aus dem Checkpoint aufgebaut werden.
+        """
+        loaded = load_url_index(self.files["url_index"])
+        if loaded is None:
+            return None
+        watermark, url_sets = loaded
+        if not self.checkpoint.matches_url_index(watermark):
+            self.logger.info(f"Sidecar-Index '{self.files['url_index']}' passt nicht zum Checkpoint und wird neu aufgebaut.")
+            return None
+        self.visited_urls = url_sets["visited"]
+        self.unreachable_urls = url_sets["unreachable"]
+        self.collected_github_links = url_sets["github_links"]
+        self.urls_to_visit.load_seen(url_sets["seen"])
+        self.logger.info(f"{len(self.visited_urls)} besuchte URLs aus dem Sidecar-Index '{self.files['url_index']}' übernommen.")
+        return watermark
+
+    def save_url_index(self):
+        """Schreibt die kompakten URL-Mengen mit dem Wasserstand des Checkpoints in den Sidecar-Index."""
+        self.checkpoint.commit()
+        save_url_index(self.files["url_index"], {
+            "visited": self.visited_urls,
+            "unreachable": self.unreachable_urls,
+            "github_links": self.collected_github_links,
+            "seen": self.urls_to_visit.seen,
+        }, self.checkpoint.url_index_watermark())
+
+    def load_shared_state(self):
+        """Verteilter Crawl: die Frontier liegt im gemeinsamen Backend, der Checkpoint hält nur den Stand dieses Workers."""
+        if self.checkpoint.has_state():
+            self.load_checkpoint_state()
+        if self.site["incremental_recrawl"]:
+            self.logger.warning("Inkrementeller Recrawl wird im verteilten Crawl nicht unterstützt und übersprungen.")
+        self.enqueue(self.base_url, priority=PRIORITY_SEED)
+        stats = self.shared_frontier.stats()
+        self.logger.info(
+            f"Gemeinsame Frontier ({self.shared_frontier.describe()}, Worker {self.runner.worker_id}): "
+            f"{stats['pending']} offen, {stats['leased']} in Arbeit, {stats['done']} fertig."
+        )
+
+    def start_incremental_recrawl(self):
+        """Reiht alle bisher besuchten URLs erneut ein, um sie mit Conditional Requests zu prüfen.
+
+        Wird nur gestartet, wenn der vorherige Lauf vollständig ist; ein abgebrochener
+        Recrawl wird danach wie jeder andere Lauf aus dem Checkpoint fortgesetzt.
+        """
+        previous_urls = [url for url, _ in self.checkpoint.load_visited()]
+        self.logger.info(f"Starte inkrementellen Recrawl für {len(previous_urls)} bereits besuchte URLs.")
+
+        self.checkpoint.reset_visited()
+        self.visited_urls.clear()
+        self.unreachable_urls.clear()
+        self.failed_attempts.clear()
+        self.urls_to_visit.clear()
+        # Unerreichbare URLs werden mit geprüft; die Datei wird im neuen Lauf neu befüllt
+        open(self.files["unreachable"], 'w', encoding='utf-8').close()
+
+        self.enqueue(self.base_url, priority=PRIORITY_SEED)
+        for url in previous_urls:
+            self.enqueue(url)
+        self.checkpoint.commit()
+
+    def seed_frontier(self, engine):
+        """Befüllt die Frontier vor dem Crawl aus Sitemaps, Sphinx-Inventar und Doxygen-Indexseiten.
+
+        Es gelten dieselben Regeln wie bei der Link-Discovery (innerhalb von base_url, keine
+        ignorierten Dateiendungen, robots.txt). Die URLs werden eingereiht, sobald sie gelesen sind.
+        Die Quellen werden über die Session der FetchEngine geladen, mit denselben Headern und
+        demselben Mindestabstand pro Host wie der Crawl.
+        """
+        sitemaps = [urljoin(self.base_url, path) for path in self.site["seed_sitemaps"]]
+        sitemaps += [url for url in (self.rp.site_maps() or []) if url not in sitemaps]
+        inventories = [urljoin(self.base_url, path) for path in self.site["seed_sphinx_inventories"]]
+        doxygen_index_pages = [urljoin(self.base_url, path) for path in self.site["seed_doxygen_index_pages"]]
+
+        def on_error(url, e):
+            self.logger.info(f"Seeding-Quelle {url} nicht verfügbar oder fehlerhaft: {e}")
+
+        seed_counts = self.url_origin_stats["seeded"]
+        seeder = UrlSeeder(engine.session, HTTP_TIMEOUT, on_error=on_error,
+                           headers=HEADERS, before_request=engine.wait_for_host_sync)
+        for source, url, referrer in seeder.iter_seeds(sitemaps, inventories, doxygen_index_pages):
+            seed_counts.setdefault(source, 0)
+            doc_links, _ = classify_links((url,), referrer, self.extraction_settings)
+            for full_url in doc_links:
+                if not self.rp.can_fetch(HEADERS['User-Agent'], full_url):
+                    continue
+                self.seeded_urls.setdefault(normalize_url(full_url), (full_url, source))
+                if full_url not in self.visited_urls and self.enqueue(full_url):
+                    seed_counts[source] += 1
+        self.checkpoint.commit()
+
+        per_source = ", ".join(f"{source}: {count}" for source, count in seed_counts.items()) or "keine Quelle verfügbar"
+        self.logger.info(f"URL-Seeding: {len(self.seeded_urls)} Seiten in den Inventaren, {sum(seed_counts.values())} neu eingereiht ({per_source}).")
+
+    def find_orphaned_urls(self):
+        """Seiten aus Sitemaps/Inventaren, auf die keine verarbeitete Seite verlinkt (nur nach vollständigem Crawl sinnvoll)."""
+        linked = {normalize_url(self.base_url)}
+        linked.update(normalize_url(url) for url in self.checkpoint.iter_linked_urls())
+        return [(url, source) for key, (url, source) in self.seeded_urls.items() if key not in linked]
+
+    def print_status(self):
+        # --- Initialer Status-Output auf Konsole (für sofortiges Feedback) ---
+        print(f"\n--- Aktueller Crawler-Status {self.status_prefix}---")
+        print(f"Gesamt-URLs in Datei (visited_urls): {len(self.visited_urls)}")
+        print(f"URLs in der Warteschlange (urls_to_visit): {len(self.urls_to_visit)}")
+        print(f"Neu verarbeitete Seiten im aktuellen Lauf (inkl. geladener): {self.newly_processed_count}")
+        print("----------------------------------\n")
+
+    # --- Verarbeitung der Extraktionsergebnisse (Hauptprozess) ---
+    def check_duplicate(self, current_url, content, replaces_previous):
+        """Prüft einen Inhalt vor dem Schreiben; gibt (kind, digest) zurück (kind None = neu, "exact" oder "near")."""
+        if self.deduplicator is None:
+            return None, None
+        if replaces_previous:
+            # Der alte Inhalt dieser Seite wird ersetzt und gilt nicht mehr als Original
+            self.deduplicator.release(self.checkpoint.pop_content_digests(current_url))
+        duplicate_kind, original_url, digest = self.deduplicator.check(current_url, content)
+        if duplicate_kind:
+            self.dedup_stats[duplicate_kind] += 1
+            self.metrics.count("pages_skipped", label=f"duplicate_{duplicate_kind}")
+            self.dedup_stats["bytes_dropped"] += len(content.encode('utf-8'))
+            relation = "identisch mit" if duplicate_kind == "exact" else "sehr ähnlich zu"
+            self.logger.info(f"Inhalt von {current_url} ist {relation} {original_url}. Nicht gespeichert.")
+        return duplicate_kind, digest
+
+    def apply_page_result(self, current_url, result, fetch_info=None):
+        """Übernimmt das Ergebnis eines Parse-Workers in den Crawler-Zustand.
+
+        `fetch_info` enthält Validatoren und Body-Hash der Antwort; ist es gesetzt, werden
+        sie zusammen mit dem Inhalts-Hash im Checkpoint gespeichert.
+        """
+        logger = self.logger
+        checkpoint = self.checkpoint
+        metrics = self.metrics
+
+        if result["warning"]:
+            logger.warning(result["warning"])
+
+        # Links vor dem Abschluss der Seite einreihen: im verteilten Crawl könnte ein anderer
+        # Worker die gemeinsame Frontier sonst kurzzeitig für leer halten und sich beenden
+        new_links = []
+        for full_url in result["doc_links"]:
+            if self.rp.can_fetch(HEADERS['User-Agent'], full_url):
+                # Die Frontier kennt alle jemals eingereihten URLs (auch gerade geladene)
+                if full_url not in self.visited_urls:
+                    new_links.append(full_url)
             else:
-                logger.warning(f"Konnte Hauptinhalts-Div für {current_url} nicht finden (alle Selektoren fehlgeschlagen). Inhalt wird nicht gespeichert.")
-                visited_urls.add(current_url) 
-                continue 
-
-
-            # --- TEXTBEREINIGUNG START ---
-            # 1. Allgemeine Kodierungs- und Sonderzeichenbereinigung
-            text_content = text_content.replace('ïƒ', '') 
-            text_content = text_content.replace('â€™', "'") 
-            text_content = text_content.replace('â€œ', '"').replace('â€', '"') 
-            text_content = text_content.replace('â€“', '-') 
-            text_content = text_content.replace('â€¢', '-') 
-            text_content = text_content.replace('\u200b', '').replace('\u00a0', ' ') # Unicode Zero Width Space, Non-breaking Space
-            
-            # 2. Spezifische Bereinigung für Doxygen Source-Dateien (.h_source.html, .c_source.html)
-            if "doxygen/html/" in current_url and "_source.html" in current_url:
-                lines = text_content.splitlines()
-                cleaned_source_lines = []
-                
-                in_doxygen_source_header = True
-                in_doxygen_source_footer = False
-                
-                for line in lines:
-                    stripped_line = line.strip()
-
-                    if in_doxygen_source_header:
-                        if re.match(r'^\d*\s*\/\*.*Copyright \(c\).*', stripped_line) or stripped_line == "Go to the documentation of this file.":
-                            continue # Überspringe diese Zeile
-                        if re.match(r'^\d*\s*#ifndef', stripped_line) or re.match(r'^\d*\s*#define', stripped_line) or re.match(r'^\d*\s*\w+\s+\w+', stripped_line):
-                            in_doxygen_source_header = False
-                            # Wenn es eine Zeilennummer hat, entfernen wir sie
-                            if stripped_line and stripped_line[0].isdigit() and (' ' in stripped_line or '\t' in stripped_line):
-                                parts = stripped_line.split(' ', 1)
-                                if len(parts) > 1 and parts[0].isdigit():
-                                    cleaned_source_lines.append(parts[1])
-                                else:
-                                    cleaned_source_lines.append(line)
-                            else:
-                                cleaned_source_lines.append(line)
-                            continue
-                        else:
-                            continue 
-                    
-                    if re.match(r'^(Definition|Flags|Size)\n', line) or \
-                       re.match(r'^[a-zA-Z_]+\s*$', line) or \
-                       (re.match(r'^.*\.h:[\d]+$', line) and not in_doxygen_source_header): 
-                        in_doxygen_source_footer = True
-
-                    if in_doxygen_source_footer:
-                        continue 
-
-                    if stripped_line and stripped_line[0].isdigit() and (' ' in stripped_line or '\t' in stripped_line):
-                        parts = stripped_line.split(' ', 1)
-                        if len(parts) > 1 and parts[0].isdigit():
-                            cleaned_source_lines.append(parts[1])
-                        else: 
-                            cleaned_source_lines.append(line)
-                    else:
-                        cleaned_source_lines.append(line)
-                
-                text_content = '\n'.join(cleaned_source_lines)
-                
-                last_endif_index = text_content.rfind('#endif') 
-                if last_endif_index != -1:
-                    end_of_endif_line = text_content.find('\n', last_endif_index)
-                    if end_of_endif_line != -1:
-                        text_content = text_content[:end_of_endif_line].strip() 
-                    else: 
-                        text_content = text_content[:last_endif_index + len('#endif')].strip()
-                
-                lines = text_content.splitlines()
-                footer_patterns = [
-                    r'Definition\n.*?:[\d]+', 
-                    r'Definition\n.*', 
-                    r'^\s*$', 
-                    r'Macro utilities\.?$', 
-                    r'BSD Sockets compatible API definitions\.?$', 
-                    r'Generic sockaddr struct\.?$',
-                    r'Message struct\.?$'
-                ]
-                cut_index = len(lines)
-                for i in range(len(lines) - 1, -1, -1):
-                    line = lines[i].strip()
-                    if not line: 
-                        continue
-                    
-                    found_pattern = False
-                    for pattern in footer_patterns:
-                        if re.match(pattern, line): 
-                            found_pattern = True
-                            break
-                    
-                    if found_pattern:
-                        cut_index = i 
-                    else:
-                        break 
-
-                if cut_index < len(lines):
-                    text_content = '\n'.join(lines[:cut_index]).strip()
-                
-                text_content = '\n'.join(filter(None, text_content.splitlines())).strip()
-
-            # --- ENDE DER TEXTBEREINIGUNG ---
-
-
-            # Mindestlängenprüfung und Speichern des Segments
-            if len(text_content) < MIN_CONTENT_LENGTH:
-                logger.warning(f"Inhalt von {current_url} ist zu kurz ({len(text_content)} Zeichen) oder leer nach Bereinigung. Nicht gespeichert.")
-                visited_urls.add(current_url) 
-                continue 
-            
-            path_part = urlparse(current_url).path.strip('/').replace('/', '_').replace('.', '_')
-            unique_id = path_part if path_part else "homepage"
+                metrics.count("links_disallowed_by_robots")
+                logger.info(f"Link {full_url} (Doku) wird aufgrund von robots.txt-Regeln nicht gecrawlt.")
+        self.url_origin_stats["discovered"] += self.enqueue_many(new_links)
+
+        content_hash = None
+        previous_state = None
+        duplicate_kind = content_digest = None
+        if result["content"] is not None or result["warning"]: # Inhalt wurde extrahiert (nicht nur Links)
+            previous_state = checkpoint.get_page_state(current_url)
+        # Segment eines früheren Laufs, das dieses Ergebnis ersetzt oder entfernt
+        has_previous_segment = bool(previous_state and previous_state["content_hash"])
+        if result["content"] is not None:
+            content_hash = hash_content(result["title"], result["content"])
+            if not (has_previous_segment and previous_state["content_hash"] == content_hash):
+                dedup_started = time.perf_counter()
+                duplicate_kind, content_digest = self.check_duplicate(current_url, result["content"], bool(previous_state))
+                metrics.observe("dedup", time.perf_counter() - dedup_started)
+
+        if has_previous_segment and previous_state["content_hash"] == content_hash:
+            # Inhalt unverändert (z.B. nur Build-Zeitstempel im HTML geändert): kein neues Segment
+            self.recrawl_stats["unchanged_content"] += 1
+            metrics.count("pages_skipped", label="unchanged_content")
+            self.mark_visited(current_url)
+        elif duplicate_kind:
+            # Duplikat einer anderen Seite: ohne Inhalts-Hash, damit ein Recrawl die Seite erneut prüft
+            content_hash = None
+            if has_previous_segment:
+                self.remove_previous_segment(current_url)
+            self.mark_visited(current_url)
+        elif result["content"] is not None:
+            if has_previous_segment:
+                self.recrawl_stats["updated"] += 1
 
             data_segment = {
-                "id": unique_id,
+                "id": segment_id(current_url),
                 "url": current_url,
-                "title": page_title,
-                "content": text_content,
-                "source": f"{PROJECT_NAME}_docs", 
+                "title": result["title"],
+                "content": result["content"],
+                "source": f"{self.project_name}_docs",
                 "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
             }
 
-            with open(jsonl_output_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(data_segment, ensure_ascii=False) + '\n')
-
-            visited_urls.add(current_url)
-            newly_processed_count += 1
-            
-            if newly_processed_count % 500 == 0: 
-                logger.info(f"Fortschritts-Update: Neu verarbeitete Seiten (im aktuellen Lauf): {newly_processed_count} | URLs in der Warteschlange (urls_to_visit): {len(urls_to_visit)} | Gesamt bereits in Datei (visited_urls): {len(visited_urls)}")
-        
-        # === Link-Discovery (IMMER ausführen nach erfolgreichem Download & Parse) ===
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            full_url = urljoin(current_url, href)
-
-            parsed_full_url = urlparse(full_url)
-            full_url_domain = parsed_full_url.netloc
-            path_without_query_fragment = parsed_full_url.path
-            _, file_extension = os.path.splitext(path_without_query_fragment)
-            file_extension = file_extension.lower()
-            
-            if not file_extension and '.' not in os.path.basename(path_without_query_fragment): 
-                if 'kconfig' in os.path.basename(path_without_query_fragment).lower():
-                    file_extension = 'kconfig' 
-
-            is_zephyr_doc_link = (full_url_domain == urlparse(base_url).netloc and full_url.startswith(base_url))
-            
-            is_github_link = False
-            if full_url_domain in GITHUB_DOMAINS:
-                if file_extension in GITHUB_FILE_EXTENSIONS or \
-                   (not file_extension and 'kconfig' in os.path.basename(path_without_query_fragment).lower()):
-                    is_github_link = True
-
-            if file_extension in IGNORED_EXTENSIONS or "#" in full_url:
-                continue 
-
-            if is_zephyr_doc_link:
-                if rp.can_fetch(HEADERS['User-Agent'], full_url): 
-                    if full_url not in visited_urls and full_url not in urls_to_visit: 
-                        urls_to_visit.append(full_url)
-                else:
-                    logger.info(f"Link {full_url} (Zephyr-Doku) wird aufgrund von robots.txt-Regeln nicht gecrawlt.")
-            elif is_github_link:
-                if full_url not in collected_github_links:
-                    github_data_segment = {
-                        "url": full_url,
-                        "source_page": current_url, 
-                        "timestamp_collected": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                        "file_extension": file_extension 
-                    }
-                    with open(github_links_output_file, 'a', encoding='utf-8') as f_github_links:
-                        f_github_links.write(json.dumps(github_data_segment, ensure_ascii=False) + '\n')
-                    collected_github_links.add(full_url)
-                    logger.info(f"GitHub-Link gesammelt: {full_url} (von {current_url})")
-            else:
-                logger.debug(f"Ignoriere externen Link (nicht Zephyr, nicht GitHub): {full_url}")
-    
-    except requests.exceptions.RequestException as e:
-        logger.error(f"FEHLER beim Crawling (HTTP/Network) von {current_url}: {e}")
-        
-        failed_attempts[current_url] = failed_attempts.get(current_url, 0) + 1
-        
-        if failed_attempts[current_url] < MAX_RETRIES:
-            urls_to_visit.append(current_url) 
-            logger.info(f"URL {current_url} erneut zur Warteschlange hinzugefügt ({failed_attempts[current_url]}/{MAX_RETRIES} Versuch).")
-            time.sleep(5) 
+            self.segment_writer.write(data_segment)
+            metrics.count("segments_written")
+            if content_digest is not None:
+                checkpoint.record_content_digest(content_digest, current_url)
+
+            self.mark_visited(current_url)
+            self.newly_processed_count += 1
+
+            if self.newly_processed_count % 500 == 0:
+                logger.info(f"Fortschritts-Update: Neu verarbeitete Seiten (im aktuellen Lauf): {self.newly_processed_count} | URLs in der Warteschlange (urls_to_visit): {len(self.urls_to_visit)} | Gesamt bereits in Datei (visited_urls): {len(self.visited_urls)}")
+        else:
+            # Auch Seiten ohne verwertbaren Inhalt gelten als besucht
+            if result["warning"]:
+                metrics.count("pages_skipped", label="no_content")
+            if has_previous_segment:
+                self.remove_previous_segment(current_url)
+            self.mark_visited(current_url)
+
+        # Outlinks sichern, damit ein Neustart die Seite nicht erneut laden muss
+        checkpoint.record_outlinks(current_url, result["doc_links"], result["github_links"])
+        if fetch_info is not None:
+            checkpoint.record_page_state(current_url, content_hash=content_hash, **fetch_info)
+
+        for full_url, file_extension in result["github_links"]:
+            if full_url in self.collected_github_links:
+                continue
+            self.collected_github_links.add(full_url)
+            if self.shared_frontier is not None and not self.shared_frontier.add_github_link(full_url):
+                continue # schon von einem anderen Worker gesammelt
+            github_data_segment = {
+                "url": full_url,
+                "source_page": current_url,
+                "timestamp_collected": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "file_extension": file_extension
+            }
+            self.github_links_writer.write(github_data_segment)
+            checkpoint.record_github_link(full_url)
+            logger.info(f"GitHub-Link gesammelt: {full_url} (von {current_url})")
+
+    def remove_previous_segment(self, current_url):
+        """Merkt das Segment eines früheren Laufs zum Entfernen vor (siehe compact_segments()).
+
+        Inhalts-Hash und Dedup-Einträge der Seite werden vergessen: ein späterer Recrawl schreibt
+        sie neu, und andere Seiten gelten nicht mehr als Duplikat ihres alten Inhalts.
+        """
+        self.recrawl_stats["removed"] += 1
+        self.removed_segment_urls.add(normalize_url(current_url))
+        self.checkpoint.clear_content_hash(current_url)
+        digests = self.checkpoint.pop_content_digests(current_url)
+        if self.deduplicator is not None:
+            self.deduplicator.release(digests)
+        self.logger.info(f"Segment von {current_url} aus dem vorherigen Lauf wird entfernt.")
+
+    def apply_unchanged_page(self, current_url, page_state, not_modified):
+        """Übernimmt eine unveränderte Seite ohne Parsen: die Links kommen aus dem Checkpoint."""
+        if not_modified:
+            self.recrawl_stats["not_modified"] += 1
+            self.recrawl_stats["bytes_not_transferred"] += page_state["body_size"] or 0
         else:
-            logger.warning(f"URL {current_url} hat maximale Wiederholungsversuche ({MAX_RETRIES}) erreicht. Ignoriere sie dauerhaft.")
-            unreachable_urls.add(current_url) 
-            visited_urls.add(current_url) 
-        
-    except Exception as e:
-        logger.error(f"UNERWARTETER FEHLER für {current_url}: {e}")
-        visited_urls.add(current_url)
-        unreachable_urls.add(current_url) 
-
-
-# --- Finale Aktionen nach dem Crawling ---
-print("\n") 
-logger.info(f"Crawling der Zephyr-Dokumentation abgeschlossen. Daten gespeichert in: {jsonl_output_file}")
-
-if unreachable_urls:
-    logger.info(f"Speichere {len(unreachable_urls)} unerreichbare URLs in: {unreachable_urls_file}")
-    with open(unreachable_urls_file, 'w', encoding='utf-8') as f_unreachable:
-        for url in unreachable_urls:
-            unreachable_data = {
-                "url": url,
-                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                "reason": f"Failed after {MAX_RETRIES} attempts (last error logged)",
+            self.recrawl_stats["unchanged_body"] += 1
+        self.metrics.count("pages_skipped", label="not_modified" if not_modified else "unchanged_body")
+        self.recrawl_stats["bytes_not_parsed"] += page_state["body_size"] or 0
+
+        doc_links, github_links = self.checkpoint.get_outlinks(current_url) or ([], [])
+        self.apply_page_result(current_url, {
+            "title": None,
+            "content": None,
+            "warning": None,
+            "doc_links": doc_links,
+            "github_links": github_links,
+        })
+
+    def mark_failed(self, current_url, e):
+        """Generische Fehlerbehandlung: URL dauerhaft als unerreichbar markieren."""
+        self.logger.error(f"UNERWARTETER FEHLER für {current_url}: {e}")
+        self.mark_unreachable(current_url, f"Unexpected error: {e}")
+
+    def schedule_retry(self, current_url, e):
+        """Legt eine fehlgeschlagene URL in die Verzögerungs-Queue oder gibt sie endgültig auf."""
+        attempts = self.failed_attempts[current_url]
+        if attempts >= MAX_RETRIES:
+            self.logger.warning(f"URL {current_url} hat maximale Wiederholungsversuche ({MAX_RETRIES}) erreicht. Ignoriere sie dauerhaft.")
+            self.mark_unreachable(current_url, f"Failed after {attempts} attempts: {e}")
+            return
+
+        delay = None
+        response = getattr(e, 'response', None)
+        if response is not None and response.status_code in (429, 503):
+            delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = self.retry_scheduler.backoff_delay(attempts)
+        # Die URL bleibt im Checkpoint in der Frontier und wird nach einem Neustart sofort erneut versucht
+        self.retry_scheduler.schedule(current_url, delay)
+        self.circuit_breaker.finish_trial(urlparse(current_url).netloc, current_url)
+        self.metrics.count("retries")
+        self.logger.info(f"URL {current_url} wird in {delay:.1f} s erneut versucht ({attempts}/{MAX_RETRIES} Versuch).")
+
+    async def fetch_url(self, engine, current_url):
+        """Lädt eine URL und legt die rohen Bytes in die Parse-Queue.
+
+        Ist die Queue voll, wartet dieser Task (Backpressure) und hält damit seinen
+        Fetch-Slot belegt, sodass keine weiteren Seiten geladen werden.
+        """
+        handed_over = False
+        try:
+            # Gibt es Validatoren aus einem früheren Lauf, wird nur bei Änderungen übertragen
+            page_state = self.checkpoint.get_page_state(current_url)
+            host = urlparse(current_url).netloc
+            response = await engine.fetch(current_url, headers=conditional_headers(page_state) if page_state else None)
+            self.metrics.count("http_status", label=response.status_code)
+            if response.status_code < 500 and response.status_code != 429:
+                # Der Host antwortet wieder: geparkte URLs zurück in die Frontier
+                for parked_url in self.circuit_breaker.record_success(host):
+                    self.urls_to_visit.requeue(parked_url)
+            response.raise_for_status()
+
+            if response.status_code == 304 and page_state:
+                self.apply_unchanged_page(current_url, page_state, not_modified=True)
+                return
+
+            content = response.content
+            self.metrics.count("bytes_downloaded", len(content))
+            fetch_info = {
+                "etag": response.headers.get('ETag'),
+                "last_modified": response.headers.get('Last-Modified'),
+                "body_hash": hashlib.sha256(content).hexdigest(),
+                "body_size": len(content),
             }
-            f_unreachable.write(json.dumps(unreachable_data, ensure_ascii=False) + '\n')
-else:
-    logger.info("Keine unerreichbaren URLs während des Crawlings gefunden.")
+            if page_state and page_state["body_hash"] == fetch_info["body_hash"]:
+                # Server ignoriert die Validatoren, der Body ist aber identisch: nicht erneut parsen
+                self.checkpoint.record_page_state(current_url, **fetch_info)
+                self.apply_unchanged_page(current_url, page_state, not_modified=False)
+                return
+
+            # Nur der Zeichensatz aus dem Header; fehlt er, bestimmt ihn der Parse-Worker aus den Bytes
+            charset = header_charset(response.headers.get('Content-Type'))
+            await self.parse_queue.put((current_url, content, charset, fetch_info, time.perf_counter()))
+            handed_over = True
+
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"FEHLER beim Crawling (HTTP/Network) von {current_url}: {e}")
+            if getattr(e, 'response', None) is None:
+                self.metrics.count("network_errors", label=type(e).__name__)
+
+            self.failed_attempts[current_url] = self.failed_attempts.get(current_url, 0) + 1
+            self.checkpoint.record_failure(current_url, self.failed_attempts[current_url])
+
+            if is_host_failure(e) and self.circuit_breaker.record_failure(urlparse(current_url).netloc):
+                self.logger.warning(f"Host {urlparse(current_url).netloc} antwortet nicht zuverlässig. Pausiere ihn für {CIRCUIT_BREAKER_COOLDOWN} s.")
+            self.schedule_retry(current_url, e)
+
+        except ResponseRejected as e:
+            self.logger.info(f"Seite {current_url} übersprungen: {e}")
+            self.metrics.count("pages_skipped", label=e.reason)
+            self.mark_unreachable(current_url, f"Skipped: {e}")
+            # Der Host hat geantwortet (auch wenn es eine Probe-Anfrage des Circuit-Breakers war)
+            for parked_url in self.circuit_breaker.record_success(urlparse(current_url).netloc):
+                self.urls_to_visit.requeue(parked_url)
+
+        except Exception as e:
+            self.mark_failed(current_url, e)
+
+        finally:
+            # Nach der Übergabe an die Parse-Queue ist der Parse-Worker für die URL zuständig
+            if not handed_over:
+                self.urls_in_progress.discard(current_url)
+                self.checkpoint.maybe_commit()
+
+    async def parse_worker(self, process_pool, progress):
+        """Holt geladene Seiten aus der Queue und lässt sie im Prozess-Pool verarbeiten.
+
+        Ist PROFILE_EVERY_N_PAGES gesetzt, läuft jede N-te Seite im Worker unter dem Profiler.
+        """
+        loop = asyncio.get_running_loop()
+        metrics = self.metrics
+        while True:
+            current_url, content, encoding, fetch_info, queued_at = await self.parse_queue.get()
+            try:
+                started = time.perf_counter()
+                metrics.observe("parse_queue", started - queued_at)
+                args = (current_url, content, encoding, self.extraction_settings, current_url not in self.visited_urls, True)
+                profile_path = self.runner.next_profile_path(current_url)
+                if profile_path:
+                    result = await loop.run_in_executor(process_pool, run_profiled, PROFILER, profile_path, extract_page, *args)
+                else:
+                    result = await loop.run_in_executor(process_pool, extract_page, *args)
+                applied = time.perf_counter()
+                metrics.observe("worker", applied - started)
+                metrics.observe_all(result.pop("timings"))
+                self.apply_page_result(current_url, result, fetch_info)
+                metrics.observe("write", time.perf_counter() - applied)
+            except Exception as e:
+                self.mark_failed(current_url, e)
+            finally:
+                self.urls_in_progress.discard(current_url)
+                self.parse_queue.task_done()
+                self.checkpoint.maybe_commit()
+                progress.set()
+
+    # --- Haupt-Crawler-Logik ---
+    async def crawl(self, engine, process_pool):
+        """Pipeline: Fetch-Tasks -> begrenzte Parse-Queue -> Prozess-Pool für Extraktion.
+
+        Läuft, bis die Warteschlange leer ist und keine URL mehr geladen, geparst, für einen
+        Wiederholungsversuch vorgemerkt oder wegen eines pausierten Hosts geparkt ist. Die
+        gemeinsame FetchEngine begrenzt die Anfragen aller Seiten zusammen. Im verteilten
+        Crawl holt der Worker neue URLs aus der gemeinsamen Frontier und endet erst, wenn
+        auch dort keine URL mehr offen oder bei einem anderen Worker in Arbeit ist.
+        """
+        self.parse_queue = asyncio.Queue(maxsize=PARSE_QUEUE_SIZE)
+        progress = asyncio.Event()
+        fetch_tasks = self.fetch_tasks
+        urls_to_visit = self.urls_to_visit
+        max_concurrent = self.runner.run_settings["max_concurrent_requests"]
+
+        def on_fetch_done(task):
+            fetch_tasks.discard(task)
+            progress.set()
+
+        parse_tasks = [asyncio.create_task(self.parse_worker(process_pool, progress)) for _ in range(PARSE_WORKERS)]
+        shared_frontier = self.shared_frontier
+        try:
+            while True:
+                now = time.monotonic()
+                # Fällige Wiederholungen und Probe-Anfragen für abgekühlte Hosts werden als Nächstes geladen
+                for url in self.retry_scheduler.pop_due(now) + self.circuit_breaker.release_trials(now):
+                    urls_to_visit.requeue(url, priority=PRIORITY_SEED)
+                if shared_frontier is not None and not urls_to_visit and len(fetch_tasks) < max_concurrent:
+                    self.claim_urls(max_concurrent)
+
+                if not (urls_to_visit or self.urls_in_progress or self.retry_scheduler or self.circuit_breaker.parked_count()):
+                    if shared_frontier is None or shared_frontier.is_finished():
+                        break
+
+                while urls_to_visit and len(fetch_tasks) < max_concurrent:
+                    current_url = urls_to_visit.pop()
+
+                    if current_url in self.unreachable_urls:
+                        self.logger.info(f"Überspringe dauerhaft unerreichbare URL: {current_url}")
+                        self.metrics.count("pages_skipped", label="unreachable")
+                        self.mark_visited(current_url, unreachable=True)
+                        continue
+
+                    host = urlparse(current_url).netloc
+                    if not self.circuit_breaker.allow(host, current_url, now):
+                        self.circuit_breaker.park(host, current_url)
+                        self.metrics.count("parked_by_circuit_breaker")
+                        continue
+
+                    self.total_urls_processed_in_this_run += 1
+
+                    print(f"{self.status_prefix}Verarbeitet: {self.total_urls_processed_in_this_run} | Queue: {len(urls_to_visit)} | Neu gesichert: {self.newly_processed_count} | Gesamt gesichert: {len(self.visited_urls)}    ", end='\r')
+
+                    self.urls_in_progress.add(current_url)
+                    task = asyncio.create_task(self.fetch_url(engine, current_url))
+                    fetch_tasks.add(task)
+                    task.add_done_callback(on_fetch_done)
+
+                # Warten auf ein fertiges Fetch/Parse-Ereignis oder bis zur nächsten fälligen Wiederholung
+                wake_times = [t for t in (self.retry_scheduler.next_due_in(), self.circuit_breaker.next_release_in()) if t is not None]
+                if shared_frontier is not None and not urls_to_visit:
+                    wake_times.append(SHARED_POLL_INTERVAL) # neue URLs anderer Worker abholen
+                if not (self.urls_in_progress or wake_times or urls_to_visit) and self.circuit_breaker.parked_count():
+                    # Nur noch geparkte URLs, aber keine Probe mehr unterwegs: Hosts erneut proben lassen statt zu hängen
+                    self.logger.warning("Probe-Anfrage ohne Ergebnis verloren; geparkte URLs werden erneut freigegeben.")
+                    self.circuit_breaker.reset_trials()
+                    continue
+                if self.urls_in_progress or wake_times:
+                    progress.clear()
+                    try:
+                        await asyncio.wait_for(progress.wait(), timeout=min(wake_times, default=None))
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            for task in parse_tasks:
+                task.cancel()
+            self.checkpoint.commit()
+
+    def finish_crawl(self):
+        # --- Finale Aktionen nach dem Crawling ---
+        logger = self.logger
+        print("\n")
+        logger.info(f"Crawling von {self.base_url} abgeschlossen. Daten gespeichert in: {self.files['segments']}")
+
+        if self.unreachable_urls:
+            # Die Datei wird laufend geschrieben, sobald eine URL als unerreichbar gilt
+            logger.info(f"{len(self.unreachable_urls)} unerreichbare URLs gespeichert in: {self.files['unreachable']}")
+        else:
+            logger.info("Keine unerreichbaren URLs während des Crawlings gefunden.")
+
+        seeded_count = sum(self.url_origin_stats["seeded"].values())
+        origin_summary = f"Neu eingereihte URLs: {seeded_count} aus dem Seeding, {self.url_origin_stats['discovered']} über Link-Discovery."
+        if self.seeded_urls and self.shared_frontier is None: # verteilt kennt jeder Worker nur seine eigenen Links
+            orphaned_urls = self.find_orphaned_urls()
+            with open(self.files["orphaned"], 'w', encoding='utf-8') as f:
+                for url, source in orphaned_urls:
+                    f.write(json.dumps({"url": url, "source": source}, ensure_ascii=False) + '\n')
+            origin_summary += f" {len(orphaned_urls)} Seiten aus Sitemap/Inventaren werden von keiner Seite verlinkt (siehe {os.path.basename(self.files['orphaned'])})."
+        logger.info(origin_summary)
+        print(self.status_prefix + origin_summary)
+
+        dedup_stats = self.dedup_stats
+        if any(dedup_stats.values()):
+            dedup_summary = (
+                f"Deduplizierung: {dedup_stats['exact']} identische und {dedup_stats['near']} sehr ähnliche Seiten nicht gespeichert "
+                f"({dedup_stats['bytes_dropped']} Bytes Inhalt eingespart)."
+            )
+            logger.info(dedup_summary)
+            print(self.status_prefix + dedup_summary)
+
+        recrawl_stats = self.recrawl_stats
+        if any(recrawl_stats.values()):
+            skipped_pages = recrawl_stats["not_modified"] + recrawl_stats["unchanged_body"] + recrawl_stats["unchanged_content"]
+            recrawl_summary = (
+                f"Inkrementeller Recrawl: {skipped_pages} Seiten unverändert übersprungen "
+                f"({recrawl_stats['not_modified']}x 304, {recrawl_stats['unchanged_body']}x gleicher Body, "
+                f"{recrawl_stats['unchanged_content']}x gleicher Inhalt), {recrawl_stats['updated']} Seiten aktualisiert, "
+                f"{recrawl_stats['removed']} entfernt (jetzt Duplikat oder ohne Inhalt). "
+                f"{recrawl_stats['bytes_not_transferred']} Bytes nicht übertragen, {recrawl_stats['bytes_not_parsed']} Bytes nicht erneut geparst."
+            )
+            logger.info(recrawl_summary)
+            print(self.status_prefix + recrawl_summary)
+        if recrawl_stats["updated"] or self.removed_segment_urls:
+            self.compact_segments()
+
+        print(f"{self.status_prefix}Crawling von {self.base_url} abgeschlossen. {len(self.visited_urls)} URLs gesichert.")
+        print(f"Details finden Sie in der Log-Datei: {self.files['log']}")
+        print(f"Gesammelte GitHub-Links: {len(self.collected_github_links)}. Details in {os.path.basename(self.files['github_links'])}")
+        if self.shared_frontier is not None:
+            stats = self.shared_frontier.stats()
+            shared_summary = f"Gemeinsame Frontier abgearbeitet: {stats['done']} URLs von allen Workern. Ausgaben zusammenführen mit: python scripts/crawler/web_crawler.py --merge"
+            logger.info(shared_summary)
+            print(self.status_prefix + shared_summary)
+
+    def compact_segments(self):
+        """Entfernt nach einem Recrawl überholte und entfernte Seiten aus den Segmentdateien.
+
+        Pro normalisierter URL bleibt die letzte Zeile; Seiten aus `removed_segment_urls` (jetzt
+        Duplikat oder ohne Inhalt) fallen ganz weg. Die URL statt der Segment-ID ist der Schlüssel,
+        weil ältere Läufe die ID noch anders gebildet haben. Die kompaktierten Dateien entstehen
+        zuerst in einem temporären Ordner und ersetzen die bisherigen erst, wenn sie vollständig sind.
+        """
+        self.segment_writer.close()
+        segment_path = self.files["segments"]
+        old_files = self.segment_writer.existing_files()
+
+        latest = {} # normalisierte URL -> (Datei, Zeile) der letzten Version
+        line_count = 0
+        for file_index, segment_file in enumerate(old_files):
+            with open_text_lines(segment_file) as f:
+                for line_num, line in enumerate(f):
+                    latest[normalize_url(json.loads(line)["url"])] = (file_index, line_num)
+                    line_count += 1
+        removed = 0
+        for url in self.removed_segment_urls:
+            if latest.pop(url, None) is not None:
+                removed += 1
+        superseded = line_count - len(latest) - removed
+        if not superseded and not removed:
+            return
+        keep = set(latest.values())
+        del latest
+
+        # Gleicher Dateiname im temporären Ordner: die neuen Dateien heißen wie die alten (inkl. Shard-Nummer)
+        tmp_dir = os.path.join(os.path.dirname(segment_path), f".{os.path.basename(segment_path)}.compact")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        writer = SegmentWriter(
+            os.path.join(tmp_dir, os.path.basename(segment_path)),
+            batch_size=SEGMENT_BATCH_SIZE,
+            flush_interval=SEGMENT_FLUSH_INTERVAL,
+            compression=self.site["segment_compression"],
+            shard_size_mb=self.site["segment_shard_size_mb"],
+        )
+        try:
+            for file_index, segment_file in enumerate(old_files):
+                with open_text_lines(segment_file) as f:
+                    for line_num, line in enumerate(f):
+                        if (file_index, line_num) in keep:
+                            writer.write(json.loads(line))
+            writer.sync()
+        finally:
+            writer.close()
+
+        new_files = writer.existing_files()
+        new_names = {os.path.basename(path) for path in new_files}
+        for path in new_files:
+            os.replace(path, os.path.join(os.path.dirname(segment_path), os.path.basename(path)))
+        for path in old_files:
+            if os.path.basename(path) not in new_names:
+                os.remove(path)
+        os.rmdir(tmp_dir)
+
+        compact_summary = (
+            f"Segmentdateien kompaktiert: {superseded} überholte Versionen geänderter Seiten und {removed} Segmente "
+            f"entfallener Seiten entfernt, {len(keep)} Segmente behalten."
+        )
+        self.logger.info(compact_summary)
+        print(self.status_prefix + compact_summary)
+
+
+class CrawlRunner:
+    """Crawlt eine oder mehrere Seiten gleichzeitig in einem Prozess.
+
+    Alle Seiten teilen sich die FetchEngine (eine Session mit Connection-Pool, gemeinsames
+    Limit MAX_CONCURRENT_REQUESTS, Höflichkeitsregeln pro Host), den Prozess-Pool der
+    Parse-Worker, den robots.txt-Cache (eine robots.txt pro Host) und die Metriken.
+    Mit `shared_frontier` (siehe SHARED_FRONTIER) ist der Prozess ein Worker eines verteilten
+    Crawls und holt seine URLs aus der gemeinsamen Frontier jeder Seite. Mit `record_archive`
+    bzw. `replay_archive` (Ordner) werden alle Antworten aufgezeichnet bzw. aus dem Archiv gelesen.
+
+        runner = CrawlRunner([site_settings({"project_name": "sdk", "base_url": "https://.../"})])
+        runner.run()
+    """
+
+    def __init__(self, sites_config, run_settings=None, log_file=log_file_path,
+                 metrics_file=metrics_file, profile_dir=profile_dir, shared_frontier=None, worker_id=None,
+                 record_archive=None, replay_archive=None):
+        if record_archive and replay_archive:
+            raise ValueError("Aufzeichnen und Wiedergeben schließen sich aus.")
+        self.sites_config = sites_config
+        self.record_archive = record_archive
+        self.replay_archive = replay_archive
+        self.shared_frontier_spec = shared_frontier
+        self.worker_id = worker_id if worker_id or not shared_frontier else default_worker_id()
+        self.partition_by = SHARED_PARTITION_BY
+        if self.partition_by == "auto":
+            # Mehrere Hosts: jeder Host bleibt bei einem Worker; ein Host: URLs nach Pfad verteilen
+            hosts = {urlparse(site["base_url"]).netloc for site in sites_config}
+            self.partition_by = "host" if len(hosts) > 1 else "path"
+        elif self.partition_by not in PARTITION_BY:
+            raise ValueError(f"Unbekannte Partitionierung SHARED_PARTITION_BY = '{self.partition_by}' (erlaubt: auto, {', '.join(PARTITION_BY)}).")
+        self.run_settings = {**RUN_SETTING_DEFAULTS, **(run_settings or {})}
+        self.log_file = log_file
+        self.metrics_file = metrics_file
+        self.profile_dir = profile_dir
+        self.metrics = CrawlMetrics() # Zeiten pro Verarbeitungsschritt, Zähler und Füllstände
+        self.parsed_page_count = 0 # im aktuellen Lauf geparste Seiten (für PROFILE_EVERY_N_PAGES)
+        self.sites = [SiteCrawler(site, self) for site in sites_config]
+
+    def setup_environment(self):
+        """Legt die Zielordner an, richtet das Logging ein und öffnet die Dateien aller Seiten."""
+        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        os.makedirs(os.path.dirname(self.metrics_file), exist_ok=True)
+        if PROFILE_EVERY_N_PAGES:
+            resolve_profiler(PROFILER)
+            os.makedirs(self.profile_dir, exist_ok=True)
+
+        # --- Logging-Setup ---
+        log_format = '%(asctime)s - %(levelname)s - %(message)s'
+        if len(self.sites) > 1:
+            log_format = '%(asctime)s - %(levelname)s - %(name)s - %(message)s' # Logger-Name enthält das Projekt
+        logging.basicConfig(
+            level=logging.INFO, # Logge alle Meldungen ab INFO-Level
+            format=log_format,
+            handlers=[
+                logging.FileHandler(self.log_file, encoding='utf-8')
+            ]
+        )
+        for site in self.sites:
+            site.open()
+
+    def next_profile_path(self, current_url):
+        """Zählt die geparsten Seiten; für jede N-te Seite der Pfad der Profil-Datei, sonst None."""
+        self.parsed_page_count += 1
+        if not PROFILE_EVERY_N_PAGES or self.parsed_page_count % PROFILE_EVERY_N_PAGES:
+            return None
+        return os.path.join(self.profile_dir, f"{self.parsed_page_count:07d}-{segment_id(current_url)}{PROFILE_EXTENSIONS[PROFILER]}")
+
+    def register_gauges(self):
+        sites = self.sites
+        self.metrics.register_gauge("frontier", lambda: sum(len(site.urls_to_visit) for site in sites))
+        self.metrics.register_gauge("in_progress", lambda: sum(len(site.urls_in_progress) for site in sites))
+        self.metrics.register_gauge("fetch_tasks", lambda: sum(len(site.fetch_tasks) for site in sites))
+        self.metrics.register_gauge("parse_queue", lambda: sum(site.parse_queue.qsize() for site in sites if site.parse_queue is not None))
+        self.metrics.register_gauge("retry_pending", lambda: sum(len(site.retry_scheduler) for site in sites))
+        self.metrics.register_gauge("hosts_parked_urls", lambda: sum(site.circuit_breaker.parked_count() for site in sites))
+        self.metrics.register_gauge("visited", lambda: sum(len(site.visited_urls) for site in sites))
+        self.metrics.refresh_gauges()
+
+    async def refresh_gauges(self, interval):
+        """Liest die Füllstände alle `interval` Sekunden im Event-Loop; der Metrik-Endpunkt liefert nur diesen Stand."""
+        while True:
+            await asyncio.sleep(interval)
+            self.metrics.refresh_gauges()
+
+    async def report_metrics(self, interval):
+        """Schreibt alle `interval` Sekunden eine Momentaufnahme der Metriken."""
+        while True:
+            await asyncio.sleep(interval)
+            self.metrics.refresh_gauges()
+            self.metrics.write_snapshot(self.metrics_file)
+
+    async def renew_leases(self, interval):
+        """Verteilter Crawl: meldet den Worker regelmäßig als lebendig und verlängert seine Leases."""
+        while True:
+            await asyncio.sleep(interval)
+            for site in self.sites:
+                site.shared_frontier.heartbeat()
+                site.shared_frontier.renew(site.leased_urls)
+
+    async def crawl(self):
+        settings = self.run_settings
+        archive = None
+        if self.replay_archive:
+            archive = ResponseArchive(self.replay_archive)
+            logger.info(f"Wiedergabe aus dem Archiv {self.replay_archive} ({len(archive)} Antworten), kein Netzwerkzugriff.")
+        elif self.record_archive:
+            archive = ResponseArchive(self.record_archive, writable=True)
+            logger.info(f"Alle Antworten werden im Archiv {self.record_archive} aufgezeichnet.")
+        engine = FetchEngine(
+            HEADERS, HTTP_TIMEOUT,
+            max_concurrent=settings["max_concurrent_requests"],
+            max_per_host=settings["max_requests_per_host"],
+            # Bei der Wiedergabe wird kein Server angefragt: Höflichkeitsabstand entfällt
+            min_host_interval=0.0 if self.replay_archive else settings["min_request_interval_per_host"],
+            metrics=self.metrics,
+            max_body_bytes=settings["max_page_bytes"],
+            allowed_content_types=settings["allowed_content_types"],
+            archive=archive,
+            replay=bool(self.replay_archive),
+        )
+        process_pool = ProcessPoolExecutor(max_workers=settings["parse_workers"])
+
+        def on_robots_error(url, e):
+            logger.warning(f"FEHLER beim Laden oder Parsen der robots.txt {url}: {e}. Crawler wird für diesen Host ohne robots.txt-Regeln fortfahren.")
+
+        robots = RobotsCache(engine.session, HTTP_TIMEOUT, on_error=on_robots_error)
+        helper_tasks = []
+        metrics_server = None
+        try:
+            # Robots, vorheriger Stand und Seeding laufen über dieselbe Session wie der Crawl
+            for site in self.sites:
+                site.prepare(engine, robots)
+            logger.info(f"robots.txt für {len(robots)} Host(s) geladen.")
+
+            self.register_gauges()
+            if settings["metrics_port"]:
+                helper_tasks.append(asyncio.create_task(self.refresh_gauges(METRICS_GAUGE_INTERVAL)))
+            if self.shared_frontier_spec:
+                helper_tasks.append(asyncio.create_task(self.renew_leases(LEASE_SECONDS / 4)))
+            if METRICS_SNAPSHOT_INTERVAL:
+                helper_tasks.append(asyncio.create_task(self.report_metrics(METRICS_SNAPSHOT_INTERVAL)))
+            if settings["metrics_port"]:
+                metrics_server = MetricsServer(self.metrics, settings["metrics_port"])
+                logger.info(f"Metriken im Prometheus-Format unter http://{metrics_server.address[0]}:{metrics_server.address[1]}/metrics")
+
+            await asyncio.gather(*(site.crawl(engine, process_pool) for site in self.sites))
+        finally:
+            for task in helper_tasks:
+                task.cancel()
+            engine.close()
+            process_pool.shutdown(wait=True)
+            if archive is not None:
+                self.log_archive_summary(engine.adapter, archive)
+                archive.close()
+            if metrics_server is not None:
+                metrics_server.close()
+            if METRICS_SNAPSHOT_INTERVAL:
+                self.metrics.refresh_gauges()
+                self.metrics.write_snapshot(self.metrics_file)
+
+    def log_archive_summary(self, adapter, archive):
+        if self.replay_archive:
+            summary = f"Wiedergabe: {adapter.hits} Antworten aus dem Archiv, {adapter.misses} URLs nicht im Archiv."
+        else:
+            summary = f"Archiv {self.record_archive}: {len(archive)} Antworten, {archive.body_count()} verschiedene Bodys."
+        logger.info(summary)
+        print(f"\n{summary}")
+
+    def run(self):
+        self.setup_environment()
+        try:
+            asyncio.run(self.crawl())
+            for site in self.sites:
+                site.finish_crawl()
+            logger.info("Metriken des Laufs:\n" + "\n".join(self.metrics.summary_lines()))
+        finally:
+            # Auch bei Abbruch (Strg+C) Puffer schreiben und den Checkpoint abschließen
+            for site in self.sites:
+                site.close()
+
+
+def worker_ids(project_name):
+    """Worker, für die Ausgaben eines verteilten Crawls vorliegen (erkannt an ihren Checkpoints)."""
+    prefix, suffix = f"{project_name}_worker-", "_crawl_checkpoint.sqlite"
+    paths = glob.glob(os.path.join(DATA_DIR, f"{glob.escape(prefix)}*{suffix}"))
+    return sorted(os.path.basename(path)[len(prefix):-len(suffix)] for path in paths)
+
+
+def merge_jsonl_by_url(paths, target_path, skip_urls=()):
+    """Schreibt die Datensätze mehrerer JSONL-Dateien in eine, jede URL nur einmal; gibt die Anzahl zurück."""
+    seen_urls = set(skip_urls)
+    count = 0
+    with open(target_path, 'w', encoding='utf-8') as out:
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["url"] not in seen_urls:
+                        seen_urls.add(record["url"])
+                        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                        count += 1
+    return count
+
+
+def merge_worker_outputs(site):
+    """Führt die Ausgaben aller Worker eines verteilten Crawls zu den normalen Ausgabedateien zusammen.
+
+    Seiten, die nach einem abgelaufenen Lease von zwei Workern geladen wurden, und Inhalte,
+    die verschiedene Worker unter verschiedenen URLs gespeichert haben, werden nur einmal
+    übernommen. Bereits zusammengeführte Dateien werden ersetzt.
+    """
+    project_name = site["project_name"]
+    workers = worker_ids(project_name)
+    if not workers:
+        print(f"Keine Worker-Ausgaben für '{project_name}' in {DATA_DIR} gefunden.")
+        return
+
+    target = project_files(project_name)
+    compression = site["segment_compression"]
+    sharded = bool(site["segment_shard_size_mb"])
+    for path in segment_files(target["segments"], compression, sharded):
+        os.remove(path)
+
+    deduplicator = None
+    if site["dedup_segments"]:
+        near_index = None
+        if site["dedup_near_duplicates"]:
+            near_index = NearDuplicateIndex(threshold=NEAR_DUPLICATE_THRESHOLD, max_entries=NEAR_DUPLICATE_INDEX_SIZE)
+        deduplicator = ContentDeduplicator(near_index=near_index)
+
+    segment_writer = SegmentWriter(
+        target["segments"],
+        batch_size=SEGMENT_BATCH_SIZE,
+        flush_interval=SEGMENT_FLUSH_INTERVAL,
+        compression=compression,
+        shard_size_mb=site["segment_shard_size_mb"],
+    )
+    segment_ids = set()
+    segment_urls = set()
+    skipped = 0
+    try:
+        for worker in workers:
+            for segment_file in segment_files(project_files(project_name, worker)["segments"], compression, sharded):
+                with open_text_lines(segment_file) as f:
+                    for line in f:
+                        record = json.loads(line)
+                        if record["id"] in segment_ids or (deduplicator is not None and deduplicator.check(record["url"], record["content"])[0]):
+                            skipped += 1
+                            continue
+                        segment_ids.add(record["id"])
+                        segment_urls.add(record["url"])
+                        segment_writer.write(record)
+    finally:
+        segment_writer.close()
+
+    worker_files = [project_files(project_name, worker) for worker in workers]
+    # Eine URL, die erst nach mehreren Fehlversuchen bei einem anderen Worker klappte, gilt nicht als unerreichbar
+    unreachable_count = merge_jsonl_by_url([files["unreachable"] for files in worker_files], target["unreachable"], skip_urls=segment_urls)
+    github_count = merge_jsonl_by_url([files["github_links"] for files in worker_files], target["github_links"])
+
+    summary = (
+        f"{project_name}: Ausgaben von {len(workers)} Workern zusammengeführt: {len(segment_ids)} Segmente "
+        f"({skipped} doppelt), {unreachable_count} unerreichbare URLs, {github_count} GitHub-Links."
+    )
+    logger.info(summary)
+    print(summary)
+    print(f"Daten gespeichert in: {target['segments']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawlt eine oder mehrere Dokumentations-Seiten.")
+    parser.add_argument('--config', default=SITES_CONFIG_FILE, help="JSON-Datei mit mehreren Seiten (Standard: SITES_CONFIG_FILE)")
+    parser.add_argument('--shared', default=SHARED_FRONTIER, help="Verteilter Crawl: Backend der gemeinsamen Frontier (sqlite, sqlite:<ordner>, redis://...)")
+    parser.add_argument('--worker-id', default=WORKER_ID, help="Name dieses Workers im verteilten Crawl (Standard: <Rechnername>-<PID>)")
+    parser.add_argument('--merge', action='store_true', help="Ausgaben aller Worker eines verteilten Crawls zusammenführen")
+    archive_mode = parser.add_mutually_exclusive_group()
+    archive_mode.add_argument('--record', default=RECORD_ARCHIVE, metavar='ORDNER', help="Alle Antworten in diesem Ordner aufzeichnen")
+    archive_mode.add_argument('--replay', default=REPLAY_ARCHIVE, metavar='ORDNER', help="Ohne Netzwerk aus einem aufgezeichneten Archiv crawlen")
+    args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error("--record und --replay schließen sich aus (RECORD_ARCHIVE/REPLAY_ARCHIVE prüfen).")
+
+    if args.config:
+        run_settings, sites = load_sites_config(args.config)
+        run_name = os.path.splitext(os.path.basename(args.config))[0]
+    else:
+        run_settings, sites = None, [site_settings()]
+        run_name = PROJECT_NAME
+
+    if args.merge:
+        for site in sites:
+            merge_worker_outputs(site)
+        return
+
+    worker_id = None
+    if args.shared:
+        worker_id = args.worker_id or default_worker_id()
+        if not re.fullmatch(r'[A-Za-z0-9._-]+', worker_id):
+            parser.error(f"Ungültige Worker-ID '{worker_id}' (erlaubt: Buchstaben, Ziffern, '.', '_', '-').")
+        run_name = f"{run_name}_worker-{worker_id}"
+
+    runner = CrawlRunner(
+        sites, run_settings,
+        log_file=os.path.join(LOG_DIR, f"{run_name}_crawler_output.log"),
+        metrics_file=os.path.join(LOG_DIR, f"{run_name}_crawl_metrics.jsonl"),
+        profile_dir=os.path.join(LOG_DIR, f"{run_name}_profiles"),
+        shared_frontier=args.shared,
+        worker_id=worker_id,
+        record_archive=args.record,
+        replay_archive=args.replay,
+    )
+    runner.run()
+
 
-print(f"Crawling der Zephyr-Dokumentation abgeschlossen. {len(visited_urls)} URLs gesichert.")
-print(f"Details finden Sie in der Log-Datei: {log_file_path}")
-print(f"Gesammelte GitHub-Links: {len(collected_github_links)}. Details in {os.path.basename(github_links_output_file)}")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
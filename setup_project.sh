@@ -41,7 +41,7 @@ source "$VENV_NAME"/bin/activate
 echo "Generiere/Aktualisiere requirements.txt..."
 # Temporäre Installation, um requirements.txt zu generieren, falls nicht vorhanden
 # Wenn Sie requirements.txt manuell pflegen, entfernen Sie diese Zeilen
-pip install requests beautifulsoup4 lxml tqdm # Sicherstellen, dass Basis-Libs zum Generieren da sind
+pip install requests beautifulsoup4 lxml tqdm pytest # Sicherstellen, dass Basis-Libs zum Generieren da sind
 pip freeze > requirements.txt
 
 echo "Installiere Python-Bibliotheken aus requirements.txt..."
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Crawler-Module sind kein Paket; sie importieren sich gegenseitig über den Skriptordner
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts", "crawler"))
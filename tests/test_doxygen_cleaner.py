@@ -0,0 +1,117 @@
+"""
+Golden-Tests für doxygen_cleaner.clean_doxygen_source().
+
+Die erwarteten Ausgaben stammen von der früheren Bereinigung aus page_extractor.py; die
+neue Implementierung muss sie Zeichen für Zeichen reproduzieren. Die Laufzeit beider
+Varianten misst scripts/benchmarks/bench_doxygen_cleaner.py.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python -m pytest tests
+"""
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from doxygen_cleaner import clean_doxygen_source, is_doxygen_source_page
+from page_extractor import find_main_content
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts", "benchmarks", "corpus")
+
+KERNEL_H_SOURCE = """Go to the documentation of this file.
+1 /*
+2  * Copyright (c) 2016 Wind River Systems, Inc.
+3  *
+4  * SPDX-License-Identifier: Apache-2.0
+5  */
+6
+7 #ifndef ZEPHYR_INCLUDE_KERNEL_H_
+8 #define ZEPHYR_INCLUDE_KERNEL_H_
+9
+10 /**
+11  * @brief Start an inactive thread.
+12  */
+13 __syscall void k_thread_start(k_tid_t thread);
+14
+15 #endif /* ZEPHYR_INCLUDE_KERNEL_H_ */
+k_thread_start
+void k_thread_start(k_tid_t thread)
+Definition kernel.h:13
+Macro utilities."""
+
+# Zeilennummern vor fast leeren Zeilen ("9 ") bleiben stehen, der Kommentar nach dem letzten
+# #endif fällt weg: beides wie in der früheren Bereinigung
+KERNEL_H_CLEANED = """#ifndef ZEPHYR_INCLUDE_KERNEL_H_
+#define ZEPHYR_INCLUDE_KERNEL_H_
+9
+/**
+ * @brief Start an inactive thread.
+ */
+__syscall void k_thread_start(k_tid_t thread);
+14
+#endif"""
+
+# Name -> (Text aus dem Hauptinhalt der Seite, erwartete Ausgabe)
+GOLDEN_CASES = {
+    "kernel.h-Auszug": (KERNEL_H_SOURCE, KERNEL_H_CLEANED),
+    "leer": ("", ""),
+    "nur Kopfbereich": ("Go to the documentation of this file.\n1 /*\n2 * Copyright (c) 2020 Nordic\n*/", ""),
+    "kein #endif, Tooltips am Ende": (
+        "1 #ifndef A_H\n2 int x;\n\n   \nMacro utilities.\nGeneric sockaddr struct\n  \nMessage struct.",
+        "#ifndef A_H\nint x;",
+    ),
+    "#endif in letzter Zeile": ("1 #ifndef A_H\n2 #define A_H\n3 int a;\n4 #endif /* A_H */", "#ifndef A_H\n#define A_H\nint a;\n#endif"),
+    "#endif mit Folgezeilen": (
+        "1 #ifndef A_H\n2 int a;\n3 #endif /* A_H */\n4 int b;\nDefinition a.h:12",
+        "#ifndef A_H\nint a;\n#endif /* A_H */",
+    ),
+    "Footer über Bezeichner": ("  1 #ifndef A_H\n2 int a;\nk_sleep\n3 int b;\n4 #endif", "#ifndef A_H\nint a;"),
+    "Footer über Fundstelle": ("#define X 1\n2 int a;\nDefinition kernel.h:42\n3 int b;", "#define X 1\nint a;"),
+    "Definition-Muster ohne Wirkung": ("#define X 1\nDefinition\nSize\n2 int a;", "#define X 1"),
+    "CR/LF und Seitenvorschub": ("1 #ifndef A\r\n2 int a;\r\n\f3 int b;\r\n4 #endif\r\n", "#ifndef A\nint a;\nint b;\n#endif"),
+    "Tabs und Einrückung": (
+        "\t1\t#ifndef A\n   12\tint a;\n 13 static  int b;\n\n\n14   return;",
+        "1\t#ifndef A\n   12\tint a;\nstatic  int b;\n  return;",
+    ),
+    "Unicode-Ziffern": ("١ #define A\n² int a;\n٣ int b;\n4 #endif ١", "#define A\nint a;\nint b;\n#endif"),
+    "zwei Wörter beenden den Kopf": ("/* header */\nstatic int counter;\n2 int a;", "static int counter;\nint a;"),
+    "Leerzeilen im Rumpf": ("#ifndef A\n\n   \n2 int a;\n\n\n3 #endif\n\n", "#ifndef A\n   \nint a;\n#endif"),
+    "mehrere #endif": (
+        "#ifndef A\n#ifdef B\n#endif\nint x;\n#endif /* A */ trailing #endif x\nint y;",
+        "#ifndef A\n#ifdef B\n#endif\nint x;\n#endif /* A */ trailing #endif x",
+    ),
+}
+
+# Korpusseite kernel_8h_source.html: SHA-256 und Zeilenzahl der Ausgabe der früheren Bereinigung
+CORPUS_SOURCE_PAGE = "doxygen_source.html.gz"
+CORPUS_CLEANED_SHA256 = "765d4fad60abf3963a73b41e878be8dc7b33f3ba4d59c90124b8f511781a22a8"
+CORPUS_CLEANED_LINES = 28
+
+
+@pytest.mark.parametrize("text, expected", GOLDEN_CASES.values(), ids=GOLDEN_CASES.keys())
+def test_clean_doxygen_source_golden(text, expected):
+    assert clean_doxygen_source(text) == expected
+
+
+def test_clean_doxygen_source_corpus_page():
+    with open(os.path.join(CORPUS_DIR, "pages.json"), 'r', encoding='utf-8') as f:
+        url = json.load(f)[CORPUS_SOURCE_PAGE]
+    with gzip.open(os.path.join(CORPUS_DIR, CORPUS_SOURCE_PAGE), 'rt', encoding='utf-8') as f:
+        text_content, _ = find_main_content(BeautifulSoup(f.read(), 'html.parser'))
+
+    assert is_doxygen_source_page(url)
+    cleaned = clean_doxygen_source(text_content)
+    assert len(cleaned.splitlines()) == CORPUS_CLEANED_LINES
+    assert hashlib.sha256(cleaned.encode('utf-8')).hexdigest() == CORPUS_CLEANED_SHA256
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://docs.zephyrproject.org/latest/doxygen/html/kernel_8h_source.html", True),
+    ("https://docs.zephyrproject.org/latest/doxygen/html/group__thread__apis.html", False),
+    ("https://docs.zephyrproject.org/latest/kernel/services/threads/index.html", False),
+])
+def test_is_doxygen_source_page(url, expected):
+    assert is_doxygen_source_page(url) is expected
@@ -0,0 +1,146 @@
+"""
+Tests für die Kompaktierung der Segmentdateien nach einem inkrementellen Recrawl.
+
+Simuliert zwei Läufe eines SiteCrawler direkt über apply_page_result() (ohne Netzwerk und
+Parse-Pool) und prüft, welche Segmente nach finish_crawl() in der Datei stehen.
+
+Aufruf (vom Hauptverzeichnis des Projekts):
+    python -m pytest tests
+"""
+import hashlib
+import json
+import types
+from urllib.parse import urlparse
+
+import pytest
+
+import web_crawler
+from crawl_metrics import CrawlMetrics
+from segment_writer import open_text_lines
+
+BASE_URL = "https://docs.example.org/latest/"
+PAGE_A = BASE_URL + "kernel/threads/index.html"
+PAGE_B = BASE_URL + "kernel/timers/index.html"
+FETCH_INFO = {"etag": None, "last_modified": None, "body_hash": "body", "body_size": 100}
+
+TEXT_A = "Threads are the basic unit of execution. " * 10
+TEXT_B = "Timers invoke a function after a timeout expires. " * 10
+
+
+def page_result(title, content, warning=None):
+    return {"title": title, "content": content, "warning": warning, "doc_links": [], "github_links": []}
+
+
+@pytest.fixture
+def open_crawler(tmp_path, monkeypatch):
+    """Öffnet einen SiteCrawler auf einem temporären Datenordner; jeder Aufruf beendet den vorigen Lauf."""
+    monkeypatch.setattr(web_crawler, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(web_crawler, "LOG_DIR", str(tmp_path / "logs"))
+    site = web_crawler.site_settings({"project_name": "test", "base_url": BASE_URL, "extraction_engine": "bs4"})
+    crawlers = []
+
+    def open_site(recrawl=False):
+        if crawlers:
+            crawlers.pop().close()
+        runner = types.SimpleNamespace(
+            metrics=CrawlMetrics(), worker_id=None, sites_config=[site], log_file=None, shared_frontier_spec=None,
+        )
+        crawler = web_crawler.SiteCrawler(site, runner)
+        crawler.open()
+        crawlers.append(crawler)
+        if recrawl:
+            crawler.start_incremental_recrawl()
+        return crawler
+
+    yield open_site
+    if crawlers:
+        crawlers.pop().close()
+
+
+def read_segments(crawler):
+    crawler.segment_writer.close() # Puffer schreiben; compact_segments() hat ihn ggf. schon geschlossen
+    segments = []
+    for segment_file in crawler.segment_writer.existing_files():
+        with open_text_lines(segment_file) as f:
+            segments.extend(json.loads(line) for line in f)
+    return segments
+
+
+def legacy_segment_id(url):
+    """Segment-ID früherer Versionen: lesbarer Teil aus dem Pfad der rohen URL ("..._index_html")."""
+    path_part = urlparse(url).path.strip('/').replace('/', '_').replace('.', '_') or "homepage"
+    return f"{path_part}-{hashlib.sha256(web_crawler.normalize_url(url).encode('utf-8')).hexdigest()[:16]}"
+
+
+def first_run(open_crawler):
+    crawler = open_crawler()
+    crawler.apply_page_result(PAGE_A, page_result("Threads", TEXT_A), FETCH_INFO)
+    crawler.apply_page_result(PAGE_B, page_result("Timers", TEXT_B), FETCH_INFO)
+    crawler.finish_crawl()
+    return crawler
+
+
+def test_recrawl_replaces_changed_page(open_crawler):
+    first_run(open_crawler)
+
+    crawler = open_crawler(recrawl=True)
+    crawler.apply_page_result(PAGE_A, page_result("Threads", TEXT_A + "New section."), FETCH_INFO)
+    crawler.apply_page_result(PAGE_B, page_result("Timers", TEXT_B), FETCH_INFO)
+    crawler.finish_crawl()
+
+    assert crawler.recrawl_stats["updated"] == 1
+    assert sorted((segment["url"], segment["content"]) for segment in read_segments(crawler)) == [
+        (PAGE_A, TEXT_A + "New section."),
+        (PAGE_B, TEXT_B),
+    ]
+
+
+def test_recrawl_removes_page_that_became_duplicate(open_crawler):
+    first_run(open_crawler)
+
+    crawler = open_crawler(recrawl=True)
+    crawler.apply_page_result(PAGE_B, page_result("Timers", TEXT_B), FETCH_INFO)
+    crawler.apply_page_result(PAGE_A, page_result("Timers", TEXT_B), FETCH_INFO) # jetzt identisch mit PAGE_B
+    crawler.finish_crawl()
+
+    assert crawler.recrawl_stats["removed"] == 1
+    assert [segment["url"] for segment in read_segments(crawler)] == [PAGE_B]
+    assert crawler.checkpoint.get_page_state(PAGE_A)["content_hash"] is None
+
+
+def test_recrawl_removes_page_without_content(open_crawler):
+    first_run(open_crawler)
+
+    crawler = open_crawler(recrawl=True)
+    crawler.apply_page_result(PAGE_A, page_result(None, None, warning=f"Inhalt von {PAGE_A} ist zu kurz"), FETCH_INFO)
+    crawler.apply_page_result(PAGE_B, page_result("Timers", TEXT_B), FETCH_INFO)
+    crawler.finish_crawl()
+
+    assert crawler.recrawl_stats["removed"] == 1
+    assert [segment["url"] for segment in read_segments(crawler)] == [PAGE_B]
+
+    # Kommt der alte Inhalt zurück, wird er wieder geschrieben und gilt nicht als unverändert
+    crawler = open_crawler(recrawl=True)
+    crawler.apply_page_result(PAGE_A, page_result("Threads", TEXT_A), FETCH_INFO)
+    crawler.finish_crawl()
+    assert sorted(segment["url"] for segment in read_segments(crawler)) == [PAGE_A, PAGE_B]
+
+
+def test_compaction_replaces_segments_with_legacy_ids(open_crawler):
+    crawler = first_run(open_crawler)
+    crawler.segment_writer.close()
+    # Datenordner eines älteren Laufs: Segmente mit den IDs des alten Schemas
+    with open(crawler.segment_writer.existing_files()[0], 'w', encoding='utf-8') as f:
+        for url, title, text in ((PAGE_A, "Threads", TEXT_A), (PAGE_B, "Timers", TEXT_B)):
+            f.write(json.dumps({"id": legacy_segment_id(url), "url": url, "title": title, "content": text}) + '\n')
+    assert legacy_segment_id(PAGE_A) != web_crawler.segment_id(PAGE_A)
+
+    crawler = open_crawler(recrawl=True)
+    crawler.apply_page_result(PAGE_A, page_result("Threads", TEXT_A + "New section."), FETCH_INFO)
+    crawler.finish_crawl()
+
+    segments = read_segments(crawler)
+    assert sorted((segment["url"], segment["id"]) for segment in segments) == [
+        (PAGE_A, web_crawler.segment_id(PAGE_A)),
+        (PAGE_B, legacy_segment_id(PAGE_B)),
+    ]